@@ -0,0 +1,146 @@
+"""
+Artifact screening of EEG windows before feature extraction.
+
+Cheap statistics are computed for every window and channel in a few array ops:
+- peak-to-peak amplitude (movement, electrode pops, clipping at a large range)
+- flatline ratio: fraction of consecutive samples that are equal to within
+  FLAT_TOLERANCE_UV (disconnected electrodes, saturated/clipped amplifiers; the
+  tolerance also catches a flat channel after filtering)
+- line-noise ratio: share of the signal power within 1 Hz of 50 Hz or 60 Hz,
+  from a projection onto just those DFT bins
+
+A window is rejected when any channel fails a check (like MNE's epoch rejection),
+so it can be skipped before the Welch/feature path and model scoring.
+
+Amplitude thresholds are in microvolts. EDF input is converted from volts (pass
+uv_scale=VOLTS_TO_UV); CSV, JSON and binary uploads are assumed to be in
+microvolts already. Data in other units (e.g. a CSV exported in volts) would fail
+the flatline check in every window, which is why the default mode only flags.
+
+Configuration (environment):
+    EEG_ARTIFACT_MODE            "flag" (default: score rejected windows but mark them
+                                 and leave them out of the recording-level result
+                                 unless every window was rejected), "drop" (skip
+                                 rejected windows) or "off"
+    EEG_ARTIFACT_MAX_PTP_UV      peak-to-peak limit in microvolts
+    EEG_ARTIFACT_MAX_FLAT_RATIO  flatline ratio limit
+    EEG_ARTIFACT_MAX_LINE_RATIO  line-noise power ratio limit
+"""
+import os
+import numpy as np
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Tuple
+
+ARTIFACT_MODES = ("drop", "flag", "off")
+ARTIFACT_MODE = os.getenv("EEG_ARTIFACT_MODE", "flag")
+MAX_PTP_UV = float(os.getenv("EEG_ARTIFACT_MAX_PTP_UV", "500"))
+MAX_FLAT_RATIO = float(os.getenv("EEG_ARTIFACT_MAX_FLAT_RATIO", "0.5"))
+MAX_LINE_RATIO = float(os.getenv("EEG_ARTIFACT_MAX_LINE_RATIO", "0.5"))
+
+if ARTIFACT_MODE not in ARTIFACT_MODES:
+    raise ValueError(f"EEG_ARTIFACT_MODE must be one of {ARTIFACT_MODES}, got {ARTIFACT_MODE!r}")
+
+FLAT_TOLERANCE_UV = 1e-3
+LINE_FREQS = (50, 60)
+LINE_HALF_WIDTH_HZ = 1.0
+# parse_edf returns volts; CSV and JSON uploads are taken to be in microvolts
+VOLTS_TO_UV = 1e6
+
+
+def artifact_config() -> str:
+    """The active settings, e.g. for cache keys of results that depend on them."""
+    return f"{ARTIFACT_MODE}|{MAX_PTP_UV}|{MAX_FLAT_RATIO}|{MAX_LINE_RATIO}"
+
+
+@lru_cache(maxsize=32)
+def _line_basis(fs: int, n_samples: int) -> np.ndarray:
+    """
+    [n_samples, 2 * n_bins] cosines and sines of the DFT bins within
+    LINE_HALF_WIDTH_HZ of a line frequency (below Nyquist).
+    """
+    freqs = np.fft.rfftfreq(n_samples, 1.0 / fs)
+    near_line = np.zeros(len(freqs), dtype=bool)
+    for line in LINE_FREQS:
+        near_line |= np.abs(freqs - line) <= LINE_HALF_WIDTH_HZ
+    # DC and Nyquist bins have no one-sided doubling; neither is near a line frequency anyway
+    near_line[0] = near_line[-1] = False
+
+    k = np.flatnonzero(near_line)
+    phase = 2 * np.pi * np.outer(np.arange(n_samples), k) / n_samples
+    return np.concatenate([np.cos(phase), np.sin(phase)], axis=1)
+
+
+def artifact_stats(x: np.ndarray, fs: int, uv_scale: float = 1.0) -> Dict[str, np.ndarray]:
+    """
+    Per-window, per-channel artifact statistics.
+
+    Args:
+        x: [n_windows, n_channels, n_samples]
+        fs: Sampling rate
+        uv_scale: Factor converting x to microvolts
+
+    Returns:
+        {"ptp", "flat_ratio", "line_ratio"}, each [n_windows, n_channels]
+        (ptp is in the units of x).
+    """
+    n_samples = x.shape[-1]
+    ptp = x.max(axis=-1) - x.min(axis=-1)
+    step = np.abs(x[..., 1:] - x[..., :-1])
+    flat_ratio = np.count_nonzero(step <= FLAT_TOLERANCE_UV / uv_scale, axis=-1) / max(n_samples - 1, 1)
+
+    # Parseval: sum((x - mean)^2) = (2 / n) * sum over one-sided bins of |X_k|^2
+    # (except DC/Nyquist), so the line share needs only the line bins of X.
+    # float32 input stays float32: the ratio does not need more precision.
+    dtype = np.float32 if x.dtype == np.float32 else np.float64
+    centered = x - x.mean(axis=-1, keepdims=True, dtype=dtype)
+    total = np.einsum("ncs,ncs->nc", centered, centered)
+    line = 2.0 / n_samples * np.square(centered @ _line_basis(fs, n_samples).astype(dtype)).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        line_ratio = np.where(total > 0, line / total, 0.0)
+
+    return {"ptp": ptp, "flat_ratio": flat_ratio, "line_ratio": line_ratio}
+
+
+def screen_windows(x: np.ndarray, fs: int, uv_scale: float = 1.0) -> np.ndarray:
+    """
+    Which windows pass artifact screening.
+
+    Args:
+        x: [n_windows, n_channels, n_samples]
+        fs: Sampling rate
+        uv_scale: Factor converting x to microvolts (VOLTS_TO_UV for parse_edf output)
+
+    Returns:
+        Boolean mask [n_windows], True for clean windows (all True when screening is off).
+    """
+    if ARTIFACT_MODE == "off" or len(x) == 0:
+        return np.ones(len(x), dtype=bool)
+
+    stats = artifact_stats(x, fs, uv_scale)
+    bad = (
+        (stats["ptp"] * uv_scale > MAX_PTP_UV)
+        | (stats["flat_ratio"] > MAX_FLAT_RATIO)
+        | (stats["line_ratio"] > MAX_LINE_RATIO)
+    )
+    return ~bad.any(axis=-1)
+
+
+def screen_recording(data: np.ndarray, fs: int, window_size_sec: int, step_size_sec: int,
+                     uv_scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Screen every window segment_data would yield from a recording.
+
+    Args:
+        data: 2D array [n_samples, n_channels]
+
+    Returns:
+        (windows [n_windows, n_channels, window samples] zero-copy views of a
+         channel-major copy of data, clean-window mask [n_windows])
+    """
+    channels = np.ascontiguousarray(np.asarray(data).T)
+    if channels.shape[1] < window_size_sec * fs:
+        return np.empty((0, channels.shape[0], window_size_sec * fs), dtype=channels.dtype), np.empty(0, dtype=bool)
+    windows = sliding_window_view(channels, window_size_sec * fs, axis=-1)[:, ::step_size_sec * fs]
+    windows = windows.transpose(1, 0, 2)
+    return windows, screen_windows(windows, fs, uv_scale)
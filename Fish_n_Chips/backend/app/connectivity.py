@@ -0,0 +1,218 @@
+"""
+Cross-channel connectivity features.
+
+One FFT pass per window gives every channel's Welch-segment spectra; the full
+C x C cross-spectral matrix is then a single einsum (a batched matmul per
+frequency bin) over channel pairs, instead of one scipy.signal.coherence call (and
+its own FFTs) per pair. Magnitude-squared coherence and phase-locking value are
+averaged over each EEG band for every channel pair.
+
+The features are opt-in (connectivity=True in feature_extraction): the shipped
+model was trained on the per-channel features only.
+"""
+import numpy as np
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+from typing import List, Sequence, Tuple
+
+from .feature_extraction import BANDS, _band_slices
+
+# Welch segment length for connectivity: 1 s gives 1 Hz bins and 7 half-overlapping
+# segments per 4 s window (coherence from only a few segments is biased towards 1)
+CONNECTIVITY_NPERSEG_SEC = 1
+METRICS = ("coh", "plv")
+
+
+@lru_cache(maxsize=32)
+def pair_indices(n_channels: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row/column indices of the n_channels * (n_channels - 1) / 2 channel pairs (i < j)."""
+    return np.triu_indices(n_channels, k=1)
+
+
+def connectivity_feature_names(channel_names: Sequence[str], metrics: Sequence[str] = METRICS) -> List[str]:
+    """Column names of connectivity_features, e.g. "coh_alpha_Fp1-Fp2"."""
+    rows, cols = pair_indices(len(channel_names))
+    return [
+        f"{metric}_{band}_{channel_names[i]}-{channel_names[j]}"
+        for metric in metrics
+        for band in BANDS
+        for i, j in zip(rows, cols)
+    ]
+
+
+def n_connectivity_features(n_channels: int, metrics: Sequence[str] = METRICS) -> int:
+    """Number of columns connectivity_features returns for n_channels channels."""
+    return len(metrics) * len(BANDS) * n_channels * (n_channels - 1) // 2
+
+
+@lru_cache(maxsize=32)
+def _hann(nperseg: int) -> np.ndarray:
+    return get_window("hann", nperseg)
+
+
+def segment_spectra(x: np.ndarray, fs: int, nperseg: int, bins: slice = slice(None)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spectra of the Welch segments of every window and channel in one rfft.
+
+    Segments overlap by half, are mean-detrended and Hann-windowed, as in
+    scipy.signal.welch/csd/coherence.
+
+    Args:
+        x: [n_windows, n_channels, n_samples]
+        bins: Frequency bins to keep
+
+    Returns:
+        (freqs [n_freqs], spectra [n_windows, n_channels, n_segments, n_freqs])
+    """
+    window = _hann(nperseg)
+    segments = sliding_window_view(x, nperseg, axis=-1)[..., ::nperseg // 2, :]
+    spectra = np.fft.rfft(segments * window, axis=-1)[..., bins]
+    # Detrending is linear: rfft((s - mean) * w) = rfft(s * w) - mean * rfft(w)
+    spectra -= segments.mean(axis=-1, keepdims=True) * np.fft.rfft(window)[bins]
+    return np.fft.rfftfreq(nperseg, 1.0 / fs)[bins], spectra
+
+
+def cross_spectral_density(x: np.ndarray, fs: int, nperseg: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Welch cross-spectral density matrix of every window.
+
+    Args:
+        x: [n_windows, n_channels, n_samples]
+
+    Returns:
+        (freqs [n_freqs], csd [n_windows, n_freqs, n_channels, n_channels]); csd[..., i, j]
+        equals scipy.signal.csd(x[:, i], x[:, j]) and the diagonal is the Welch PSD.
+    """
+    nperseg = min(nperseg or fs * CONNECTIVITY_NPERSEG_SEC, x.shape[-1])
+    freqs, spectra = segment_spectra(x, fs, nperseg)
+
+    # Same convention as scipy.signal.csd: conj(X_i) * X_j
+    csd = np.einsum("nikf,njkf->nfij", spectra.conj(), spectra, optimize=True) / spectra.shape[2]
+
+    # Density scaling, one-sided (DC and Nyquist are not doubled)
+    csd *= 1.0 / (fs * np.sum(_hann(nperseg) ** 2))
+    csd[:, 1:] *= 2
+    if nperseg % 2 == 0:
+        csd[:, -1] /= 2
+    return freqs, csd
+
+
+def _band_bins(fs: int, nperseg: int) -> Tuple[Tuple[slice, ...], slice]:
+    """(each band's bin slice, the range of bins covering all bands)"""
+    band_slices = _band_slices(fs, nperseg)
+    return band_slices, slice(min(s.start for s in band_slices), max(s.stop for s in band_slices))
+
+
+def _phases(spectra: np.ndarray) -> np.ndarray:
+    """Unit phasors of spectra (0 where a bin has no energy)."""
+    magnitude = np.abs(spectra)
+    return np.divide(spectra, magnitude, out=np.zeros_like(spectra), where=magnitude > 0)
+
+
+def _cross_products(spectra: np.ndarray) -> np.ndarray:
+    """
+    Segment-summed cross products [n_windows, n_freqs, C, C] of spectra
+    [n_windows, n_freqs, C, n_segments]: the einsum "nfik,nfjk->nfij" of conj(X) and X,
+    written as a batched matmul so the result comes back contiguous.
+    """
+    return np.matmul(spectra.conj(), spectra.swapaxes(-1, -2))
+
+
+def _pair_spectra_features(spectra: np.ndarray, phases: np.ndarray, band_slices: Tuple[slice, ...],
+                           lo: int, metrics: Sequence[str]) -> np.ndarray:
+    """
+    Features from band-bin spectra and phases laid out [n_windows, n_freqs, n_channels, n_segments]
+    (phases may be None when "plv" is not requested).
+    """
+    n_windows, n_freqs, n_channels, n_segments = spectra.shape
+    rows, cols = pair_indices(n_channels)
+    # Pairs as positions in the flattened C x C matrix (np.take on a contiguous
+    # axis is much faster than two-array fancy indexing)
+    flat_pairs = rows * n_channels + cols
+
+    per_metric = []
+    for metric in metrics:
+        if metric == "coh":
+            # Scaling cancels in the ratio, so the unscaled cross-spectra suffice;
+            # the diagonal is each channel's power
+            csd = _cross_products(spectra)
+            power = np.ascontiguousarray(np.diagonal(csd, axis1=2, axis2=3).real)
+            cross = np.take(csd.reshape(n_windows, n_freqs, -1), flat_pairs, axis=-1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pair_values = np.abs(cross) ** 2 / (np.take(power, rows, axis=-1) * np.take(power, cols, axis=-1))
+        elif metric == "plv":
+            plv = _cross_products(phases)
+            pair_values = np.abs(np.take(plv.reshape(n_windows, n_freqs, -1), flat_pairs, axis=-1)) / n_segments
+        else:
+            raise ValueError(f"Unknown connectivity metric: {metric}")
+
+        # [n_windows, n_freqs, n_pairs] -> mean over each band's bins
+        pair_values = np.nan_to_num(pair_values)
+        per_metric.extend(pair_values[:, s.start - lo:s.stop - lo].mean(axis=1) for s in band_slices)
+
+    return np.concatenate(per_metric, axis=1)
+
+
+def connectivity_features(x: np.ndarray, fs: int, nperseg: int = None, metrics: Sequence[str] = METRICS) -> np.ndarray:
+    """
+    Band-averaged coherence and phase-locking value for every channel pair.
+
+    Args:
+        x: [n_windows, n_channels, n_samples]
+        fs: Sampling rate
+        nperseg: Welch segment length (default CONNECTIVITY_NPERSEG_SEC seconds)
+        metrics: Any of "coh" (magnitude-squared coherence) and "plv"
+
+    Returns:
+        2D feature matrix [n_windows, len(metrics) * n_bands * n_pairs], ordered by
+        metric, then band, then pair (see connectivity_feature_names).
+    """
+    nperseg = min(nperseg or fs * CONNECTIVITY_NPERSEG_SEC, x.shape[-1])
+    band_slices, bins = _band_bins(fs, nperseg)
+    _, spectra = segment_spectra(x, fs, nperseg, bins)
+
+    # [N, C, K, F] -> [N, F, C, K] so the pair products are one matmul per bin
+    spectra = np.ascontiguousarray(spectra.transpose(0, 3, 1, 2))
+    phases = _phases(spectra) if "plv" in metrics else None
+    return _pair_spectra_features(spectra, phases, band_slices, bins.start, metrics)
+
+
+def sliding_connectivity_features(channels: np.ndarray, fs: int, window_size_samples: int, step_size_samples: int,
+                                  n_windows: int, nperseg: int = None, metrics: Sequence[str] = METRICS) -> np.ndarray:
+    """
+    connectivity_features of the first n_windows windows of a channel-major recording.
+
+    When windows start on the Welch segment grid, consecutive windows share most
+    of their segments, so every segment is transformed once and each window
+    gathers its own.
+
+    Args:
+        channels: [n_channels, n_samples]
+
+    Returns:
+        Same as connectivity_features for the windows
+        channels[:, w * step_size_samples:w * step_size_samples + window_size_samples].
+    """
+    nperseg = min(nperseg or fs * CONNECTIVITY_NPERSEG_SEC, window_size_samples)
+    hop = nperseg // 2
+    if n_windows == 0:
+        return np.empty((0, n_connectivity_features(channels.shape[0], metrics)))
+    if step_size_samples % hop or (window_size_samples - nperseg) % hop:
+        windows = sliding_window_view(channels, window_size_samples, axis=-1)[:, ::step_size_samples][:, :n_windows]
+        return connectivity_features(windows.transpose(1, 0, 2), fs, nperseg, metrics)
+
+    end = (n_windows - 1) * step_size_samples + window_size_samples
+    band_slices, bins = _band_bins(fs, nperseg)
+    _, spectra = segment_spectra(channels[np.newaxis, :, :end], fs, nperseg, bins)
+
+    # [F, C, all segments], then each window's segments -> [N, F, C, K]
+    spectra = np.ascontiguousarray(spectra[0].transpose(2, 0, 1))
+    segments_per_window = (window_size_samples - nperseg) // hop + 1
+    index = (np.arange(n_windows) * (step_size_samples // hop))[:, np.newaxis] + np.arange(segments_per_window)
+
+    phases = None
+    if "plv" in metrics:
+        phases = np.ascontiguousarray(_phases(spectra)[:, :, index].transpose(2, 0, 1, 3))
+    spectra = np.ascontiguousarray(spectra[:, :, index].transpose(2, 0, 1, 3))
+    return _pair_spectra_features(spectra, phases, band_slices, bins.start, metrics)
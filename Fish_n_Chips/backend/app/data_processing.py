@@ -2,94 +2,512 @@ import mne
 import numpy as np
 import pandas as pd
 import io
+import csv
+import os
+import scipy.io
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, Mapping, Tuple, Union
 from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from .metrics import stage
+from .schemas import EEGSampleRequest
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 REQUIRED_CHANNELS = [
     'Fp1', 'Fp2', 'F7', 'F3', 'Fz', 'F4', 'F8', 'T3',
     'C3', 'Cz', 'C4', 'T4', 'T5', 'P3', 'Pz', 'P4'
 ]
 
+# 10-20 names in REQUIRED_CHANNELS -> their 10-10 equivalents (used by EEGLAB montages)
+CHANNEL_ALIASES = {'T3': 'T7', 'T4': 'T8', 'T5': 'P7', 'T6': 'P8'}
+
 TARGET_SFREQ = 256
 
-def parse_edf(file_content: bytes) -> np.ndarray:
+# Streaming CSV block sizes (pandas rows / pyarrow bytes)
+CSV_CHUNK_ROWS = 8192
+CSV_BLOCK_BYTES = 1 << 20
+
+# EDF physical dimensions MNE converts to volts
+EDF_UNIT_SCALE = {'uv': 1e-6, 'µv': 1e-6, 'mv': 1e-3, 'v': 1.0}
+
+class EDFFormatError(ValueError):
+    """Raised when an upload is not a plain EDF/EDF+C file the native reader can decode."""
+
+def _edf_field(buf: memoryview, offset: int, width: int) -> str:
+    return bytes(buf[offset:offset + width]).decode('latin-1').strip()
+
+def _read_edf_header(buf: memoryview) -> dict:
     """
-    Parses an EDF file content and returns a 2D numpy array [samples, channels].
+    Parse the fixed EDF header and the per-signal header block.
     """
+    if len(buf) < 256 or _edf_field(buf, 0, 8) != '0':
+        raise EDFFormatError("Not an EDF file")
+
     try:
-        # MNE reads from a file path, so we need to write to a temp file or use a BytesIO wrapper if supported.
-        # MNE's read_raw_edf strictly requires a filename.
-        # We will write to a temp file.
-        import tempfile
-        import os
+        header_bytes = int(_edf_field(buf, 184, 8))
+        reserved = _edf_field(buf, 192, 44)
+        n_records = int(_edf_field(buf, 236, 8))
+        record_duration = float(_edf_field(buf, 244, 8))
+        ns = int(_edf_field(buf, 252, 4))
+    except ValueError as e:
+        raise EDFFormatError(f"Malformed EDF header: {e}")
 
-        with tempfile.NamedTemporaryFile(suffix=".edf", delete=False) as tmp:
-            tmp.write(file_content)
-            tmp_path = tmp.name
+    if reserved.startswith('EDF+D'):
+        raise EDFFormatError("Discontinuous EDF+ recordings are not supported")
+    if header_bytes != 256 * (ns + 1) or len(buf) < header_bytes or record_duration <= 0:
+        raise EDFFormatError("Inconsistent EDF header")
 
-        try:
-            raw = mne.io.read_raw_edf(tmp_path, preload=True, verbose=False)
-        finally:
-            os.remove(tmp_path)
+    # Signal header fields are stored field-by-field for all ns signals
+    def fields(offset: int, width: int) -> list:
+        return [_edf_field(buf, offset + i * width, width) for i in range(ns)]
+
+    base = 256
+    labels = fields(base, 16)
+    base += ns * (16 + 80)  # labels, transducer types
+    units = fields(base, 8)
+    base += ns * 8
+    try:
+        phys_min = np.array(fields(base, 8), dtype=np.float64)
+        phys_max = np.array(fields(base + ns * 8, 8), dtype=np.float64)
+        dig_min = np.array(fields(base + ns * 16, 8), dtype=np.float64)
+        dig_max = np.array(fields(base + ns * 24, 8), dtype=np.float64)
+        base += ns * (32 + 80)  # ranges, prefiltering
+        n_samples = np.array(fields(base, 8), dtype=np.int64)
+    except ValueError as e:
+        raise EDFFormatError(f"Malformed EDF signal header: {e}")
+
+    record_samples = int(n_samples.sum())
+    if n_records < 0:
+        # Recording was not closed properly; infer from the file size
+        n_records = (len(buf) - header_bytes) // (2 * record_samples)
+
+    return {
+        'header_bytes': header_bytes,
+        'n_records': n_records,
+        'record_duration': record_duration,
+        'labels': tuple(labels),
+        'units': units,
+        'phys_min': phys_min,
+        'phys_max': phys_max,
+        'dig_min': dig_min,
+        'dig_max': dig_max,
+        'n_samples': n_samples,
+        'record_samples': record_samples,
+    }
 
-        # Pick channels
-        # MNE channel names might be case sensitive or have extra labels (e.g. "EEG Fp1-REF")
-        # We need a robust matching strategy.
-        available_channels = raw.ch_names
-        picked_channels = []
+def _match_channels(available_channels) -> list:
+    """
+    Resolve REQUIRED_CHANNELS against the available channel names.
+    MNE channel names might be case sensitive or have extra labels (e.g. "EEG Fp1-REF")
+    """
+    picked_channels = []
+    lowered = [av_ch.lower() for av_ch in available_channels]
 
-        for req_ch in REQUIRED_CHANNELS:
+    for req_ch in REQUIRED_CHANNELS:
+        match = None
+        # Fall back to the 10-10 name (e.g. T7 for T3) if the 10-20 one is absent
+        for name in filter(None, (req_ch, CHANNEL_ALIASES.get(req_ch))):
             # Try exact match
-            if req_ch in available_channels:
-                picked_channels.append(req_ch)
-                continue
+            if name in available_channels:
+                match = name
+                break
 
             # Try case-insensitive or substring match
             # This is a heuristic; might need refinement based on actual data
-            match = None
-            for av_ch in available_channels:
-                if req_ch.lower() in av_ch.lower():
-                    match = av_ch
-                    break
-
+            name_lower = name.lower()
+            match = next((av_ch for av_ch, low in zip(available_channels, lowered) if name_lower in low), None)
             if match:
-                picked_channels.append(match)
-            else:
-                raise HTTPException(status_code=400, detail=f"Missing required channel: {req_ch}")
+                break
+
+        if match:
+            picked_channels.append(match)
+        else:
+            raise HTTPException(status_code=400, detail=f"Missing required channel: {req_ch}")
+
+    return picked_channels
+
+@lru_cache(maxsize=64)
+def _channel_indices(labels: Tuple[str, ...]) -> Tuple[int, ...]:
+    """
+    Signal indices of REQUIRED_CHANNELS, cached per EDF header signature (its label list).
+    """
+    picked = _match_channels(list(labels))
+    return tuple(labels.index(ch) for ch in picked)
+
+def _parse_edf_native(file_content: bytes):
+    """
+    Decode only the required channels of an EDF/EDF+C upload, straight from memory.
+
+    Returns:
+        (data [channels, samples] float32, sampling rate)
+    """
+    buf = memoryview(file_content)
+    header = _read_edf_header(buf)
+
+    picks = np.array(_channel_indices(header['labels']))
+    n_samples = header['n_samples'][picks]
+    if np.any(n_samples != n_samples[0]):
+        raise EDFFormatError("Required channels have different sampling rates")
+
+    samples_per_record = int(n_samples[0])
+    sfreq = samples_per_record / header['record_duration']
+    n_records = header['n_records']
+    record_samples = header['record_samples']
+
+    if len(buf) < header['header_bytes'] + 2 * n_records * record_samples:
+        raise EDFFormatError("EDF data section is truncated")
+
+    # Zero-copy view of the data records: [n_records, samples in one record]
+    records = np.frombuffer(
+        buf, dtype='<i2', count=n_records * record_samples, offset=header['header_bytes']
+    ).reshape(n_records, record_samples)
 
-        raw.pick_channels(picked_channels)
+    # Gather just the picked signals: [n_records, channels, samples_per_record]
+    offsets = np.concatenate([[0], np.cumsum(header['n_samples'])[:-1]])[picks]
+    columns = offsets[:, np.newaxis] + np.arange(samples_per_record)
+    digital = records[:, columns]
 
-        # Reorder channels to match training order
-        raw.reorder_channels(picked_channels) # pick_channels might preserve order, but let's be safe if we mapped them
+    # Digital -> physical, in volts like MNE
+    scale = np.array([EDF_UNIT_SCALE.get(header['units'][i].lower(), 1.0) for i in picks])
+    gain = (header['phys_max'][picks] - header['phys_min'][picks]) / (header['dig_max'][picks] - header['dig_min'][picks])
+    offset = header['phys_min'][picks] - header['dig_min'][picks] * gain
+
+    data = np.empty((len(picks), n_records * samples_per_record), dtype=np.float32)
+    data_view = data.reshape(len(picks), n_records, samples_per_record)
+    np.multiply(digital.transpose(1, 0, 2), (gain * scale)[:, np.newaxis, np.newaxis], out=data_view, casting='unsafe')
+    data_view += (offset * scale)[:, np.newaxis, np.newaxis].astype(np.float32)
+
+    return data, sfreq
+
+def _parse_edf_mne(file_content: bytes) -> np.ndarray:
+    """
+    Fallback reader for files the native parser does not handle (EDF+D, BDF, mixed rates).
+    """
+    # MNE reads from a file path, so we need to write to a temp file or use a BytesIO wrapper if supported.
+    # MNE's read_raw_edf strictly requires a filename.
+    # We will write to a temp file.
+    import tempfile
+    import os
+
+    with tempfile.NamedTemporaryFile(suffix=".edf", delete=False) as tmp:
+        tmp.write(file_content)
+        tmp_path = tmp.name
+
+    try:
+        raw = mne.io.read_raw_edf(tmp_path, preload=True, verbose=False)
+    finally:
+        os.remove(tmp_path)
+
+    # Pick channels
+    picked_channels = _match_channels(raw.ch_names)
+
+    raw.pick_channels(picked_channels)
+
+    # Reorder channels to match training order
+    raw.reorder_channels(picked_channels) # pick_channels might preserve order, but let's be safe if we mapped them
+
+    # Resample if necessary
+    if raw.info['sfreq'] != TARGET_SFREQ:
+        raw.resample(TARGET_SFREQ)
+
+    # Get data
+    data, times = raw.get_data(return_times=True)
+    # data is [channels, samples], we need [samples, channels]
+    return data.T
+
+@stage("resample")
+def _resample_to_target(data: np.ndarray, sfreq: float) -> np.ndarray:
+    """
+    Resample float32 [channels, samples] to TARGET_SFREQ (no-op if already there).
+    """
+    if sfreq == TARGET_SFREQ:
+        return data
+    # MNE only resamples float64
+    data = mne.filter.resample(data.astype(np.float64), up=float(TARGET_SFREQ), down=float(sfreq), npad='auto', axis=-1)
+    return data.astype(np.float32)
+
+@stage("parse_edf")
+def parse_edf(file_content: bytes) -> np.ndarray:
+    """
+    Parses an EDF file content and returns a 2D numpy array [samples, channels].
+    """
+    try:
+        try:
+            data, sfreq = _parse_edf_native(file_content)
+        except EDFFormatError:
+            return _parse_edf_mne(file_content)
 
         # Resample if necessary
-        if raw.info['sfreq'] != TARGET_SFREQ:
-            raw.resample(TARGET_SFREQ)
+        data = _resample_to_target(data, sfreq)
 
-        # Get data
-        data, times = raw.get_data(return_times=True)
         # data is [channels, samples], we need [samples, channels]
         return data.T
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing EDF file: {str(e)}")
 
-def parse_csv(file_content: str) -> np.ndarray:
+def _eeglab_struct(set_path: str):
     """
-    Parses a CSV string and returns a 2D numpy array.
-    Assumes columns are channels and rows are timepoints.
+    The EEG structure of a MATLAB v5 .set file. Files saved without the EEG
+    wrapper keep its fields as top-level variables.
+    """
+    mat = scipy.io.loadmat(set_path, squeeze_me=True, struct_as_record=False)
+    if 'EEG' in mat:
+        return mat['EEG']
+    fields = {k: v for k, v in mat.items() if not k.startswith('__')}
+    return type('EEGLABFields', (), fields)
+
+def _eeglab_signals(eeg, set_path: str) -> np.ndarray:
+    """
+    [channels, samples] signals of an EEGLAB dataset; epochs are concatenated.
+    Data in a separate .fdt file is memory-mapped rather than read.
+    """
+    n_channels = int(eeg.nbchan)
+    n_samples = int(eeg.pnts) * int(eeg.trials)
+
+    if isinstance(eeg.data, str):
+        fdt_path = os.path.join(os.path.dirname(set_path), eeg.data)
+        if not os.path.exists(fdt_path):
+            # Renamed recordings still point .data at the original .fdt name
+            fdt_path = os.path.splitext(set_path)[0] + '.fdt'
+        # .fdt is float32, column-major [channels, samples]
+        return np.memmap(fdt_path, dtype='<f4', mode='r', shape=(n_channels, n_samples), order='F')
+
+    return np.asarray(eeg.data, dtype=np.float32).reshape(n_channels, n_samples, order='F')
+
+def parse_eeglab(set_path: str) -> np.ndarray:
+    """
+    Parses an EEGLAB .set recording (MATLAB v5, data embedded or in a .fdt file)
+    and returns a 2D float32 array [samples, channels] at TARGET_SFREQ, in volts
+    like parse_edf (EEGLAB stores microvolts).
     """
     try:
-        df = pd.read_csv(io.StringIO(file_content))
-
-        # Basic validation: check if we have 16 columns
-        # In a real app, we'd check headers too
-        if df.shape[1] != 16:
-             # Try to select by name if headers exist
-            if all(ch in df.columns for ch in REQUIRED_CHANNELS):
-                df = df[REQUIRED_CHANNELS]
-            else:
-                raise HTTPException(status_code=400, detail=f"CSV must have 16 channels. Found {df.shape[1]}")
-
-        return df.values
+        eeg = _eeglab_struct(set_path)
+        labels = [str(ch.labels) for ch in np.atleast_1d(eeg.chanlocs)]
+        picks = list(_channel_indices(tuple(labels)))
+
+        signals = _eeglab_signals(eeg, set_path)
+        # Only the picked channels are copied out of the memory map
+        data = np.asarray(signals[picks], dtype=np.float32) * np.float32(1e-6)
+
+        data = _resample_to_target(data, float(eeg.srate))
+        return data.T
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing EEGLAB file: {str(e)}")
+
+def _select_csv_columns(header: List[str]) -> List[int]:
+    """
+    Column indices of the 16 EEG channels in a CSV header.
+    """
+    # Basic validation: check if we have 16 columns
+    if len(header) == 16:
+        return list(range(16))
+
+    # Try to select by name if headers exist
+    if all(ch in header for ch in REQUIRED_CHANNELS):
+        return [header.index(ch) for ch in REQUIRED_CHANNELS]
+
+    raise HTTPException(status_code=400, detail=f"CSV must have 16 channels. Found {len(header)}")
+
+def _iter_csv_blocks_arrow(stream: BinaryIO, columns: List[int]) -> Iterator[np.ndarray]:
+    names = [f"f{i}" for i in columns]
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(autogenerate_column_names=True, block_size=CSV_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(include_columns=names, column_types={name: pa.float32() for name in names}),
+    )
+    for batch in reader:
+        if batch.num_rows:
+            yield np.column_stack([col.to_numpy(zero_copy_only=False) for col in batch.columns])
+
+def _iter_csv_blocks_pandas(stream: BinaryIO, columns: List[int]) -> Iterator[np.ndarray]:
+    reader = pd.read_csv(
+        stream, header=None, usecols=columns, dtype=np.float32, engine='c', chunksize=CSV_CHUNK_ROWS
+    )
+    for chunk in reader:
+        # usecols does not preserve the requested order
+        yield chunk[columns].to_numpy()
+
+def iter_csv_blocks(stream: BinaryIO) -> Iterator[np.ndarray]:
+    """
+    Stream a CSV upload as float32 blocks [rows, 16 channels].
+
+    Reads straight from the binary upload stream (no decode/StringIO copy), picks the
+    channel columns from the header, and parses with pyarrow when it is installed,
+    otherwise with the pandas C engine.
+    """
+    try:
+        header_line = stream.readline().decode('utf-8-sig')
+        header = [name.strip() for name in next(csv.reader([header_line]), [])]
+        columns = _select_csv_columns(header)
+
+        if pa_csv is not None:
+            yield from _iter_csv_blocks_arrow(stream, columns)
+        else:
+            yield from _iter_csv_blocks_pandas(stream, columns)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing CSV file: {str(e)}")
+
+@stage("parse_csv")
+def parse_csv_stream(stream: BinaryIO) -> np.ndarray:
+    """
+    Parses a CSV upload stream and returns a 2D float32 array [samples, channels].
+    """
+    blocks = list(iter_csv_blocks(stream))
+    if not blocks:
+        return np.empty((0, len(REQUIRED_CHANNELS)), dtype=np.float32)
+    return np.concatenate(blocks)
+
+def parse_csv(file_content: Union[str, bytes]) -> np.ndarray:
+    """
+    Parses CSV content and returns a 2D numpy array.
+    Assumes columns are channels and rows are timepoints.
+    """
+    if isinstance(file_content, str):
+        file_content = file_content.encode('utf-8')
+    return parse_csv_stream(io.BytesIO(file_content))
+
+# Binary /predict payloads
+RAW_EEG_CONTENT_TYPE = "application/octet-stream"
+NPY_CONTENT_TYPES = ("application/x-npy", "application/npy")
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def _parse_shape(shape, n_values: int) -> Tuple[int, int]:
+    """
+    Validate a [samples, channels] shape against the number of decoded values.
+    """
+    try:
+        n_samples, n_channels = (int(dim) for dim in shape)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"EEG shape must be [samples, channels]. Got {shape}")
+
+    if n_samples * n_channels != n_values:
+        raise HTTPException(status_code=400, detail=f"EEG shape {n_samples}x{n_channels} does not match {n_values} values")
+    return n_samples, n_channels
+
+def _parse_sampling_rate(value) -> int:
+    """
+    Validate a sampling rate from the X-Sampling-Rate header or a msgpack field.
+    """
+    try:
+        fs = float(value)
+    except (TypeError, ValueError):
+        fs = float("nan")
+
+    # Whole numbers only: int() would silently truncate 255.9 (or 0.5 to 0)
+    if not np.isfinite(fs) or fs <= 0 or not fs.is_integer():
+        raise HTTPException(status_code=400, detail=f"Sampling rate must be a positive integer. Got {value!r}")
+    return int(fs)
+
+def parse_raw_float32(body: bytes, shape_header: str = None) -> np.ndarray:
+    """
+    Decode raw little-endian float32 samples (row-major [samples, channels]) without copying.
+
+    Args:
+        body: Request body
+        shape_header: "samples,channels" (X-EEG-Shape); defaults to 16 channels
+    """
+    if len(body) % 4:
+        raise HTTPException(status_code=400, detail="Raw EEG payload must be a whole number of float32 values")
+
+    data = np.frombuffer(body, dtype='<f4')
+    if shape_header:
+        shape = _parse_shape(shape_header.split(','), data.size)
+    else:
+        shape = (-1, len(REQUIRED_CHANNELS))
+    try:
+        return data.reshape(shape)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Raw EEG payload is not a multiple of {len(REQUIRED_CHANNELS)} channels")
+
+def parse_npy(body: bytes) -> np.ndarray:
+    """
+    Decode a .npy payload as a view of the request body.
+    """
+    try:
+        header = io.BytesIO(body)
+        version = np.lib.format.read_magic(header)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+        if dtype.hasobject:
+            raise ValueError("object arrays are not allowed")
+
+        data = np.frombuffer(body, dtype=dtype, count=int(np.prod(shape)), offset=header.tell())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error processing .npy payload: {str(e)}")
+
+    return data.reshape(shape, order='F' if fortran_order else 'C')
+
+def parse_msgpack(body: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decode a msgpack payload {"eeg": <float32 bytes>, "shape": [samples, channels], "sampling_rate": int}.
+    "eeg" may also be a list of lists, as in the JSON body.
+    """
+    if msgpack is None:
+        raise HTTPException(status_code=415, detail="msgpack payloads require the msgpack package")
+
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing msgpack payload: {str(e)}")
+
+    if not isinstance(payload, dict) or "eeg" not in payload:
+        raise HTTPException(status_code=400, detail="msgpack payload must be a map with an 'eeg' field")
+
+    fs = _parse_sampling_rate(payload.get("sampling_rate", TARGET_SFREQ))
+    eeg = payload["eeg"]
+    if isinstance(eeg, (bytes, bytearray)):
+        if len(eeg) % 4:
+            raise HTTPException(status_code=400, detail="msgpack 'eeg' must be a whole number of float32 values")
+        data = np.frombuffer(eeg, dtype='<f4')
+        return data.reshape(_parse_shape(payload.get("shape"), data.size)), fs
+
+    try:
+        data = np.asarray(eeg, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="msgpack 'eeg' must be float32 bytes or a list of equal-length numeric rows")
+    if data.ndim != 2:
+        raise HTTPException(status_code=400, detail=f"msgpack 'eeg' must be [samples, channels]. Got {data.ndim} dimensions")
+    return data, fs
+
+@stage("decode_payload")
+def decode_eeg_payload(body: bytes, headers: Mapping[str, str]) -> Tuple[np.ndarray, int]:
+    """
+    Decode a /predict body into ([samples, channels] array, sampling rate) by Content-Type.
+    Binary payloads are decoded as views of the body, without per-sample Python objects.
+    """
+    content_type = headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    if content_type == RAW_EEG_CONTENT_TYPE:
+        fs = _parse_sampling_rate(headers.get("x-sampling-rate", TARGET_SFREQ))
+        return parse_raw_float32(body, headers.get("x-eeg-shape")), fs
+    if content_type in NPY_CONTENT_TYPES:
+        fs = _parse_sampling_rate(headers.get("x-sampling-rate", TARGET_SFREQ))
+        return parse_npy(body), fs
+    # JSON and msgpack bodies carry their own sampling_rate; X-Sampling-Rate is ignored
+    if content_type in MSGPACK_CONTENT_TYPES:
+        return parse_msgpack(body)
+    if content_type.endswith("json"):
+        try:
+            request = EEGSampleRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        return np.array(request.eeg), request.sampling_rate
+
+    raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
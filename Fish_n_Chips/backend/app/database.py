@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+from backend.app.metrics import stage_series
+
 # Database URL - using SQLite for simplicity
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cogni_safe.db")
 
@@ -15,6 +17,25 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Commit latency, flush included ("db_commit" stage in /metrics)
+_commit_stage = stage_series("db_commit")
+
+@event.listens_for(SessionLocal, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = _commit_stage.start()
+
+@event.listens_for(SessionLocal, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        _commit_stage.finish(started)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _commit_failed(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        _commit_stage.finish(started, failed=True)
+
 # Base class for models
 Base = declarative_base()
 
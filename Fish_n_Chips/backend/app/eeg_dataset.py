@@ -0,0 +1,228 @@
+"""
+Out-of-core access to the training CSV (EEG_data_set.csv).
+
+`convert` streams the CSV once into a memory-mappable store next to it:
+    <prefix>.npy         float32 [rows, 16 channels], channels picked as for uploads
+    <prefix>.labels.npy  int64 [rows] status column
+    <prefix>.json        index: row count, channels, classes, fs, source file
+`iter_windows` / `iter_feature_batches` then stream fixed-size windows with their
+majority labels from memory maps, a batch at a time, so the table is never
+materialized in RAM.
+
+Usage:
+    python -m backend.app.eeg_dataset convert EEG_data_set.csv [--out data/EEG_data_set]
+"""
+import argparse
+import csv
+import json
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Iterator, Optional, Tuple
+
+from .data_processing import TARGET_SFREQ, CSV_BLOCK_BYTES, _select_csv_columns, pa, pa_csv
+from .feature_extraction import extract_features_sliding
+
+# Rows per pandas chunk when pyarrow is not installed
+CONVERT_CHUNK_ROWS = 65536
+# Windows per batch yielded by the iterators
+WINDOW_BATCH_SIZE = 256
+
+
+def window_labels(sample_labels: np.ndarray, n_windows: int, window_size_samples: int,
+                  step_size_samples: int) -> np.ndarray:
+    """
+    Majority label of each window (ties go to the smaller label, like pandas mode()).
+    """
+    classes, encoded = np.unique(sample_labels, return_inverse=True)
+
+    # counts[k, i] = number of samples of class k among the first i samples
+    counts = np.zeros((len(classes), len(encoded) + 1), dtype=np.int64)
+    counts[encoded, np.arange(1, len(encoded) + 1)] = 1
+    np.cumsum(counts, axis=1, out=counts)
+
+    starts = np.arange(n_windows) * step_size_samples
+    per_window = counts[:, starts + window_size_samples] - counts[:, starts]
+    return classes[np.argmax(per_window, axis=0)]
+
+
+def _csv_layout(csv_path: str) -> Tuple[list, list, Optional[int]]:
+    """(header, channel column indices, status column index or None)"""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        header = [name.strip() for name in next(csv.reader(f), [])]
+
+    status = next((i for i, name in enumerate(header) if name.lower() == "status"), None)
+    channel_header = [name for i, name in enumerate(header) if i != status]
+    channels = [header.index(channel_header[i]) for i in _select_csv_columns(channel_header)]
+    return header, channels, status
+
+
+def _iter_csv_rows_arrow(csv_path: str, channels: list, status: Optional[int]):
+    names = [f"f{i}" for i in channels]
+    column_types = {name: pa.float32() for name in names}
+    if status is not None:
+        column_types[f"f{status}"] = pa.int64()
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(autogenerate_column_names=True, skip_rows=1, block_size=CSV_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(include_columns=list(column_types), column_types=column_types),
+    )
+    for batch in reader:
+        if batch.num_rows:
+            columns = [col.to_numpy(zero_copy_only=False) for col in batch.columns]
+            yield np.column_stack(columns[:len(channels)]), columns[-1] if status is not None else None
+
+
+def _iter_csv_rows_pandas(csv_path: str, channels: list, status: Optional[int]):
+    usecols = channels + ([status] if status is not None else [])
+    dtypes = {i: np.float32 for i in channels}
+    reader = pd.read_csv(csv_path, header=None, skiprows=1, usecols=usecols, dtype=dtypes,
+                         engine="c", chunksize=CONVERT_CHUNK_ROWS)
+    for chunk in reader:
+        # usecols does not preserve the requested order
+        yield chunk[channels].to_numpy(), chunk[status].to_numpy(dtype=np.int64) if status is not None else None
+
+
+def convert(csv_path: str, prefix: Optional[str] = None, fs: int = TARGET_SFREQ) -> dict:
+    """
+    Stream csv_path into the <prefix>.npy / .labels.npy / .json store, one block
+    of rows in memory at a time. Returns the index.
+    """
+    if prefix is None:
+        prefix = os.path.splitext(csv_path)[0]
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+
+    header, channels, status = _csv_layout(csv_path)
+    blocks = (_iter_csv_rows_arrow if pa_csv is not None else _iter_csv_rows_pandas)(csv_path, channels, status)
+
+    n_rows = 0
+    classes = set()
+    data_tmp, labels_tmp = f"{prefix}.npy.tmp", f"{prefix}.labels.npy.tmp"
+    with open(data_tmp, "wb") as data_file, open(labels_tmp, "wb") as labels_file:
+        # Headers are rewritten in place with the final row count (npy headers
+        # are padded so the growth axis can change length)
+        _write_npy_header(data_file, "<f4", (0, len(channels)))
+        _write_npy_header(labels_file, "<i8", (0,))
+
+        for data, labels in blocks:
+            data_file.write(np.ascontiguousarray(data, dtype="<f4").tobytes())
+            if labels is not None:
+                labels_file.write(labels.astype("<i8").tobytes())
+                classes.update(np.unique(labels).tolist())
+            n_rows += len(data)
+
+        data_file.seek(0)
+        _write_npy_header(data_file, "<f4", (n_rows, len(channels)))
+        labels_file.seek(0)
+        _write_npy_header(labels_file, "<i8", (n_rows if status is not None else 0,))
+
+    os.replace(data_tmp, f"{prefix}.npy")
+    os.replace(labels_tmp, f"{prefix}.labels.npy")
+
+    st = os.stat(csv_path)
+    index = {
+        "source": os.path.abspath(csv_path),
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+        "n_rows": n_rows,
+        "fs": fs,
+        "channels": [header[i] for i in channels],
+        "label_column": header[status] if status is not None else None,
+        "classes": sorted(classes),
+    }
+    with open(f"{prefix}.json", "w") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+def _write_npy_header(f, descr: str, shape: tuple):
+    np.lib.format.write_array_header_1_0(f, {"descr": descr, "fortran_order": False, "shape": shape})
+
+
+def open_store(prefix: str) -> Tuple[np.ndarray, Optional[np.ndarray], dict]:
+    """Memory-mapped (signals [rows, channels], labels [rows] or None, index) of a converted store."""
+    with open(f"{prefix}.json") as f:
+        index = json.load(f)
+    data = np.load(f"{prefix}.npy", mmap_mode="r")
+    labels = np.load(f"{prefix}.labels.npy", mmap_mode="r") if index["label_column"] else None
+    return data, labels, index
+
+
+def _iter_window_spans(n_rows: int, window_size_samples: int, step_size_samples: int,
+                       batch_size: int) -> Iterator[Tuple[int, int, int]]:
+    """(first row, end row, number of windows) of each batch of consecutive windows."""
+    if n_rows < window_size_samples:
+        return
+    n_windows = (n_rows - window_size_samples) // step_size_samples + 1
+
+    for first in range(0, n_windows, batch_size):
+        count = min(batch_size, n_windows - first)
+        start = first * step_size_samples
+        yield start, start + (count - 1) * step_size_samples + window_size_samples, count
+
+
+def iter_windows(prefix: str, window_size_sec: int = 4, step_size_sec: int = 2,
+                 batch_size: int = WINDOW_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Stream the same windows as segment_data over the converted store.
+
+    Yields:
+        (segments [n, window samples, channels] read-only views into the memory map,
+         majority label of each window [n] or None)
+    """
+    data, labels, index = open_store(prefix)
+    window_size_samples = window_size_sec * index["fs"]
+    step_size_samples = step_size_sec * index["fs"]
+
+    for start, end, count in _iter_window_spans(len(data), window_size_samples, step_size_samples, batch_size):
+        segments = sliding_window_view(data[start:end], window_size_samples, axis=0)[::step_size_samples]
+        # [n, channels, samples] -> [n, samples, channels]
+        segments = segments.transpose(0, 2, 1)
+
+        window_label = None
+        if labels is not None:
+            window_label = window_labels(np.asarray(labels[start:end]), count, window_size_samples, step_size_samples)
+        yield segments, window_label
+
+
+def iter_feature_batches(prefix: str, window_size_sec: int = 4, step_size_sec: int = 2,
+                         batch_size: int = WINDOW_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Features of every window of the converted store, a batch at a time
+    (the same values extract_features_from_segment gives per window).
+
+    Yields:
+        (features [n, channels * 14], labels [n] or None)
+    """
+    data, labels, index = open_store(prefix)
+    fs = index["fs"]
+    window_size_samples = window_size_sec * fs
+    step_size_samples = step_size_sec * fs
+
+    for start, end, count in _iter_window_spans(len(data), window_size_samples, step_size_samples, batch_size):
+        features = extract_features_sliding(data[start:end], fs, window_size_sec, step_size_sec)
+
+        window_label = None
+        if labels is not None:
+            window_label = window_labels(np.asarray(labels[start:end]), count, window_size_samples, step_size_samples)
+        yield features, window_label
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Convert a CSV to the memory-mapped store")
+    convert_parser.add_argument("csv_path")
+    convert_parser.add_argument("--out", help="Store prefix (default: the CSV path without .csv)")
+    convert_parser.add_argument("--fs", type=int, default=TARGET_SFREQ)
+
+    args = parser.parse_args()
+    index = convert(args.csv_path, args.out, args.fs)
+    print(f"Converted {index['n_rows']:,} rows x {len(index['channels'])} channels; classes {index['classes']}")
+
+
+if __name__ == "__main__":
+    main()
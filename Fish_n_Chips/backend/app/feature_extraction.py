@@ -1,7 +1,16 @@
+import math
 import numpy as np
 import pandas as pd
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.signal import welch
-from typing import List, Dict, Union
+from typing import Callable, List, Dict, Tuple, Union
+
+from .metrics import stage
+
+# Bump whenever parsing, resampling or feature extraction changes the feature
+# values, so cached features (see prediction_cache) are not reused
+FEATURE_PIPELINE_VERSION = "1"
 
 # Frequency bands
 BANDS = {
@@ -47,43 +56,350 @@ def compute_bandpower(data: np.ndarray, fs: int, method: str = 'welch') -> Dict[
 
     return bandpowers
 
-def extract_features_from_segment(segment: np.ndarray, fs: int = 256, channel_names: List[str] = None) -> np.ndarray:
+@lru_cache(maxsize=32)
+def _band_slices(fs: int, nperseg: int) -> Tuple[slice, ...]:
     """
-    Extract features from a multi-channel EEG segment.
+    Index ranges of each band in a one-sided Welch spectrum, cached per (fs, nperseg).
+
+    The frequency grid is sorted, so the boolean mask built in compute_bandpower
+    is always a contiguous run and can be replaced by a slice.
+    """
+    freqs = np.fft.rfftfreq(nperseg, 1.0 / fs)
+    slices = []
+    for low, high in BANDS.values():
+        idx = np.flatnonzero(np.logical_and(freqs >= low, freqs <= high))
+        slices.append(slice(idx[0], idx[-1] + 1) if len(idx) else slice(0, 0))
+    return tuple(slices)
+
+_libm_pow = np.frompyfunc(math.pow, 2, 1)
+
+def _skew_kurtosis(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample skewness (G1) and excess kurtosis (G2) along the last axis.
+
+    Mirrors the pandas Series.skew()/kurtosis() estimators so the batched
+    features match the per-channel ones.
+    """
+    count = np.float64(x.shape[-1])
+    mean = x.sum(axis=-1, dtype=np.float64) / count
+    adjusted = x - mean[..., np.newaxis]
+    adjusted2 = adjusted ** 2
+    m2 = adjusted2.sum(axis=-1, dtype=np.float64)
+    m3 = (adjusted2 * adjusted).sum(axis=-1, dtype=np.float64)
+    m4 = (adjusted2 ** 2).sum(axis=-1, dtype=np.float64)
+
+    # Treat round-off around a constant signal as exactly zero
+    max_abs = np.abs(x).max(axis=-1, initial=0.0)
+    eps = np.finfo(np.float64).eps
+    m2 = np.where(np.abs(m2) < ((eps * max_abs) ** 2) * count, 0, m2)
+    m3 = np.where(np.abs(m3) < ((eps * max_abs) ** 3) * count, 0, m3)
+    m4 = np.where(np.abs(m4) < ((eps * max_abs) ** 4) * count, 0, m4)
+
+    # libm pow() per element: numpy's array power can differ from the scalar
+    # result in the last ulp, and there are only n_segments * n_channels values
+    m2_15 = _libm_pow(m2, 1.5).astype(np.float64)
+    m2_sq = _libm_pow(m2, 2).astype(np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        skew = (count * (count - 1) ** 0.5 / (count - 2)) * (m3 / m2_15)
+        adj = 3 * (count - 1) ** 2 / ((count - 2) * (count - 3))
+        numerator = count * (count + 1) * (count - 1) * m4
+        denominator = (count - 2) * (count - 3) * m2_sq
+        kurt = numerator / denominator - adj
+
+    skew = np.where(m2 == 0, 0, skew)
+    kurt = np.where(denominator == 0, 0, kurt)
+    if count < 3:
+        skew[...] = np.nan
+    if count < 4:
+        kurt[...] = np.nan
+    return skew, kurt
+
+def _bandpowers_from_psd(freqs: np.ndarray, psd: np.ndarray, fs: int, nperseg: int) -> Dict[str, np.ndarray]:
+    """
+    Vectorized compute_bandpower over the leading axes of a Welch PSD [..., n_freqs].
+    """
+    freq_res = freqs[1] - freqs[0]
+
+    band_abs = {}
+    total_power = 0
+    for band, band_slice in zip(BANDS.keys(), _band_slices(fs, nperseg)):
+        band_abs[band] = np.sum(psd[..., band_slice], axis=-1) * freq_res
+        total_power = total_power + band_abs[band]
+
+    bandpowers = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for band, power in band_abs.items():
+            bandpowers[f"{band}_abs"] = power
+            bandpowers[f"{band}_rel"] = np.where(total_power > 0, power / total_power, 0)
+
+    return bandpowers
+
+def _assemble_features(x: np.ndarray, freqs: np.ndarray, psd: np.ndarray, fs: int, nperseg: int) -> np.ndarray:
+    """
+    Build the [n_segments, n_channels * 14] feature matrix from segments x [N, C, samples]
+    and their Welch PSD [N, C, n_freqs].
+    """
+    n_segments, n_channels = x.shape[:2]
+
+    # Time domain stats
+    mean = np.mean(x, axis=-1)
+    std = np.std(x, axis=-1)
+    skew, kurt = _skew_kurtosis(x)
+
+    bandpowers = _bandpowers_from_psd(freqs, psd, fs, nperseg)
+
+    # Per-channel order: mean, std, skew, kurtosis, then bandpowers sorted by key
+    columns = [mean, std, skew, kurt] + [bandpowers[key] for key in sorted(bandpowers.keys())]
+    features = np.stack(columns, axis=-1)
+
+    return features.reshape(n_segments, n_channels * len(columns))
+
+def extract_features_batch(segments: np.ndarray, fs: int = 256, connectivity: bool = False) -> np.ndarray:
+    """
+    Extract features from many multi-channel EEG segments at once.
 
     Args:
-        segment: 2D array [n_samples, n_channels]
+        segments: 3D array [n_segments, n_samples, n_channels]
+            (a single 2D segment is also accepted)
         fs: Sampling rate
-        channel_names: List of channel names (optional, for structured return if needed)
+        connectivity: Append cross-channel coherence/PLV features (see connectivity.py)
 
     Returns:
-        1D feature vector.
+        2D feature matrix [n_segments, n_channels * 14 (+ connectivity features)],
+        with columns in the same order as extract_features_from_segment.
+    """
+    segments = np.asarray(segments, dtype=np.float64)
+    if segments.ndim == 2:
+        segments = segments[np.newaxis]
+    if segments.ndim != 3:
+        raise ValueError("segments must be a 3D array [n_segments, n_samples, n_channels]")
+
+    n_samples = segments.shape[1]
+
+    # [N, C, samples] so every reduction runs over a contiguous axis
+    x = np.ascontiguousarray(segments.transpose(0, 2, 1))
+
+    # Frequency domain features: one Welch over every segment and channel
+    freqs, psd = welch(x, fs, nperseg=fs*2, axis=-1)
+    nperseg = min(fs*2, n_samples) # welch shortens nperseg for short segments
+
+    features = _assemble_features(x, freqs, psd, fs, nperseg)
+    if connectivity:
+        from .connectivity import connectivity_features
+        features = np.hstack([features, connectivity_features(x, fs)])
+    return features
+
+def validate_sliding_window(window_size_sec: float, step_size_sec: float):
+    """
+    Check that windows and hops can be tiled by SlidingWelch's Welch blocks
+    (2 s long, starting every 1 s).
+
+    Raises:
+        ValueError: if the window is shorter than 2 s, or the window or step is
+            not a positive whole number of seconds.
+    """
+    if window_size_sec < 2:
+        raise ValueError(f"Window must be at least 2 s for streaming Welch, got {window_size_sec} s")
+    if step_size_sec <= 0:
+        raise ValueError(f"Step must be positive, got {step_size_sec} s")
+    if window_size_sec % 1 or step_size_sec % 1:
+        raise ValueError(f"Window and step must be whole seconds, got {window_size_sec} s and {step_size_sec} s")
+
+class SlidingWelch:
     """
-    n_samples, n_channels = segment.shape
+    Streaming Welch PSD for overlapping windows.
 
-    features = []
+    Welch (nperseg = 2 s, 50% overlap) splits every window into blocks that start
+    on a 1 s grid. With a hop that is a whole number of blocks, consecutive windows
+    share most of those blocks, so each block periodogram is computed once, kept in
+    a ring buffer, and a window's PSD is the mean of its cached blocks. The result
+    equals welch() on the full window.
 
-    # Per-channel features
-    for ch in range(n_channels):
-        ch_data = segment[:, ch]
+    Samples are pushed as [n_samples, n_channels] chunks of any size; push()
+    returns the PSDs of every window completed by that chunk.
+    """
+
+    def __init__(self, fs: int = 256, n_channels: int = 16, window_size_sec: int = 4, step_size_sec: int = 2):
+        validate_sliding_window(window_size_sec, step_size_sec)
+        self.fs = fs
+        self.n_channels = n_channels
+        self.nperseg = fs * 2
+        self.block_hop = self.nperseg // 2
+
+        window_size_samples = int(window_size_sec) * fs
+        step_size_samples = int(step_size_sec) * fs
+
+        self.blocks_per_window = (window_size_samples - self.nperseg) // self.block_hop + 1
+        self.blocks_per_step = step_size_samples // self.block_hop
+
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1.0 / fs)
+        self.reset()
+
+    def reset(self):
+        """Drop all buffered samples and cached block periodograms."""
+        self._tail = np.empty((0, self.n_channels))
+        self._ring = np.empty((self.blocks_per_window, self.n_channels, len(self.freqs)))
+        self._n_blocks = 0
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Feed new samples and return the PSDs of the windows they complete.
+
+        Args:
+            samples: 2D array [n_samples, n_channels]
+
+        Returns:
+            3D array [n_windows, n_channels, n_freqs] (n_windows may be 0).
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        buf = np.concatenate([self._tail, samples]) if len(self._tail) else samples
+
+        n_new_blocks = (len(buf) - self.nperseg) // self.block_hop + 1 if len(buf) >= self.nperseg else 0
+        if n_new_blocks == 0:
+            self._tail = buf
+            return np.empty((0, self.n_channels, len(self.freqs)))
+
+        # New blocks [n_blocks, n_channels, nperseg], packed contiguously so the FFT
+        # sees the same memory layout whatever the chunk size
+        blocks = sliding_window_view(buf, self.nperseg, axis=0)[::self.block_hop][:n_new_blocks]
+        blocks = np.ascontiguousarray(blocks)
+        _, block_psd = welch(blocks, self.fs, nperseg=self.nperseg, axis=-1)
+        self._tail = buf[n_new_blocks * self.block_hop:].copy()
+
+        windows = []
+        for pxx in block_psd:
+            self._ring[self._n_blocks % self.blocks_per_window] = pxx
+            self._n_blocks += 1
+
+            completed = self._n_blocks - self.blocks_per_window
+            if completed >= 0 and completed % self.blocks_per_step == 0:
+                # Oldest-first block order, averaged like welch(average='mean')
+                order = np.arange(self._n_blocks, self._n_blocks + self.blocks_per_window) % self.blocks_per_window
+                windows.append(np.moveaxis(self._ring[order], 0, -1).mean(axis=-1))
+
+        if not windows:
+            return np.empty((0, self.n_channels, len(self.freqs)))
+        return np.stack(windows)
+
+    def bandpowers(self, psd: np.ndarray) -> Dict[str, np.ndarray]:
+        """compute_bandpower for every window and channel of a PSD from push()."""
+        return _bandpowers_from_psd(self.freqs, psd, self.fs, self.nperseg)
+
+class SlidingFeatureExtractor:
+    """
+    Streaming feature extraction over 4 s windows at a 2 s hop.
+
+    Samples are pushed in chunks of any size and only the tail needed for the next
+    window is kept, so memory stays O(window + chunk) however long the recording is.
+    Windows are zero-copy views of that buffer and the PSDs come from SlidingWelch.
+    With connectivity=True, coherence/PLV features of each window are appended.
+
+    An optional screen callable receives the completed windows [n_windows, C, window]
+    and returns a boolean mask of the ones to featurize (e.g. artifacts.screen_windows);
+    the others are left out of the returned rows.
+    """
+
+    def __init__(self, fs: int = 256, n_channels: int = 16, window_size_sec: int = 4, step_size_sec: int = 2,
+                 connectivity: bool = False, screen: Callable[[np.ndarray], np.ndarray] = None):
+        self.fs = fs
+        self.n_channels = n_channels
+        self.window_size_samples = window_size_sec * fs
+        self.step_size_samples = step_size_sec * fs
+        self.connectivity = connectivity
+        self.screen = screen
+        self.n_features = n_channels * 14
+        if connectivity:
+            from .connectivity import n_connectivity_features
+            self.n_features += n_connectivity_features(n_channels)
+        self.welch = SlidingWelch(fs, n_channels, window_size_sec, step_size_sec)
+        self.n_windows = 0
+        self._buffer = np.empty((0, n_channels))
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Feed new samples and return features of the windows they complete.
+
+        Args:
+            samples: 2D array [n_samples, n_channels]
 
-        # Time domain stats
-        features.append(np.mean(ch_data))
-        features.append(np.std(ch_data))
-        features.append(pd.Series(ch_data).skew())
-        features.append(pd.Series(ch_data).kurtosis())
+        Returns:
+            2D feature matrix [n_windows, n_features] (n_windows may be 0), only
+            the windows passing screen if one is set.
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        psd = self.welch.push(samples)
+        buf = np.concatenate([self._buffer, samples]) if len(self._buffer) else samples
 
-        # Frequency domain features
-        bp = compute_bandpower(ch_data, fs)
-        # Order: delta_abs, theta_abs, ..., delta_rel, ...
-        # We sort by keys to be deterministic
-        for key in sorted(bp.keys()):
-            features.append(bp[key])
+        n_windows = len(psd)
+        if n_windows == 0:
+            self._buffer = buf
+            return np.empty((0, self.n_features))
 
-    # Global features (ratios, etc.) - Simplified for now
-    # TODO: Add cross-channel features if needed
+        # [n_windows, C, window] views over the channel-major buffer
+        channels = np.ascontiguousarray(buf.T)
+        x = sliding_window_view(channels, self.window_size_samples, axis=-1)[:, ::self.step_size_samples]
+        x = x[:, :n_windows].transpose(1, 0, 2)
 
-    return np.array(features)
+        keep = slice(None)
+        if self.screen is not None:
+            keep = np.asarray(self.screen(x), dtype=bool)
+
+        features = _assemble_features(x[keep], self.welch.freqs, psd[keep], self.fs, self.welch.nperseg)
+        if self.connectivity:
+            from .connectivity import sliding_connectivity_features
+            features = np.hstack([features, sliding_connectivity_features(
+                channels, self.fs, self.window_size_samples, self.step_size_samples, n_windows)[keep]])
+
+        # Keep samples from the start of the next window on
+        self._buffer = buf[n_windows * self.step_size_samples:].copy()
+        self.n_windows += n_windows
+        return features
+
+@stage("feature_extraction_sliding")
+def extract_features_sliding(data: np.ndarray, fs: int = 256, window_size_sec: int = 4, step_size_sec: int = 2,
+                             connectivity: bool = False) -> np.ndarray:
+    """
+    Extract features for every window segment_data would yield from a recording.
+
+    Windows are zero-copy views of the recording and the PSDs come from SlidingWelch,
+    so overlapping Welch blocks are transformed only once.
+
+    Args:
+        data: 2D array [n_samples, n_channels]
+        fs: Sampling rate
+        window_size_sec: Window length in seconds
+        step_size_sec: Hop between windows in seconds
+        connectivity: Append cross-channel coherence/PLV features
+
+    Returns:
+        2D feature matrix [n_windows, n_channels * 14 (+ connectivity features)].
+    """
+    data = np.asarray(data, dtype=np.float64)
+    extractor = SlidingFeatureExtractor(fs, data.shape[1], window_size_sec, step_size_sec, connectivity)
+    return extractor.push(data)
+
+@stage("feature_extraction")
+def extract_features_from_segment(segment: np.ndarray, fs: int = 256, channel_names: List[str] = None,
+                                  connectivity: bool = False) -> np.ndarray:
+    """
+    Extract features from a multi-channel EEG segment.
+
+    Args:
+        segment: 2D array [n_samples, n_channels]
+        fs: Sampling rate
+        channel_names: List of channel names (optional, for structured return if needed)
+        connectivity: Append cross-channel coherence/PLV features. Off by default:
+            the shipped model was trained on the per-channel features only.
+
+    Returns:
+        1D feature vector.
+    """
+    # Per-channel features: mean, std, skew, kurtosis, then bandpowers
+    # (alpha_abs, alpha_rel, beta_abs, ...) sorted by key to be deterministic.
+    # Cross-channel features: coherence, then PLV, per band and channel pair
+    # (see connectivity_feature_names).
+    return extract_features_batch(segment, fs=fs, connectivity=connectivity)[0]
 
 def segment_data(df: pd.DataFrame, window_size_sec: int = 4, step_size_sec: int = 2, fs: int = 256):
     """
@@ -0,0 +1,300 @@
+"""
+Offline feature-store builder for model training.
+
+Walks a dataset directory (EDF, CSV, EEGLAB .set/.fdt), extracts the same 4 s / 2 s-hop
+window features the API uses, in a process pool, and writes one .npz shard per
+batch of windows. Shards are written atomically and named after the recording's
+path, size, mtime and FEATURE_PIPELINE_VERSION, so an interrupted build resumes
+where it stopped and changed recordings are re-featurized. `merge` concatenates
+the shards into the training matrices the notebooks produce.
+
+Each recording is first decoded once (channel selection, resampling to 256 Hz) into
+a float32 staging .npy; window batches are then featurized from memory maps of it,
+so one long recording is spread over all workers.
+
+Usage:
+    python -m backend.app.feature_store build dataset2 --out feature_store [--labels labels.csv] [--workers 8]
+    python -m backend.app.feature_store merge --out feature_store [--models-dir models]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from .data_processing import REQUIRED_CHANNELS, TARGET_SFREQ, parse_edf, parse_eeglab
+from .eeg_dataset import _csv_layout, window_labels
+from .feature_extraction import FEATURE_PIPELINE_VERSION, extract_features_sliding
+from .preprocessing import filter_config, preprocess
+from .windowed_inference import count_windows
+
+WINDOW_SEC = 4
+STEP_SEC = 2
+# Windows per shard (and per worker task)
+SHARD_WINDOWS = 512
+RECORDING_EXTENSIONS = ('.edf', '.csv', '.set')
+# Label of windows from recordings without one
+UNLABELED = -1
+
+
+def discover_recordings(dataset_dir: str) -> List[str]:
+    """Recording paths under dataset_dir, relative to it and sorted."""
+    found = []
+    for root, _, files in os.walk(dataset_dir):
+        for name in files:
+            if name.lower().endswith(RECORDING_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), dataset_dir))
+    return sorted(found)
+
+
+def recording_id(dataset_dir: str, rel_path: str, label: int) -> str:
+    """
+    Shard name prefix: readable path plus a hash of everything that changes the
+    shard contents (source file identity, label, pipeline version and filtering).
+    """
+    st = os.stat(os.path.join(dataset_dir, rel_path))
+    signature = (f"{rel_path}|{st.st_size}|{st.st_mtime_ns}|{label}|{FEATURE_PIPELINE_VERSION}|"
+                 f"{WINDOW_SEC}|{STEP_SEC}|{filter_config()}")
+    stem = rel_path.replace(os.sep, "__").replace(".", "_")
+    return f"{stem}-{hashlib.sha1(signature.encode()).hexdigest()[:12]}"
+
+
+def load_labels(labels_path: Optional[str]) -> Dict[str, int]:
+    """
+    Recording labels from a CSV with `recording,label` columns; recording is the
+    path relative to the dataset directory or just the file name.
+    """
+    if not labels_path:
+        return {}
+    with open(labels_path, newline="") as f:
+        return {row["recording"]: int(row["label"]) for row in csv.DictReader(f)}
+
+
+def _load_csv_recording(path: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """[samples, channels] float32 and the per-sample status column, if any."""
+    header, channels, status = _csv_layout(path)
+    df = pd.read_csv(path, usecols=channels + ([status] if status is not None else []), engine="c")
+    data = df[[header[i] for i in channels]].to_numpy(dtype=np.float32)
+    labels = df[header[status]].to_numpy(dtype=np.int64) if status is not None else None
+    return data, labels
+
+
+def stage_recording(dataset_dir: str, rel_path: str, staging_path: str, label: int) -> int:
+    """
+    Decode (and, if enabled, filter) a recording to a float32 [samples, channels] .npy
+    at TARGET_SFREQ plus per-window labels (runs in a worker). Returns the number of windows.
+    """
+    # Staged by an earlier, interrupted run
+    if os.path.exists(staging_path) and os.path.exists(staging_path + ".labels.npy"):
+        return len(np.load(staging_path + ".labels.npy"))
+
+    path = os.path.join(dataset_dir, rel_path)
+    ext = os.path.splitext(path)[1].lower()
+    sample_labels = None
+
+    try:
+        if ext == ".edf":
+            with open(path, "rb") as f:
+                data = parse_edf(f.read())
+        elif ext == ".set":
+            data = parse_eeglab(path)
+        else:
+            data, sample_labels = _load_csv_recording(path)
+    except HTTPException as e:
+        # HTTPException does not survive pickling back to the parent process
+        raise ValueError(e.detail)
+    data = preprocess(data, TARGET_SFREQ)
+
+    n_windows = count_windows(len(data), TARGET_SFREQ, WINDOW_SEC, STEP_SEC)
+    if sample_labels is not None and label == UNLABELED:
+        labels = window_labels(sample_labels, n_windows, WINDOW_SEC * TARGET_SFREQ, STEP_SEC * TARGET_SFREQ)
+    else:
+        labels = np.full(n_windows, label, dtype=np.int64)
+
+    # Labels last: their presence marks a complete staging file
+    _save_atomic(staging_path, np.ascontiguousarray(data, dtype=np.float32))
+    _save_atomic(staging_path + ".labels.npy", labels)
+    return n_windows
+
+
+def featurize_shard(staging_path: str, shard_path: str, first_window: int, last_window: int):
+    """Features for windows [first_window, last_window) of a staged recording (runs in a worker)."""
+    data = np.load(staging_path, mmap_mode="r")
+    labels = np.load(staging_path + ".labels.npy")
+    step = STEP_SEC * TARGET_SFREQ
+    start = first_window * step
+    end = (last_window - 1) * step + WINDOW_SEC * TARGET_SFREQ
+
+    # Only this shard's samples are paged in from the memory map
+    features = extract_features_sliding(data[start:end], TARGET_SFREQ, WINDOW_SEC, STEP_SEC)
+    windows = np.arange(first_window, last_window)
+
+    tmp_path = shard_path + ".tmp.npz"
+    np.savez(tmp_path, X=features, y=labels[first_window:last_window],
+             start_sample=windows * STEP_SEC * TARGET_SFREQ)
+    os.replace(tmp_path, shard_path)
+
+
+def _save_atomic(path: str, array: np.ndarray):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _shard_ranges(n_windows: int, shard_windows: int) -> List[Tuple[int, int]]:
+    return [(first, min(first + shard_windows, n_windows)) for first in range(0, n_windows, shard_windows)]
+
+
+def _shard_path(shards_dir: str, rec_id: str, first_window: int, last_window: int) -> str:
+    return os.path.join(shards_dir, f"{rec_id}.{first_window:08d}-{last_window:08d}.npz")
+
+
+def build(dataset_dir: str, out_dir: str, labels_path: Optional[str] = None,
+          workers: Optional[int] = None, shard_windows: int = SHARD_WINDOWS):
+    """
+    Featurize every recording under dataset_dir into shards under out_dir, skipping
+    work that a previous (possibly interrupted) run already finished.
+    """
+    shards_dir = os.path.join(out_dir, "shards")
+    staging_dir = os.path.join(out_dir, "staging")
+    os.makedirs(shards_dir, exist_ok=True)
+    os.makedirs(staging_dir, exist_ok=True)
+
+    labels = load_labels(labels_path)
+    recordings = discover_recordings(dataset_dir)
+    manifest = {"dataset_dir": os.path.abspath(dataset_dir), "pipeline_version": FEATURE_PIPELINE_VERSION,
+                "recordings": [], "failed": {}}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        done_recordings = {}
+        remaining_shards = {}
+
+        for rel_path in recordings:
+            label = labels.get(rel_path, labels.get(os.path.basename(rel_path), UNLABELED))
+            rec_id = recording_id(dataset_dir, rel_path, label)
+            done_path = os.path.join(shards_dir, f"{rec_id}.done.json")
+            if os.path.exists(done_path):
+                with open(done_path) as f:
+                    done_recordings[rel_path] = json.load(f)
+                continue
+
+            staging_path = os.path.join(staging_dir, f"{rec_id}.npy")
+            future = pool.submit(stage_recording, dataset_dir, rel_path, staging_path, label)
+            pending[future] = ("stage", rel_path, rec_id, staging_path)
+
+        print(f"{len(recordings)} recordings, {len(done_recordings)} already done, {len(pending)} to featurize")
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, rel_path, rec_id, staging_path = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Failed: {rel_path}: {e}")
+                    manifest["failed"][rel_path] = str(e)
+                    remaining_shards.pop(rel_path, None)
+                    continue
+
+                if kind == "stage":
+                    n_windows = result
+                    ranges = _shard_ranges(n_windows, shard_windows)
+                    remaining_shards[rel_path] = {"n_windows": n_windows, "left": 0, "shards": ranges}
+                    for first, last in ranges:
+                        shard_path = _shard_path(shards_dir, rec_id, first, last)
+                        # Finished by an earlier, interrupted run
+                        if os.path.exists(shard_path):
+                            continue
+                        shard_future = pool.submit(featurize_shard, staging_path, shard_path, first, last)
+                        pending[shard_future] = ("shard", rel_path, rec_id, staging_path)
+                        remaining_shards[rel_path]["left"] += 1
+                else:
+                    if rel_path not in remaining_shards:
+                        continue
+                    remaining_shards[rel_path]["left"] -= 1
+
+                state = remaining_shards.get(rel_path)
+                if state is not None and state["left"] == 0:
+                    done = {"recording": rel_path, "id": rec_id, "n_windows": state["n_windows"],
+                            "shards": state["shards"]}
+                    with open(os.path.join(shards_dir, f"{rec_id}.done.json"), "w") as f:
+                        json.dump(done, f)
+                    for suffix in ("", ".labels.npy"):
+                        os.remove(staging_path + suffix)
+                    done_recordings[rel_path] = done
+                    del remaining_shards[rel_path]
+                    print(f"Done: {rel_path} ({state['n_windows']} windows)")
+
+    manifest["recordings"] = [done_recordings[p] for p in recordings if p in done_recordings]
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    n_windows = sum(r["n_windows"] for r in manifest["recordings"])
+    print(f"Featurized {len(manifest['recordings'])} recordings ({n_windows} windows) "
+          f"in {time.perf_counter() - started:.1f}s; {len(manifest['failed'])} failed")
+    return manifest
+
+
+def merge(out_dir: str, include_unlabeled: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate the shards of the last build, in recording order, into (X, y).
+    """
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    shards_dir = os.path.join(out_dir, "shards")
+    X_parts, y_parts = [], []
+    for rec in manifest["recordings"]:
+        for first, last in rec["shards"]:
+            with np.load(_shard_path(shards_dir, rec["id"], first, last)) as shard:
+                X_parts.append(shard["X"])
+                y_parts.append(shard["y"])
+
+    n_features = len(REQUIRED_CHANNELS) * 14
+    X = np.concatenate(X_parts) if X_parts else np.empty((0, n_features))
+    y = np.concatenate(y_parts) if y_parts else np.empty(0, dtype=np.int64)
+    if not include_unlabeled:
+        keep = y != UNLABELED
+        X, y = X[keep], y[keep]
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Featurize a dataset directory into shards")
+    build_parser.add_argument("dataset_dir")
+    build_parser.add_argument("--out", default="feature_store", help="Shard directory")
+    build_parser.add_argument("--labels", help="CSV with recording,label columns")
+    build_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    build_parser.add_argument("--shard-windows", type=int, default=SHARD_WINDOWS)
+
+    merge_parser = commands.add_parser("merge", help="Merge shards into X_features/y_labels")
+    merge_parser.add_argument("--out", default="feature_store", help="Shard directory")
+    merge_parser.add_argument("--models-dir", default="models")
+    merge_parser.add_argument("--include-unlabeled", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.dataset_dir, args.out, args.labels, args.workers, args.shard_windows)
+    else:
+        import joblib
+
+        X, y = merge(args.out, args.include_unlabeled)
+        os.makedirs(args.models_dir, exist_ok=True)
+        joblib.dump(X, os.path.join(args.models_dir, "X_features.joblib"))
+        joblib.dump(y, os.path.join(args.models_dir, "y_labels.joblib"))
+        print(f"X shape: {X.shape}, y shape: {y.shape}; saved to {args.models_dir}/")
+
+
+if __name__ == "__main__":
+    main()
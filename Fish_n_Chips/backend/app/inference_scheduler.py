@@ -0,0 +1,196 @@
+"""
+Micro-batching scheduler for EEG model scoring.
+
+Concurrent requests each submit one feature row. The scheduler waits a few
+milliseconds for more rows to arrive, stacks them and scores the whole batch
+with a single predict_proba call off the event loop, so N concurrent requests
+cost one vectorized scikit-learn call instead of N (or 2N) tiny ones.
+
+The model can be swapped while running (see swap): each batch is scored by the
+model that was current when it started, and its rows report that model's version.
+Shadow models, if any, score the same rows in background tasks after the callers
+have their results; the next batch does not wait for them.
+"""
+import asyncio
+import logging
+import os
+import numpy as np
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from .metrics import stage
+
+# Largest number of rows scored in one predict_proba call
+BATCH_MAX_SIZE = int(os.getenv("EEG_BATCH_MAX_SIZE", "32"))
+# How long the first request of a batch may wait for others to join
+BATCH_MAX_WAIT_MS = float(os.getenv("EEG_BATCH_MAX_WAIT_MS", "5"))
+# Shadow scoring tasks allowed at once; batches arriving beyond that skip shadow scoring
+SHADOW_MAX_PENDING = int(os.getenv("EEG_SHADOW_MAX_PENDING", "4"))
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    def __init__(self, model, version: str = None, max_batch_size: int = BATCH_MAX_SIZE,
+                 max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.version = version
+        # (version, model) pairs scored on every batch for comparison only
+        self.shadows: List[Tuple[str, object]] = []
+        # Called with (shadow version, active probabilities, shadow probabilities)
+        self.on_shadow: Optional[Callable[[str, np.ndarray, np.ndarray], None]] = None
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Running shadow scoring tasks (referenced so they are not garbage collected)
+        self._shadow_tasks: Set[asyncio.Task] = set()
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    def queue_depth(self) -> int:
+        """Rows waiting to be batched."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def shadow_pending(self) -> int:
+        """Batches being scored by shadow models."""
+        return len(self._shadow_tasks)
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._shadow_tasks):
+            task.cancel()
+        if self._shadow_tasks:
+            await asyncio.gather(*self._shadow_tasks, return_exceptions=True)
+
+    def swap(self, model, version: str, shadows: Sequence[Tuple[str, object]] = ()):
+        """
+        Score later batches with model. Call from the event loop: a batch picks up
+        the model, version and shadows together.
+        """
+        self.model = model
+        self.version = version
+        self.shadows = list(shadows)
+
+    async def _submit(self, features: np.ndarray) -> Tuple[np.ndarray, str, np.ndarray]:
+        if self._worker is None:
+            raise RuntimeError("Inference scheduler is not running")
+
+        row = np.asarray(features).reshape(-1)
+        # Checked here, so a wrong-sized row fails only its own request
+        n_features = getattr(self.model, "n_features_in_", None)
+        if n_features is not None and row.size != n_features:
+            raise ValueError(f"Expected {n_features} features, got {row.size}")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def predict_proba(self, features: np.ndarray) -> Tuple[np.ndarray, str]:
+        """
+        (class probabilities, model version) for one feature vector, scored
+        together with any rows submitted concurrently.
+        """
+        proba, version, _ = await self._submit(features)
+        return proba, version
+
+    async def predict(self, features: np.ndarray) -> Tuple[int, np.ndarray, str]:
+        """(class, probabilities, model version) for one feature vector; the class is derived from the probabilities."""
+        proba, version, classes = await self._submit(features)
+        return int(classes[np.argmax(proba)]), proba, version
+
+    async def _collect(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _score(self, model, batch: List[tuple]) -> Tuple[List[tuple], Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Score batch with one predict_proba call. If that fails, each row is scored
+        on its own so only the rows that fail get an exception.
+
+        Returns:
+            (scored batch entries, their rows, their probabilities); the arrays are
+            None when no row could be scored.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            rows = np.stack([row for row, _ in batch])
+            with stage("predict_proba"):
+                proba = await loop.run_in_executor(None, model.predict_proba, rows)
+            return batch, rows, proba
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return [], None, None
+
+        scored, scored_proba = [], []
+        for row, future in batch:
+            try:
+                with stage("predict_proba"):
+                    row_proba = await loop.run_in_executor(None, model.predict_proba, row[np.newaxis])
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            scored.append((row, future))
+            scored_proba.append(row_proba[0])
+
+        if not scored:
+            return [], None, None
+        return scored, np.stack([row for row, _ in scored]), np.stack(scored_proba)
+
+    async def _score_shadows(self, shadows: List[Tuple[str, object]], rows: np.ndarray, proba: np.ndarray):
+        """Score rows with each shadow model and report them to on_shadow; failures are only logged."""
+        loop = asyncio.get_running_loop()
+        for shadow_version, shadow_model in shadows:
+            try:
+                with stage("shadow_predict_proba"):
+                    shadow_proba = await loop.run_in_executor(None, shadow_model.predict_proba, rows)
+                if self.on_shadow is not None:
+                    self.on_shadow(shadow_version, proba, shadow_proba)
+            except Exception:
+                logger.exception("Shadow model %s failed on a batch of %d rows", shadow_version, len(rows))
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Requests cancelled while waiting don't need scoring
+            batch = [(row, future) for row, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            model, version, shadows = self.model, self.version, self.shadows
+            batch, rows, proba = await self._score(model, batch)
+            if not batch:
+                continue
+
+            for (_, future), row_proba in zip(batch, proba):
+                if not future.done():
+                    future.set_result((row_proba, version, model.classes_))
+
+            # When shadows fall behind, batches go unshadowed: comparison data is
+            # optional, live latency is not
+            if shadows and len(self._shadow_tasks) < SHADOW_MAX_PENDING:
+                task = asyncio.create_task(self._score_shadows(shadows, rows, proba))
+                self._shadow_tasks.add(task)
+                task.add_done_callback(self._shadow_tasks.discard)
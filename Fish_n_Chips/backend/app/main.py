@@ -1,19 +1,36 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket
+from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import joblib
+from starlette.websockets import WebSocketState
 import numpy as np
 import os
 import asyncio
 import json
+import re
 from contextlib import asynccontextmanager
+from typing import Union
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from .schemas import EEGSampleRequest, PredictionResponse, SaveEEGResultRequest
-from .feature_extraction import extract_features_from_segment
-from .data_processing import parse_edf, parse_csv
-from backend.app.routers import speech_analysis, cognitive_games, unified_analysis
+from .schemas import EEGSampleRequest, PredictionResponse, SaveEEGResultRequest, WindowPrediction, WindowedPredictionResponse
+from .feature_extraction import extract_features_from_segment, validate_sliding_window
+from .data_processing import (
+    parse_edf, parse_csv_stream, iter_csv_blocks, decode_eeg_payload,
+    RAW_EEG_CONTENT_TYPE, NPY_CONTENT_TYPES, MSGPACK_CONTENT_TYPES
+)
+from .artifacts import ARTIFACT_MODE, VOLTS_TO_UV, artifact_config, screen_windows
+from .preprocessing import FILTER_ENABLED, StreamingFilter, filter_eeg
+from .inference_scheduler import InferenceScheduler
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, register_gauge, render as render_metrics
+from .prediction_cache import PredictionCache, hash_stream
+from .pyramid import build_pyramid, open_pyramid, pyramid_path
+from .model_registry import ModelRegistry, ModelVersion, shadow_models
+from .windowed_inference import score_windows, score_stream, start_pool, shutdown_pool, pending_chunks
+from .streaming import (
+    FRAME_DTYPES, EEGRingBuffer, run_bounded, minmax_decimate, encode_frame, decode_frame, pending_jobs
+)
+from backend.app.routers import speech_analysis, speech_stream, cognitive_games, unified_analysis
 from backend.app.database import get_db
 from sqlalchemy.orm import Session
 from fastapi import Depends
@@ -26,36 +43,81 @@ from fastapi import Depends
 
 
 # Global variables for model and scaler
+# model is the active version's model (registry.active.model), kept for quick checks
 model = None
 scaler = None
+scheduler = None
+prediction_cache = None
+registry = None
+
+async def activate_model(version: ModelVersion):
+    """Serve version from now on; requests already running finish on the previous one."""
+    global model, scheduler
+    if scheduler is None:
+        scheduler = InferenceScheduler(version.model, version.version)
+        scheduler.on_shadow = registry.record_shadow
+        await scheduler.start()
+    scheduler.swap(version.model, version.version, shadow_models(registry))
+    model = version.model
+    if prediction_cache is not None:
+        # Drops cached predictions made by a different model file
+        await run_in_threadpool(prediction_cache.set_model, version.source_path, version.fingerprint)
+    print(f"Model {version.version} active ({type(version.model).__name__}, from {version.source_path})")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load model on startup
-    global model, scaler
-    model_path = os.path.join("models", "eeg_best_model.joblib")
+    global model, scaler, scheduler, prediction_cache, registry
     # scaler_path = os.path.join("models", "eeg_scaler.joblib") # If scaler is separate
+    model = scheduler = None
+    registry = ModelRegistry()
+    watcher = None
 
     try:
-        # Check if model exists (it might not if notebooks haven't run)
-        if os.path.exists(model_path):
-            model = joblib.load(model_path)
-            print(f"Model loaded from {model_path}")
-        else:
-            print(f"Warning: Model not found at {model_path}. Inference will fail.")
+        prediction_cache = PredictionCache()
+    except OSError as e:
+        print(f"Warning: feature/prediction cache disabled: {e}")
 
+    try:
+        # Compiled array evaluator unless TREE_MODEL_BACKEND=sklearn, memory-mapped
+        version = await run_in_threadpool(registry.refresh)
+        if version is not None:
+            await activate_model(version)
+        else:
+            # It might not exist if notebooks haven't run; it is picked up once it appears
+            print(f"Warning: Model not found at {registry.model_path}. Inference will fail.")
     except Exception as e:
         print(f"Error loading model: {e}")
 
+    start_pool()
+    if registry.poll_sec > 0:
+        watcher = asyncio.create_task(registry.watch(activate_model))
+
     yield
     # Clean up if needed
+    if watcher is not None:
+        watcher.cancel()
+    if scheduler is not None:
+        await scheduler.stop()
+    shutdown_pool()
 
 app = FastAPI(title="CogniSafe EEG Screener", lifespan=lifespan)
 
 app.include_router(speech_analysis.router)
+app.include_router(speech_stream.router)
 app.include_router(cognitive_games.router)
 app.include_router(unified_analysis.router)
 
+# Per-route latency, open requests and websockets (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+register_gauge("inference_queue_depth", "Feature rows waiting for the micro-batching scheduler.",
+               lambda: scheduler.queue_depth() if scheduler is not None else 0)
+register_gauge("shadow_batches_pending", "Batches being scored by shadow models.",
+               lambda: scheduler.shadow_pending() if scheduler is not None else 0)
+register_gauge("window_chunks_pending", "Window chunks queued or running in the worker pool.", pending_chunks)
+register_gauge("stream_jobs_pending", "WebSocket feature jobs queued or running.", pending_jobs)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -66,8 +128,20 @@ app.add_middleware(
 )
 
 @app.websocket("/ws/simulate")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, encoding: str = "json", px: int = 0):
+    """
+    Simulated live feed: one 4s chunk and prediction per second.
+
+    Query params:
+        encoding: "json" (raw_chunk inside the JSON message, as before), or "float32" / "int16"
+            to send raw samples as a binary frame right after each JSON message
+        px: if > 0, min/max-decimate raw samples to this many pixel columns
+    """
     await websocket.accept()
+    if encoding != "json" and encoding not in FRAME_DTYPES:
+        await websocket.close(code=1003, reason=f"Unsupported encoding: {encoding}")
+        return
+
     try:
         # Simulate a session
         # In a real app, we might receive a file ID to stream, or stream from a device
@@ -76,6 +150,9 @@ async def websocket_endpoint(websocket: WebSocket):
         fs = 256
         window_size = 4 * fs # 4 seconds
         n_channels = 16
+        interval = 1.0
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
 
         while True:
             # Generate dummy chunk (replace with real file reading logic if needed)
@@ -86,50 +163,296 @@ async def websocket_endpoint(websocket: WebSocket):
             # Run inference on this chunk
             # We need to handle the potential errors gracefully inside the loop
             try:
-                features = extract_features_from_segment(chunk, fs=fs)
-                features_reshaped = features.reshape(1, -1)
-
                 if model:
-                    status_class = int(model.predict(features_reshaped)[0])
-                    probability = float(model.predict_proba(features_reshaped)[0][1])
-
-                    if probability < 0.3:
-                        risk_level = "Low"
-                    elif probability < 0.7:
-                        risk_level = "Medium"
-                    else:
-                        risk_level = "High"
+                    # Off the event loop, so other clients keep streaming meanwhile
+                    features = await run_bounded(extract_features_from_segment, chunk, fs)
+                    status_class, probability, _ = await predict_features(features)
+                    raw = minmax_decimate(chunk, px)
 
                     response = {
                         "timestamp": np.random.randint(0, 10000), # Mock timestamp
                         "status_class": status_class,
                         "probability": probability,
-                        "risk_level": risk_level,
-                        "raw_chunk": chunk.tolist() # Send raw data for visualization (careful with size)
+                        "risk_level": get_risk_level(probability),
                     }
 
-                    await websocket.send_text(json.dumps(response))
+                    if encoding == "json":
+                        response["raw_chunk"] = raw.tolist() # Send raw data for visualization (careful with size)
+                        await websocket.send_text(json.dumps(response))
+                    else:
+                        response["raw_frame"] = {"encoding": encoding, "rows": len(raw), "channels": n_channels}
+                        await websocket.send_text(json.dumps(response))
+                        await websocket.send_bytes(encode_frame(raw, encoding))
                 else:
                     await websocket.send_text(json.dumps({"error": "Model not loaded"}))
 
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 await websocket.send_text(json.dumps({"error": str(e)}))
 
-            # Wait for 1 second before next chunk (simulating real-time)
-            await asyncio.sleep(1)
+            # Wait until the next 1 second tick (simulating real-time); ticks missed by
+            # a slow client are skipped rather than queued up
+            next_tick += interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
 
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
+
+
+
+@app.websocket("/ws/eeg/ingest")
+async def eeg_ingest_endpoint(websocket: WebSocket, fs: int = 256, window_sec: int = 4, hop_sec: int = 2):
+    """
+    Live EEG ingest from a headset gateway.
+
+    The gateway pushes sample blocks, either binary frames (see streaming.encode_frame)
+    or JSON text {"samples": [[16 floats], ...]}. The latest window is kept in a
+    per-connection ring buffer and a prediction is sent every hop_sec seconds.
+    Windows failing artifact screening are sent with "artifact": true, and without
+    a prediction in "drop" mode. With filtering enabled, incoming blocks go through
+    a per-connection StreamingFilter before they reach the ring buffer.
+    Hops that fall due while a prediction is still running are coalesced into a
+    single prediction on the latest window once it finishes (the others are
+    counted in "skipped_hops"), so work never queues up behind a slow model.
+    """
+    await websocket.accept()
+    if model is None:
+        await websocket.send_text(json.dumps({"error": "Model not loaded"}))
+        await websocket.close(code=1011)
+        return
+    if fs <= 0 or window_sec <= 0 or hop_sec <= 0:
+        await websocket.close(code=1003, reason="fs, window_sec and hop_sec must be positive")
+        return
+
+    n_channels = 16
+    window_size = window_sec * fs
+    hop_size = hop_sec * fs
+
+    ring = EEGRingBuffer(window_size, n_channels)
+    stream_filter = StreamingFilter(fs) if FILTER_ENABLED else None
+    next_prediction_at = window_size
+    skipped_hops = 0
+    inflight = None
+    pending = False
+    send_lock = asyncio.Lock()
+
+    async def send_json(message: dict):
+        async with send_lock:
+            await websocket.send_text(json.dumps(message))
+
+    async def score_window(window: np.ndarray, end_sample: int, skipped: int):
+        try:
+            message = {"end_sample": end_sample, "end_sec": end_sample / fs, "skipped_hops": skipped}
+            # Screening is a few array ops, cheap enough for the event loop
+            message["artifact"] = not screen_windows(window.T[np.newaxis], fs)[0]
+            if not (message["artifact"] and ARTIFACT_MODE == "drop"):
+                features = await run_bounded(extract_features_from_segment, window, fs)
+                status_class, probability, model_version = await predict_features(features)
+                message.update(
+                    status_class=status_class,
+                    probability=probability,
+                    risk_level=get_risk_level(probability),
+                    model_version=model_version
+                )
+            await send_json(message)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            await send_json({"error": str(e)})
+
+    def start_prediction():
+        nonlocal inflight
+        inflight = asyncio.create_task(score_window(ring.latest(window_size), ring.total, skipped_hops))
+        inflight.add_done_callback(on_prediction_done)
+
+    def on_prediction_done(task: asyncio.Task):
+        nonlocal pending
+        if pending and not task.cancelled():
+            pending = False
+            start_prediction()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
 
+            try:
+                if message.get("bytes") is not None:
+                    samples = decode_frame(message["bytes"])
+                else:
+                    samples = np.asarray(json.loads(message["text"])["samples"], dtype=np.float32)
+                if samples.ndim != 2 or samples.shape[1] != n_channels:
+                    raise ValueError(f"Sample blocks must be [samples, {n_channels}]. Got {samples.shape}")
+            except (ValueError, KeyError, TypeError) as e:
+                await send_json({"error": f"Invalid sample block: {e}"})
+                continue
+
+            if stream_filter is not None:
+                samples = stream_filter.push(samples)
+            ring.write(samples)
+            if ring.total < next_prediction_at:
+                continue
+
+            # Hops due since the last prediction; all but the latest are coalesced
+            hops_due = (ring.total - next_prediction_at) // hop_size + 1
+            next_prediction_at += hops_due * hop_size
+
+            if inflight is None or inflight.done():
+                skipped_hops += hops_due - 1
+                start_prediction()
+            else:
+                # Coalesce into one pending prediction on the latest window
+                skipped_hops += hops_due if pending else hops_due - 1
+                pending = True
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        pending = False
+        if inflight is not None and not inflight.done():
+            inflight.cancel()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
 
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "model_loaded": model is not None}
+    active = registry.active if registry is not None else None
+    return {"status": "healthy", "model_loaded": model is not None,
+            "model_version": active.version if active else None}
+
+@app.get("/models")
+def list_models():
+    """Active and shadow model versions, with shadow agreement stats."""
+    if registry is None:
+        return {"active": None}
+    return registry.info()
+
+@app.post("/models/reload")
+async def reload_model():
+    """Load the model file now if it changed, instead of waiting for the next poll."""
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model registry not running")
+    try:
+        version = await run_in_threadpool(registry.refresh)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load model: {e}")
+    if version is not None:
+        await activate_model(version)
+    return {"reloaded": version is not None, **registry.info()}
+
+@app.get("/metrics")
+def metrics():
+    """Stage latency histograms, in-flight gauges and queue depths in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and disk usage of the feature/prediction cache."""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return prediction_cache.stats()
+
+RECORDING_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+MAX_VIEW_PX = 10000
+
+@app.post("/eeg/recordings")
+async def upload_recording(file: UploadFile = File(...)):
+    """
+    Store a recording (.edf or .csv) for plotting: its min/max pyramid is built once,
+    then /eeg/{id}/view serves any time range at any zoom. The id is derived from the
+    file contents, so re-uploads reuse the existing pyramid.
+    """
+    filename = (file.filename or "").lower()
+    if not filename.endswith((".edf", ".csv")):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use .csv or .edf")
+
+    recording_id = (await run_in_threadpool(hash_stream, file.file))[:32]
+    pyramid = open_pyramid(recording_id)
+    if pyramid is None:
+        if filename.endswith(".edf"):
+            contents = await file.read()
+            eeg_data = await run_in_threadpool(parse_edf, contents)
+        else:
+            eeg_data = await run_in_threadpool(parse_csv_stream, file.file)
+        if eeg_data.ndim != 2 or len(eeg_data) == 0:
+            raise HTTPException(status_code=400, detail="Recording has no samples")
+        # parse_edf resamples to 256 Hz, which is also assumed for CSVs
+        await run_in_threadpool(build_pyramid, eeg_data, 256, pyramid_path(recording_id))
+        pyramid = open_pyramid(recording_id)
+
+    return {
+        "id": recording_id,
+        "fs": pyramid.fs,
+        "n_channels": pyramid.n_channels,
+        "n_samples": pyramid.n_samples,
+        "duration_sec": pyramid.duration_sec,
+        "levels": [bin_samples for bin_samples, _ in pyramid.levels],
+    }
+
+@app.get("/eeg/{recording_id}/view")
+def view_recording(recording_id: str, start: float = 0.0, end: float = None, px: int = 1000, encoding: str = "json"):
+    """
+    Plot-ready samples of a stored recording between start and end (seconds) for a
+    plot px columns wide, read from the pyramid level that matches the zoom.
+
+    The data is raw samples when the range has at most 2 * px of them ("layout": "raw"),
+    otherwise interleaved (min, max) rows per column ("layout": "minmax"), as [rows, channels].
+    encoding "json" returns it in the JSON body; "float32" / "int16" return a binary frame
+    (see streaming.encode_frame) with the metadata in X-View-* headers.
+    """
+    if not RECORDING_ID_PATTERN.fullmatch(recording_id):
+        raise HTTPException(status_code=404, detail="Unknown recording")
+    if px <= 0 or px > MAX_VIEW_PX:
+        raise HTTPException(status_code=400, detail=f"px must be between 1 and {MAX_VIEW_PX}")
+    if encoding != "json" and encoding not in FRAME_DTYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported encoding: {encoding}")
+
+    pyramid = open_pyramid(recording_id)
+    if pyramid is None:
+        raise HTTPException(status_code=404, detail="Unknown recording")
+
+    end = pyramid.duration_sec if end is None else end
+    if not (np.isfinite(start) and np.isfinite(end)):
+        raise HTTPException(status_code=400, detail=f"start and end must be finite, got {start} and {end}")
+    if end < start:
+        raise HTTPException(status_code=400, detail=f"end ({end}) must not be before start ({start})")
+    first, last, data = pyramid.view(int(start * pyramid.fs), int(np.ceil(end * pyramid.fs)), px)
+    meta = {
+        "start_sec": first / pyramid.fs,
+        "end_sec": last / pyramid.fs,
+        "fs": pyramid.fs,
+        "layout": "raw" if len(data) == last - first else "minmax",
+        "rows": len(data),
+        "channels": pyramid.n_channels,
+    }
+
+    if encoding == "json":
+        return {**meta, "data": data.tolist()}
+    headers = {f"X-View-{key.replace('_', '-').title()}": str(value) for key, value in meta.items()}
+    return Response(content=encode_frame(data, encoding), media_type="application/octet-stream", headers=headers)
+
+def get_risk_level(probability: float) -> str:
+    if probability < 0.3:
+        return "Low"
+    elif probability < 0.7:
+        return "Medium"
+    else:
+        return "High"
 
-def run_inference(eeg_data: np.ndarray, fs: int):
+def validate_eeg_data(eeg_data: np.ndarray):
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
@@ -140,57 +463,256 @@ def run_inference(eeg_data: np.ndarray, fs: int):
     if eeg_data.shape[1] != 16:
         raise HTTPException(status_code=400, detail=f"EEG data must have 16 channels. Got {eeg_data.shape[1]}")
 
-    # Extract features
-    features = extract_features_from_segment(eeg_data, fs=fs)
+async def predict_features(features: np.ndarray):
+    """
+    Score one feature vector through the micro-batching scheduler.
+    Returns (status_class, probability of class 1, model version).
+    """
+    status_class, proba, version = await scheduler.predict(features)
+    return status_class, float(proba[1]), version
+
+async def run_inference(eeg_data: np.ndarray, fs: int, features_key: str = None):
+    validate_eeg_data(eeg_data)
+
+    if FILTER_ENABLED:
+        eeg_data = await run_in_threadpool(filter_eeg, eeg_data, fs)
 
-    # Reshape for prediction (1, n_features)
-    features_reshaped = features.reshape(1, -1)
+    # Extract features (off the event loop)
+    features = await run_in_threadpool(extract_features_from_segment, eeg_data, fs=fs)
+    if features_key is not None:
+        await run_in_threadpool(prediction_cache.put_features, features_key, features)
 
-    # Predict
-    status_class = int(model.predict(features_reshaped)[0])
-    probability = float(model.predict_proba(features_reshaped)[0][1])
+    return await run_feature_inference(features)
+
+async def run_feature_inference(features: np.ndarray):
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    # Predict: batched with concurrent requests, one predict_proba per batch
+    status_class, probability, version = await predict_features(features)
 
     # Determine risk level
-    if probability < 0.3:
-        risk_level = "Low"
-    elif probability < 0.7:
-        risk_level = "Medium"
-    else:
-        risk_level = "High"
+    risk_level = get_risk_level(probability)
 
     return PredictionResponse(
         status_class=status_class,
         probability=probability,
         risk_level=risk_level,
-        model_version="v1.0"
+        model_version=version
     )
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict_eeg(request: EEGSampleRequest):
+def validate_window_params(window_size_sec: int, step_size_sec: int) -> ModelVersion:
+    """Returns the model version to score the whole recording with."""
+    active = registry.active if registry is not None else None
+    if active is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    if window_size_sec <= 0 or step_size_sec <= 0:
+        raise HTTPException(status_code=400, detail="Window and step sizes must be positive")
     try:
-        eeg_data = np.array(request.eeg)
-        return run_inference(eeg_data, request.sampling_rate)
+        # Whole-recording scoring runs on SlidingWelch, which has to tile the windows
+        validate_sliding_window(window_size_sec, step_size_sec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return active
+
+def build_windowed_response(version: ModelVersion, window_proba: np.ndarray, clean: np.ndarray,
+                            window_size_sec: int, step_size_sec: int):
+    """
+    Aggregate per-window probabilities [n_windows, n_classes], scored by version,
+    into a recording-level result.
+
+    Windows that failed artifact screening (clean == False) are left out of the
+    aggregate; they are omitted from the timeline when they were dropped unscored
+    (NaN rows) and marked as artifacts when they were scored ("flag" mode).
+    In "flag" mode a recording whose windows were all rejected (often one that is
+    not in microvolts) is aggregated over every window rather than refused.
+    """
+    if len(window_proba) == 0:
+        raise HTTPException(status_code=400, detail=f"Recording is shorter than one {window_size_sec}s window")
+    scored = ~np.isnan(window_proba[:, 1])
+    aggregated = clean if clean.any() else scored
+    if not aggregated.any():
+        raise HTTPException(
+            status_code=422,
+            detail=f"All {len(clean)} windows were rejected as artifacts (flat, clipped or line noise); "
+                   "amplitudes are expected in microvolts"
+        )
+
+    # Recording-level result: mean of the clean windows' probabilities
+    mean_proba = window_proba[aggregated].mean(axis=0)
+    status_class = int(version.model.classes_[np.argmax(mean_proba)])
+    probability = float(mean_proba[1])
+
+    timeline = [
+        WindowPrediction(
+            start_sec=i * step_size_sec,
+            end_sec=i * step_size_sec + window_size_sec,
+            probability=float(window_proba[i, 1]),
+            risk_level=get_risk_level(float(window_proba[i, 1])),
+            artifact=not clean[i]
+        )
+        for i in np.flatnonzero(scored)
+    ]
+
+    return WindowedPredictionResponse(
+        status_class=status_class,
+        probability=probability,
+        risk_level=get_risk_level(probability),
+        model_version=version.version,
+        n_windows=len(window_proba),
+        n_rejected_windows=int(np.count_nonzero(~clean)),
+        window_size_sec=window_size_sec,
+        step_size_sec=step_size_sec,
+        timeline=timeline
+    )
+
+async def run_windowed_inference(eeg_data: np.ndarray, fs: int, window_size_sec: int = 4, step_size_sec: int = 2,
+                                 uv_scale: float = 1.0):
+    """
+    Score a whole recording window by window and aggregate to a recording-level result.
+    """
+    validate_eeg_data(eeg_data)
+    version = validate_window_params(window_size_sec, step_size_sec)
+
+    if FILTER_ENABLED:
+        # Whole recording at once, so window edges see no filter transients
+        eeg_data = await run_in_threadpool(filter_eeg, eeg_data, fs)
+
+    # [n_windows, n_classes], [n_windows]
+    window_proba, clean = await score_windows(version.model, eeg_data, fs, window_size_sec, step_size_sec, uv_scale,
+                                              model_path=version.path)
+
+    return build_windowed_response(version, window_proba, clean, window_size_sec, step_size_sec)
+
+async def run_windowed_csv_inference(stream, fs: int, window_size_sec: int = 4, step_size_sec: int = 2):
+    """
+    Windowed inference over a CSV upload, featurized block by block as it is parsed.
+    Filtering, when enabled, is causal here (StreamingFilter), as on the live path.
+    """
+    version = validate_window_params(window_size_sec, step_size_sec)
+
+    blocks = iter_csv_blocks(stream)
+    if FILTER_ENABLED:
+        blocks = StreamingFilter(fs).filter_blocks(blocks)
+    window_proba, clean = await run_in_threadpool(
+        score_stream, version.model, blocks, fs, window_size_sec, step_size_sec
+    )
+
+    return build_windowed_response(version, window_proba, clean, window_size_sec, step_size_sec)
+
+@app.post(
+    "/predict",
+    response_model=PredictionResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": EEGSampleRequest.model_json_schema()},
+                RAW_EEG_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+                NPY_CONTENT_TYPES[0]: {"schema": {"type": "string", "format": "binary"}},
+                MSGPACK_CONTENT_TYPES[0]: {"schema": {"type": "string", "format": "binary"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def predict_eeg(request: Request):
+    """
+    Predict from an EEG segment sent as JSON (EEGSampleRequest) or as binary:
+    - application/octet-stream: raw little-endian float32, shape in X-EEG-Shape ("samples,channels")
+    - application/x-npy: a .npy array [samples, channels]
+    - application/msgpack: {"eeg": float32 bytes, "shape": [samples, channels], "sampling_rate": int}
+    Raw and .npy bodies take the sampling rate from X-Sampling-Rate (default 256).
+    """
+    eeg_data, fs = decode_eeg_payload(await request.body(), request.headers)
+    try:
+        return await run_inference(eeg_data, fs)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/predict_file", response_model=PredictionResponse)
-async def predict_file(file: UploadFile = File(...)):
-    try:
+async def predict_upload(file: UploadFile, file_type: str, fs: int, windowed: bool,
+                         window_size_sec: int, step_size_sec: int, features_key: str = None):
+    """
+    Parse and score an uploaded recording. With a features_key, single-segment
+    features are looked up in (and stored to) the feature cache.
+    """
+    if not windowed and features_key is not None:
+        features = await run_in_threadpool(prediction_cache.get_features, features_key)
+        if features is not None:
+            return await run_feature_inference(features)
+
+    if file_type == "edf":
         contents = await file.read()
+        # MNE parsing and resampling are blocking
+        eeg_data = await run_in_threadpool(parse_edf, contents)
+    elif windowed:
+        # Parse and featurize straight from the upload stream, O(window) memory
+        return await run_windowed_csv_inference(file.file, fs, window_size_sec, step_size_sec)
+    else:
+        # Read float32 blocks straight from the upload stream
+        eeg_data = await run_in_threadpool(parse_csv_stream, file.file)
+
+    if windowed:
+        # Score the whole recording as 4s windows instead of one segment
+        uv_scale = VOLTS_TO_UV if file_type == "edf" else 1.0
+        return await run_windowed_inference(eeg_data, fs, window_size_sec, step_size_sec, uv_scale)
+
+    return await run_inference(eeg_data, fs, features_key)
+
+@app.post("/predict_file", response_model=Union[WindowedPredictionResponse, PredictionResponse])
+async def predict_file(
+    file: UploadFile = File(...),
+    windowed: bool = False,
+    window_size_sec: int = 4,
+    step_size_sec: int = 2
+):
+    """
+    Predict from an uploaded .csv or .edf recording, as one segment or, with
+    windowed=true, window by window.
+
+    CSV values are expected in microvolts (EDF files are converted from volts);
+    the artifact screening thresholds used in windowed mode assume microvolts.
+    """
+    try:
         filename = file.filename.lower()
 
         if filename.endswith(".edf"):
-            eeg_data = parse_edf(contents)
-            # EDFs usually have their own fs, but parse_edf resamples to 256
-            fs = 256
+            file_type = "edf"
         elif filename.endswith(".csv"):
-            # Decode bytes to string for CSV
-            eeg_data = parse_csv(contents.decode('utf-8'))
-            fs = 256 # Assumption for CSVs unless specified otherwise
+            file_type = "csv"
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format. Use .csv or .edf")
 
-        return run_inference(eeg_data, fs)
+        # EDFs usually have their own fs, but parse_edf resamples to 256;
+        # 256 is also the assumption for CSVs unless specified otherwise
+        fs = 256
+
+        # Re-uploads of the same file are served from the content-hash cache
+        features_key = prediction_key = None
+        if prediction_cache is not None and prediction_cache.enabled:
+            content_hash = await run_in_threadpool(hash_stream, file.file)
+            features_key = prediction_cache.features_key(content_hash, file_type, fs)
+            params = {"windowed": windowed}
+            if windowed:
+                params.update(window_size_sec=window_size_sec, step_size_sec=step_size_sec,
+                              artifacts=artifact_config())
+            prediction_key = prediction_cache.prediction_key(features_key, **params)
+
+            # Cache reads and writes are file I/O, kept off the event loop
+            cached = await run_in_threadpool(prediction_cache.get_prediction, prediction_key)
+            if cached is not None:
+                response_model = WindowedPredictionResponse if windowed else PredictionResponse
+                return response_model.model_validate(cached)
+
+        response = await predict_upload(
+            file, file_type, fs, windowed, window_size_sec, step_size_sec, features_key
+        )
+        # Not cached if the model was swapped meanwhile: the key names the previous one
+        if prediction_key is not None and prediction_key == prediction_cache.prediction_key(features_key, **params):
+            await run_in_threadpool(prediction_cache.put_prediction, prediction_key, response.model_dump())
+        return response
 
     except HTTPException as he:
         raise he
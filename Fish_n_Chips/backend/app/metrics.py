@@ -0,0 +1,255 @@
+"""
+Per-stage latency histograms, in-flight gauges and queue depths in the Prometheus
+text format (served on /metrics).
+
+Time a stage with a context manager or a decorator (sync or async):
+
+    with stage("parse_edf"):
+        ...
+
+    @stage("whisper_transcribe")
+    def transcribe_with_timestamps(...): ...
+
+Each stage records cognisafe_stage_duration_seconds{stage=...} (histogram),
+cognisafe_stage_in_flight (calls running now) and cognisafe_stage_errors_total
+(calls that raised). Recording costs two perf_counter calls, a bisect into fixed
+buckets and two uncontended acquisitions of a per-stage lock (1-3 µs per stage);
+nothing is aggregated until a scrape. HTTP requests are timed the same way per
+route by MetricsMiddleware.
+
+Values owned by other modules (queue depths, open connections) are registered
+with register_gauge and read at scrape time.
+
+Metrics are per process: work done in pool workers shows up as the API-process
+stage that waits for it (e.g. score_windows).
+"""
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+METRICS_PREFIX = "cognisafe"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Series:
+    """Latency histogram, in-flight count and error count of one label set."""
+
+    __slots__ = ("labels", "buckets", "lock", "counts", "total", "in_flight", "errors")
+
+    def __init__(self, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.labels = labels
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.in_flight = 0
+        self.errors = 0
+
+    def start(self) -> float:
+        with self.lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def finish(self, started: float, failed: bool = False):
+        elapsed = time.perf_counter() - started
+        i = bisect_left(self.buckets, elapsed)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += elapsed
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+    def observe(self, elapsed: float, failed: bool = False):
+        """Record a duration measured elsewhere (nothing was counted as in flight)."""
+        i = bisect_left(self.buckets, elapsed)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += elapsed
+            if failed:
+                self.errors += 1
+
+
+class LatencyFamily:
+    """
+    {prefix}_{name}_duration_seconds, _errors_total and (if track_in_flight)
+    _in_flight, one series per label values.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS, track_in_flight: bool = True):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.track_in_flight = track_in_flight
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def series(self, *labels: str) -> _Series:
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Series(labels, self.buckets))
+        return series
+
+    def render(self) -> List[str]:
+        base = f"{METRICS_PREFIX}_{self.name}"
+        duration, in_flight, errors = [], [], []
+        for series in list(self._series.values()):
+            with series.lock:
+                counts = list(series.counts)
+                total, running, failed = series.total, series.in_flight, series.errors
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, series.labels))
+            sep = "," if labels else ""
+
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                duration.append(f'{base}_duration_seconds_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+            duration.append(f"{base}_duration_seconds_sum{{{labels}}} {total!r}")
+            duration.append(f"{base}_duration_seconds_count{{{labels}}} {cumulative}")
+            in_flight.append(f"{base}_in_flight{{{labels}}} {running}")
+            errors.append(f"{base}_errors_total{{{labels}}} {failed}")
+
+        lines = [f"# HELP {base}_duration_seconds {self.help}", f"# TYPE {base}_duration_seconds histogram", *duration]
+        if self.track_in_flight:
+            lines += [f"# HELP {base}_in_flight Calls currently running.", f"# TYPE {base}_in_flight gauge", *in_flight]
+        lines += [f"# HELP {base}_errors_total Calls that failed.", f"# TYPE {base}_errors_total counter", *errors]
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGES = LatencyFamily("stage", "Duration of named pipeline stages.", ("stage",))
+HTTP_REQUESTS = LatencyFamily("http_request", "Duration of HTTP requests by route (5xx counted as errors).",
+                              ("method", "route"), track_in_flight=False)
+_families: List[LatencyFamily] = [STAGES, HTTP_REQUESTS]
+# name -> (help, callback)
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def stage_series(name: str) -> _Series:
+    """The series of a stage, for code that starts and finishes it in different callbacks."""
+    return STAGES.series(name)
+
+
+class stage:
+    """
+    Time a named stage, as a context manager or as a decorator.
+
+    A context manager instance times one block at a time; create one per `with`.
+    """
+
+    __slots__ = ("_series", "_started")
+
+    def __init__(self, name: str):
+        self._series = STAGES.series(name)
+
+    def __enter__(self):
+        self._started = self._series.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._series.finish(self._started, exc_type is not None)
+        return False
+
+    def __call__(self, func):
+        series = self._series
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = series.start()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    series.finish(started, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = series.start()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                series.finish(started, failed)
+        return wrapper
+
+
+def register_gauge(name: str, help: str, callback: Callable[[], float]):
+    """Expose callback() as {prefix}_{name}, read at every scrape (replaces an earlier gauge of that name)."""
+    _gauges[name] = (help, callback)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for family in _families:
+        lines.extend(family.render())
+    for name, (help, callback) in list(_gauges.items()):
+        try:
+            value = float(callback())
+        except Exception:
+            continue
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {help}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} gauge")
+        lines.append(f"{METRICS_PREFIX}_{name} {value!r}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing HTTP requests per route template (unmatched paths share
+    one series, so arbitrary URLs cannot create new series) and counting open
+    requests and websockets.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.http_in_flight = 0
+        self.websockets_open = 0
+        register_gauge("http_requests_in_flight", "HTTP requests being handled.", lambda: self.http_in_flight)
+        register_gauge("websockets_open", "Open websocket connections.", lambda: self.websockets_open)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            self.websockets_open += 1
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                self.websockets_open -= 1
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.http_in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.http_in_flight -= 1
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.series(scope["method"], path).observe(time.perf_counter() - started, status >= 500)
@@ -0,0 +1,222 @@
+"""
+Hot-reloadable registry of EEG model versions.
+
+The served model is the file at MODEL_PATH. Each distinct file content is a
+version, named after the file and its content hash (e.g. "eeg_best_model-3f2a9c1d04be"),
+which is stamped on every prediction made with it.
+
+A version is loaded once into MODEL_CACHE_DIR: the evaluator load_tree_model
+returns (the compiled forest by default) is dumped there uncompressed under its
+content hash, and every process opens that file with joblib.load(mmap_mode="r").
+The model's arrays are then read-only memory maps of the same file, so the API
+process and all pool workers share one copy in the page cache instead of each
+unpickling a private one.
+
+The registry polls MODEL_PATH and loads a new version when the file changes, so a
+new model is deployed by replacing the file (write it next to the old one and
+os.replace it over, so a half-written file is never picked up). Swapping is a
+reference change: requests already running finish on the version they started
+with. The previous MODEL_KEEP_VERSIONS - 1 versions stay loaded and, with
+EEG_MODEL_SHADOW=1, score the same rows as the active one so their agreement can
+be compared before or after a rollout (see shadow_stats).
+
+Configuration (environment):
+    EEG_MODEL_PATH           model file to serve
+    EEG_MODEL_CACHE_DIR      where loaded versions are materialized for memory mapping
+    EEG_MODEL_KEEP_VERSIONS  versions kept loaded, the active one included
+    EEG_MODEL_POLL_SEC       seconds between checks of EEG_MODEL_PATH (0 disables reloading)
+    EEG_MODEL_SHADOW         "1" to score with the kept previous versions too
+"""
+import asyncio
+import os
+import threading
+import time
+import joblib
+import numpy as np
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .prediction_cache import hash_file
+from .utils.tree_ensemble import COMPILED_FORMAT_VERSION, TREE_MODEL_BACKEND, load_tree_model
+
+MODEL_PATH = os.getenv("EEG_MODEL_PATH", os.path.join("models", "eeg_best_model.joblib"))
+MODEL_CACHE_DIR = os.getenv("EEG_MODEL_CACHE_DIR", os.path.join("cache", "models"))
+MODEL_KEEP_VERSIONS = max(1, int(os.getenv("EEG_MODEL_KEEP_VERSIONS", "2")))
+MODEL_POLL_SEC = float(os.getenv("EEG_MODEL_POLL_SEC", "5"))
+SHADOW_ENABLED = os.getenv("EEG_MODEL_SHADOW", "0") == "1"
+
+# Length of the content hash in version names
+VERSION_HASH_CHARS = 12
+
+
+def open_model(path: str):
+    """A materialized model file, with its arrays memory-mapped read-only."""
+    return joblib.load(path, mmap_mode="r")
+
+
+class ModelVersion:
+    """One loaded model: its version name, source file fingerprint and mapped evaluator."""
+
+    def __init__(self, version: str, fingerprint: str, source_path: str, path: str, model):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.source_path = source_path
+        # Materialized file the model was mapped from; pool workers open the same one
+        self.path = path
+        self.model = model
+        self.loaded_at = time.time()
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "model_type": type(self.model).__name__,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Loads MODEL_PATH as versions and keeps the most recent ones.
+
+    versions[0] is the active version. refresh() is blocking (hashing, loading);
+    run it off the event loop. watch() does that periodically.
+    """
+
+    def __init__(self, model_path: str = MODEL_PATH, cache_dir: str = MODEL_CACHE_DIR,
+                 keep_versions: int = MODEL_KEEP_VERSIONS, poll_sec: float = MODEL_POLL_SEC):
+        self.model_path = model_path
+        self.cache_dir = cache_dir
+        self.keep_versions = max(1, keep_versions)
+        self.poll_sec = poll_sec
+        self.versions: List[ModelVersion] = []
+        self._signature = None
+        self._lock = threading.Lock()
+        # Materialized files of evicted versions, deleted one swap later so that
+        # requests still running on them can finish opening them in workers
+        self._retired: List[str] = []
+        # shadow version -> counters (see record_shadow)
+        self._shadow: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def active(self) -> Optional[ModelVersion]:
+        versions = self.versions
+        return versions[0] if versions else None
+
+    def shadows(self) -> List[ModelVersion]:
+        """The kept previous versions."""
+        return self.versions[1:]
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _materialize(self, fingerprint: str) -> str:
+        """Path of the memory-mappable copy of a version, written on first use."""
+        # The format version keeps copies written by an older CompiledForest from being mapped
+        path = os.path.join(self.cache_dir, f"{fingerprint}.{TREE_MODEL_BACKEND}-v{COMPILED_FORMAT_VERSION}.joblib")
+        if not os.path.exists(path):
+            model = load_tree_model(joblib.load(self.model_path, mmap_mode="r"))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            # Uncompressed, or the arrays cannot be mapped
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, path)
+        return path
+
+    def refresh(self) -> Optional[ModelVersion]:
+        """
+        Load MODEL_PATH if it changed since the last call.
+
+        Returns:
+            The new active version, or None when the file is missing, unchanged,
+            or has the content of the active version.
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                return None
+            # Recorded before loading, so a file that fails to load is retried only once it changes
+            self._signature = signature
+
+            fingerprint = hash_file(self.model_path)
+            active = self.active
+            if active is not None and active.fingerprint == fingerprint:
+                return None
+
+            kept = next((v for v in self.versions if v.fingerprint == fingerprint), None)
+            if kept is None:
+                path = self._materialize(fingerprint)
+                if self._file_signature() != signature:
+                    # Replaced while loading: the copy may not match the fingerprint
+                    os.remove(path)
+                    self._signature = None
+                    return None
+                stem = os.path.splitext(os.path.basename(self.model_path))[0]
+                kept = ModelVersion(f"{stem}-{fingerprint[:VERSION_HASH_CHARS]}", fingerprint,
+                                    self.model_path, path, open_model(path))
+
+            versions = [kept] + [v for v in self.versions if v is not kept]
+            in_use = {v.path for v in versions[:self.keep_versions]}
+            for path in self._retired:
+                if path not in in_use:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._retired = [v.path for v in versions[self.keep_versions:]]
+            # Swapping the list is atomic for readers of active/shadows()
+            self.versions = versions[:self.keep_versions]
+            for v in versions[self.keep_versions:]:
+                self._shadow.pop(v.version, None)
+            self._shadow.pop(kept.version, None)
+            return kept
+
+    async def watch(self, on_swap: Callable[[ModelVersion], Awaitable[None]]):
+        """Poll MODEL_PATH every poll_sec seconds and await on_swap(version) after each reload."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_sec)
+            try:
+                version = await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                print(f"Warning: could not load {self.model_path}, keeping the current model: {e}")
+                continue
+            if version is not None:
+                await on_swap(version)
+
+    def record_shadow(self, version: str, active_proba: np.ndarray, shadow_proba: np.ndarray):
+        """Accumulate how a shadow version's probabilities [n, n_classes] compare with the active one's."""
+        stats = self._shadow.setdefault(version, {"rows": 0, "disagreements": 0, "abs_diff_sum": 0.0})
+        stats["rows"] += len(active_proba)
+        stats["disagreements"] += int(np.count_nonzero(active_proba.argmax(axis=1) != shadow_proba.argmax(axis=1)))
+        stats["abs_diff_sum"] += float(np.abs(active_proba[:, -1] - shadow_proba[:, -1]).sum())
+
+    def shadow_stats(self) -> Dict[str, dict]:
+        """Per shadow version: rows scored, class disagreement rate, mean absolute difference in P(positive class)."""
+        result = {}
+        for version, stats in list(self._shadow.items()):
+            rows = stats["rows"]
+            result[version] = {
+                "rows": rows,
+                "disagreement_rate": stats["disagreements"] / rows if rows else None,
+                "mean_abs_diff": stats["abs_diff_sum"] / rows if rows else None,
+            }
+        return result
+
+    def info(self) -> dict:
+        return {
+            "model_path": self.model_path,
+            "active": self.active.info() if self.active else None,
+            "shadows": [v.info() for v in self.shadows()],
+            "shadow_enabled": SHADOW_ENABLED,
+            "shadow_stats": self.shadow_stats(),
+        }
+
+
+def shadow_models(registry: ModelRegistry) -> List[Tuple[str, object]]:
+    """(version, model) pairs that should shadow-score, empty unless EEG_MODEL_SHADOW=1."""
+    if not SHADOW_ENABLED:
+        return []
+    return [(v.version, v.model) for v in registry.shadows()]
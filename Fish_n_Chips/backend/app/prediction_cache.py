@@ -0,0 +1,210 @@
+"""
+On-disk cache of feature vectors and predictions for repeated EEG uploads.
+
+Entries are keyed by a SHA-256 of the uploaded file plus FEATURE_PIPELINE_VERSION,
+so a re-uploaded recording skips parsing, resampling and feature extraction.
+Predictions are additionally keyed by a fingerprint of the model file and are
+dropped whenever a different model is loaded. The cache directory is kept under
+a total size budget by evicting least recently used entries.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional
+
+from .feature_extraction import FEATURE_PIPELINE_VERSION
+from .preprocessing import filter_config
+
+# "0" disables the cache
+CACHE_ENABLED = os.getenv("EEG_CACHE_ENABLED", "1") != "0"
+CACHE_DIR = os.getenv("EEG_CACHE_DIR", os.path.join("cache", "eeg"))
+# Total size of all entries on disk
+CACHE_MAX_BYTES = int(os.getenv("EEG_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+HASH_BLOCK_BYTES = 1 << 20
+FEATURES_SUFFIX = ".features.npy"
+PREDICTION_SUFFIX = ".prediction.json"
+MODEL_FINGERPRINT_FILE = "model.fingerprint"
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable stream, read in blocks and rewound afterwards."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hash_stream(f)
+
+
+def make_key(*parts) -> str:
+    """Cache key for an ordered set of parts (content hash, parameters, versions)."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class PredictionCache:
+    """
+    Size-bounded LRU store of feature arrays (.npy) and prediction responses (.json).
+
+    Recency survives restarts through file modification times. All methods are
+    thread-safe; they are called from the threadpool as well as the event loop.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 enabled: bool = CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.model_fingerprint: Optional[str] = None
+        self.hits = {"features": 0, "predictions": 0}
+        self.misses = {"features": 0, "predictions": 0}
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # file name -> size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith((FEATURES_SUFFIX, PREDICTION_SUFFIX)):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime_ns, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def set_model(self, model_path: str, fingerprint: str = None):
+        """
+        Bind predictions to the model file at model_path (whose content hash is
+        fingerprint, if already known). Cached predictions from any other model
+        file are deleted.
+        """
+        if not self.enabled:
+            return
+        fingerprint = fingerprint or hash_file(model_path)
+        marker = os.path.join(self.directory, MODEL_FINGERPRINT_FILE)
+        previous = None
+        if os.path.exists(marker):
+            with open(marker) as f:
+                previous = f.read().strip()
+
+        with self._lock:
+            self.model_fingerprint = fingerprint
+            if previous != fingerprint:
+                for name in [n for n in self._entries if n.endswith(PREDICTION_SUFFIX)]:
+                    self._remove(name)
+                if previous is not None:
+                    print(f"Model changed, prediction cache invalidated ({previous[:12]} -> {fingerprint[:12]})")
+                self._write_atomic(MODEL_FINGERPRINT_FILE, fingerprint.encode())
+
+    def features_key(self, content_hash: str, file_type: str, fs: int) -> str:
+        return make_key(content_hash, file_type, fs, FEATURE_PIPELINE_VERSION, filter_config())
+
+    def prediction_key(self, features_key: str, **params) -> str:
+        return make_key(features_key, self.model_fingerprint, *sorted(params.items()))
+
+    def get_features(self, key: str) -> Optional[np.ndarray]:
+        data = self._read(key + FEATURES_SUFFIX, "features")
+        if data is None:
+            return None
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+    def put_features(self, key: str, features: np.ndarray):
+        buf = io.BytesIO()
+        np.save(buf, features, allow_pickle=False)
+        self._write(key + FEATURES_SUFFIX, buf.getvalue())
+
+    def get_prediction(self, key: str) -> Optional[dict]:
+        # Nothing is valid until a model has been bound
+        if self.model_fingerprint is None:
+            return None
+        data = self._read(key + PREDICTION_SUFFIX, "predictions")
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def put_prediction(self, key: str, prediction: dict):
+        if self.model_fingerprint is None:
+            return
+        self._write(key + PREDICTION_SUFFIX, json.dumps(prediction).encode())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "model_fingerprint": self.model_fingerprint,
+            }
+
+    def _read(self, name: str, kind: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if name not in self._entries:
+                self.misses[kind] += 1
+                return None
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                # Deleted behind our back
+                self._remove(name)
+                self.misses[kind] += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits[kind] += 1
+            return data
+
+    def _write(self, name: str, data: bytes):
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                self._write_atomic(name, data)
+            except OSError as e:
+                print(f"Warning: could not write cache entry {name}: {e}")
+                return
+            self._total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+
+    def _write_atomic(self, name: str, data: bytes):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, name: str):
+        self._total_bytes -= self._entries.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
@@ -0,0 +1,127 @@
+"""
+EEG preprocessing: bandpass + notch filtering.
+
+Filters are designed once per (fs, band, notch) as second-order sections and
+cached. Recordings are filtered zero-phase (sosfiltfilt) across all channels in one
+call; live streams go through StreamingFilter, which carries the filter state
+between blocks so each block costs O(new samples).
+
+The shipped model was trained on unfiltered signals, so filtering is off unless
+EEG_FILTER_ENABLED=1 (retrain with the same settings when turning it on).
+
+Configuration (environment):
+    EEG_FILTER_ENABLED     "1" to filter uploads, streams and feature-store recordings
+    EEG_BANDPASS_LOW_HZ    bandpass lower edge
+    EEG_BANDPASS_HIGH_HZ   bandpass upper edge
+    EEG_NOTCH_HZ           line frequency to notch out (0 disables the notch)
+"""
+import os
+import numpy as np
+from functools import lru_cache
+from scipy.signal import butter, iirnotch, sosfilt, sosfilt_zi, sosfiltfilt, tf2sos
+from typing import Iterable, Iterator, Optional
+
+from .metrics import stage
+
+FILTER_ENABLED = os.getenv("EEG_FILTER_ENABLED", "0") == "1"
+BANDPASS_LOW_HZ = float(os.getenv("EEG_BANDPASS_LOW_HZ", "0.5"))
+BANDPASS_HIGH_HZ = float(os.getenv("EEG_BANDPASS_HIGH_HZ", "45"))
+NOTCH_HZ = float(os.getenv("EEG_NOTCH_HZ", "50"))
+BANDPASS_ORDER = 4
+NOTCH_Q = 30
+
+
+def filter_config() -> str:
+    """The active settings, for cache keys of anything computed from filtered data."""
+    if not FILTER_ENABLED:
+        return "unfiltered"
+    return f"bp{BANDPASS_LOW_HZ}-{BANDPASS_HIGH_HZ}/{BANDPASS_ORDER}|notch{NOTCH_HZ}/{NOTCH_Q}"
+
+
+@lru_cache(maxsize=32)
+def design_sos(fs: int, low_hz: float = BANDPASS_LOW_HZ, high_hz: float = BANDPASS_HIGH_HZ,
+               notch_hz: float = NOTCH_HZ) -> np.ndarray:
+    """
+    Butterworth bandpass followed by an IIR notch, as one SOS array [n_sections, 6]
+    (shared between callers, do not modify). A band edge at or above Nyquist turns
+    the bandpass into a highpass; a notch at or above Nyquist (or 0) is left out.
+    """
+    nyquist = fs / 2
+    if high_hz < nyquist:
+        sos = butter(BANDPASS_ORDER, [low_hz, high_hz], btype="bandpass", fs=fs, output="sos")
+    else:
+        sos = butter(BANDPASS_ORDER, low_hz, btype="highpass", fs=fs, output="sos")
+
+    if 0 < notch_hz < nyquist:
+        b, a = iirnotch(notch_hz, NOTCH_Q, fs=fs)
+        sos = np.concatenate([sos, tf2sos(b, a)])
+
+    return sos
+
+
+@stage("filter")
+def filter_eeg(data: np.ndarray, fs: int) -> np.ndarray:
+    """
+    Zero-phase bandpass + notch of every channel of a recording.
+
+    Args:
+        data: 2D array [n_samples, n_channels]
+        fs: Sampling rate
+
+    Returns:
+        Filtered array of the same shape (float32 input stays float32).
+    """
+    sos = design_sos(fs)
+    # sosfiltfilt's default edge padding, shortened for very short segments
+    n_zeros = min(np.count_nonzero(sos[:, 2] == 0), np.count_nonzero(sos[:, 5] == 0))
+    padlen = min(3 * (2 * len(sos) + 1 - n_zeros), len(data) - 1)
+    filtered = sosfiltfilt(sos, data, axis=0, padlen=max(padlen, 0))
+    return filtered.astype(data.dtype, copy=False) if data.dtype == np.float32 else filtered
+
+
+def preprocess(data: np.ndarray, fs: int) -> np.ndarray:
+    """filter_eeg when filtering is enabled, otherwise data unchanged."""
+    return filter_eeg(data, fs) if FILTER_ENABLED else data
+
+
+class StreamingFilter:
+    """
+    Causal bandpass + notch for samples arriving in blocks.
+
+    The SOS state (zi) is carried from block to block, so filtering a stream in any
+    block sizes gives the same output as one sosfilt over the whole stream. The
+    state starts at the filter's steady state for the first sample, which avoids a
+    large onset transient from the DC offset.
+    """
+
+    def __init__(self, fs: int = 256):
+        self.fs = fs
+        self.sos = design_sos(fs)
+        self.reset()
+
+    def reset(self):
+        self._zi: Optional[np.ndarray] = None
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Filter the next block.
+
+        Args:
+            samples: 2D array [n_samples, n_channels]
+
+        Returns:
+            Filtered block of the same shape.
+        """
+        if len(samples) == 0:
+            return samples
+        if self._zi is None:
+            # [n_sections, 2] -> [n_sections, 2, n_channels], scaled by each channel's first sample
+            self._zi = sosfilt_zi(self.sos)[:, :, np.newaxis] * np.asarray(samples[0], dtype=np.float64)
+
+        filtered, self._zi = sosfilt(self.sos, samples, axis=0, zi=self._zi)
+        return filtered.astype(samples.dtype, copy=False) if samples.dtype == np.float32 else filtered
+
+    def filter_blocks(self, blocks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Filter an iterable of blocks lazily."""
+        for block in blocks:
+            yield self.push(block)
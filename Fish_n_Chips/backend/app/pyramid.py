@@ -0,0 +1,198 @@
+"""
+Multi-resolution min/max pyramid of an EEG recording, for plotting.
+
+Level 0 is the raw float32 samples; each further level holds interleaved (min, max)
+rows per bin of PYRAMID_FACTOR times more samples than the level below, down to a
+few dozen bins. All levels live in one file behind a small header, so a view is a
+memory-mapped slice of the right level: any time range at px pixel columns reads
+O(px) rows whatever the recording length, and the result has the same
+[2 * px, channels] interleaved layout as streaming.minmax_decimate.
+
+File layout (little-endian):
+    header        magic, version, n_levels, fs, n_channels, n_samples
+    level table   (byte offset, samples per bin, rows) per level
+    levels        float32 [rows, channels] each
+
+Opened pyramids are kept (see open_pyramid), so repeated views of a recording
+reuse its memory maps instead of re-reading the header and mapping every level.
+"""
+import os
+import struct
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .metrics import stage
+
+PYRAMID_DIR = os.getenv("EEG_PYRAMID_DIR", os.path.join("cache", "pyramids"))
+# Samples per bin grow by this factor from one level to the next
+PYRAMID_FACTOR = 4
+# The coarsest level has at most this many bins
+MIN_LEVEL_BINS = 64
+# Opened pyramids kept for later views
+PYRAMID_OPEN_MAX = int(os.getenv("EEG_PYRAMID_OPEN_MAX", "32"))
+
+PYRAMID_MAGIC = b"EEGP"
+PYRAMID_VERSION = 1
+PYRAMID_HEADER = struct.Struct("<4sHHIIQ")
+LEVEL_ENTRY = struct.Struct("<QQQ")
+PYRAMID_DTYPE = np.dtype("<f4")
+
+
+def pyramid_path(recording_id: str, directory: str = PYRAMID_DIR) -> str:
+    return os.path.join(directory, f"{recording_id}.pyramid")
+
+
+def _minmax_levels(data: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+    """(samples per bin, interleaved [2 * n_bins, channels] min/max rows) of every level above 0."""
+    levels = []
+    mins = maxs = data
+    bin_samples = 1
+    while len(mins) > MIN_LEVEL_BINS:
+        n_bins = -(-len(mins) // PYRAMID_FACTOR)
+        # Pad the last, partial bin with its own last row, which leaves min/max unchanged
+        pad = n_bins * PYRAMID_FACTOR - len(mins)
+        if pad:
+            mins = np.concatenate([mins, np.repeat(mins[-1:], pad, axis=0)])
+            maxs = np.concatenate([maxs, np.repeat(maxs[-1:], pad, axis=0)])
+
+        mins = mins.reshape(n_bins, PYRAMID_FACTOR, -1).min(axis=1)
+        maxs = maxs.reshape(n_bins, PYRAMID_FACTOR, -1).max(axis=1)
+        bin_samples *= PYRAMID_FACTOR
+
+        level = np.empty((2 * n_bins, data.shape[1]), dtype=PYRAMID_DTYPE)
+        level[0::2] = mins
+        level[1::2] = maxs
+        levels.append((bin_samples, level))
+    return levels
+
+
+@stage("build_pyramid")
+def build_pyramid(data: np.ndarray, fs: int, path: str):
+    """
+    Write the pyramid of a recording [n_samples, n_channels] to path (atomically).
+    """
+    data = np.ascontiguousarray(data, dtype=PYRAMID_DTYPE)
+    levels = [(1, data)] + _minmax_levels(data)
+
+    n_samples, n_channels = data.shape
+    offset = PYRAMID_HEADER.size + LEVEL_ENTRY.size * len(levels)
+    table = []
+    for bin_samples, rows in levels:
+        table.append(LEVEL_ENTRY.pack(offset, bin_samples, len(rows)))
+        offset += rows.nbytes
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PYRAMID_HEADER.pack(PYRAMID_MAGIC, PYRAMID_VERSION, len(levels), fs, n_channels, n_samples))
+        f.write(b"".join(table))
+        for _, rows in levels:
+            f.write(rows.tobytes())
+    os.replace(tmp_path, path)
+
+
+class EEGPyramid:
+    """
+    Read-only, memory-mapped view of a pyramid file written by build_pyramid.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            header = f.read(PYRAMID_HEADER.size)
+            if len(header) < PYRAMID_HEADER.size:
+                raise ValueError("Pyramid file is truncated")
+            magic, version, n_levels, self.fs, self.n_channels, self.n_samples = PYRAMID_HEADER.unpack(header)
+            if magic != PYRAMID_MAGIC or version != PYRAMID_VERSION:
+                raise ValueError("Not a pyramid file of this version")
+            table = f.read(LEVEL_ENTRY.size * n_levels)
+
+        # (samples per bin, [rows, channels] memmap) from finest to coarsest
+        self.levels = []
+        for i in range(n_levels):
+            offset, bin_samples, n_rows = LEVEL_ENTRY.unpack_from(table, i * LEVEL_ENTRY.size)
+            rows = np.memmap(path, dtype=PYRAMID_DTYPE, mode="r", offset=offset, shape=(n_rows, self.n_channels))
+            self.levels.append((bin_samples, rows))
+
+    @property
+    def duration_sec(self) -> float:
+        return self.n_samples / self.fs
+
+    def view(self, start_sample: int, end_sample: int, px: int) -> Tuple[int, int, np.ndarray]:
+        """
+        Samples [start_sample, end_sample) for a plot px columns wide.
+
+        Returns:
+            (first sample, end sample, data) of what was read. data is the raw samples
+            [n, channels] when the range has at most 2 * px of them, otherwise
+            interleaved (min, max) rows [2 * columns, channels] whose columns split the
+            (bin-aligned) range into near-equal parts, with columns <= px.
+        """
+        start_sample = max(0, start_sample)
+        end_sample = min(self.n_samples, end_sample)
+        if end_sample <= start_sample:
+            return start_sample, start_sample, np.empty((0, self.n_channels), dtype=PYRAMID_DTYPE)
+        span = end_sample - start_sample
+        if span <= 2 * px:
+            return start_sample, end_sample, np.asarray(self.levels[0][1][start_sample:end_sample])
+
+        # Coarsest level that still has at least px bins in range (< PYRAMID_FACTOR * px)
+        bin_samples, rows = self.levels[0]
+        for level_bin, level_rows in self.levels[1:]:
+            if level_bin * px > span:
+                break
+            bin_samples, rows = level_bin, level_rows
+
+        first_bin = start_sample // bin_samples
+        last_bin = -(-end_sample // bin_samples)
+        if bin_samples == 1:
+            mins = maxs = np.asarray(rows[first_bin:last_bin])
+        else:
+            block = np.asarray(rows[2 * first_bin:2 * last_bin])
+            mins, maxs = block[0::2], block[1::2]
+
+        # Group the bins in range into px columns
+        n_bins = len(mins)
+        columns = min(px, n_bins)
+        edges = (np.arange(columns) * n_bins) // columns
+        out = np.empty((2 * columns, self.n_channels), dtype=PYRAMID_DTYPE)
+        out[0::2] = np.minimum.reduceat(mins, edges, axis=0)
+        out[1::2] = np.maximum.reduceat(maxs, edges, axis=0)
+        return first_bin * bin_samples, min(last_bin * bin_samples, self.n_samples), out
+
+
+# path -> (file identity, opened pyramid), most recently used last
+_open_pyramids: "OrderedDict[str, Tuple[tuple, EEGPyramid]]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def open_pyramid(recording_id: str, directory: str = PYRAMID_DIR) -> Optional[EEGPyramid]:
+    """
+    The stored pyramid of a recording, or None if there is none.
+
+    Pyramids stay open between calls; one is reopened when its file was replaced
+    (build_pyramid writes a new file, so the inode and mtime change).
+    """
+    path = pyramid_path(recording_id, directory)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        with _open_lock:
+            _open_pyramids.pop(path, None)
+        return None
+    identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    with _open_lock:
+        cached = _open_pyramids.get(path)
+        if cached is not None and cached[0] == identity:
+            _open_pyramids.move_to_end(path)
+            return cached[1]
+
+    pyramid = EEGPyramid(path)
+    with _open_lock:
+        _open_pyramids[path] = (identity, pyramid)
+        _open_pyramids.move_to_end(path)
+        while len(_open_pyramids) > PYRAMID_OPEN_MAX:
+            _open_pyramids.popitem(last=False)
+    return pyramid
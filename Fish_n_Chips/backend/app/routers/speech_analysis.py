@@ -2,9 +2,6 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
 from typing import Optional
 from sqlalchemy.orm import Session
 import uuid
-import shutil
-import os
-import tempfile
 from Levenshtein import ratio
 from datetime import datetime
 
@@ -14,6 +11,7 @@ from backend.app.models.schemas import (
     AudiometryRequest, AudiometryResponse, SpeechResultsResponse
 )
 
+from backend.app.services.speech.audio_buffer import AudioBuffer
 from backend.app.services.speech.whisper_service import transcribe_with_timestamps
 from backend.app.services.speech.vad_service import detect_speech_start
 from backend.app.services.speech.feature_extractor import extract_acoustic_features, extract_linguistic_features
@@ -75,119 +73,123 @@ async def analyze_speech(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    # 1. Save temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-
+    # 1. Decode once; every stage below reads the same buffer
+    audio_bytes = await file.read()
     try:
-        # 2. Transcribe (Whisper)
-        transcription_result = transcribe_with_timestamps(tmp_path)
-        transcription_text = transcription_result["text"]
-        word_timestamps = transcription_result["words"]
-
-        # 3. Calculate Reaction Time
-        # Option A: Use VAD on server
-        with open(tmp_path, "rb") as f:
-            audio_bytes = f.read()
-
-        # We need raw PCM for VAD, but file is likely WAV/WebM.
-        # For simplicity, let's rely on client-side timestamps or VAD if format allows.
-        # Assuming client sends a rough timestamp, we can refine it or just use it.
-        # Let's use the client provided timestamp for now as VAD on compressed web audio is tricky without conversion.
-        # Ideally: convert to PCM -> VAD.
-
-        # Placeholder for VAD logic if we had PCM
-        # vad_start = detect_speech_start(pcm_bytes, 16000)
-
-        # Reaction time = (Time user started speaking) - (Time audio stimulus ended)
-        # This requires client to send both.
-        # Let's assume the client sends the calculated reaction time or we calculate it here.
-        # Actually, the prompt says "detect_speech_start" is in VAD service.
-        # Let's assume we use the client's speech_start_timestamp for now to be safe,
-        # as converting WebM/WAV to 16k mono PCM for webrtcvad requires ffmpeg/pydub which we have.
-
-        # Simple fallback:
-        reaction_time_ms = speech_start_timestamp # Client calculated or passed raw
-
-        # 4. Accuracy (Levenshtein)
-        # Normalize strings
-        ref = stimulus_sentence.lower().strip(".,!?")
-        hyp = transcription_text.lower().strip(".,!?")
-        accuracy = ratio(ref, hyp) * 100
-
-        # 5. Features
-        acoustic_features = extract_acoustic_features(tmp_path)
-        linguistic_features = extract_linguistic_features(transcription_text)
-
-        # 6. Pauses - Use AUDIO-BASED detection (more accurate than Whisper timestamps)
-        from backend.app.services.speech.pause_analyzer import detect_pauses_from_audio
-        pause_analysis = detect_pauses_from_audio(tmp_path, min_silence_duration=0.3)
-
-        # 7. ML-Based Scoring (with improved pause analysis)
-        scores = calculate_ml_risk_score(
-            reaction_time_ms=reaction_time_ms,
-            speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 120),
-            pause_analysis=pause_analysis,  # Now using audio-based pauses!
-            word_accuracy=accuracy
-        )
+        audio = AudioBuffer.from_bytes(audio_bytes, file.filename or "audio.wav")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
+
+    # 2. Calculate Reaction Time
+    # Option A: Use VAD on server (audio.pcm16() is the 16k mono PCM webrtcvad needs):
+    # vad_start = detect_speech_start(audio)
+    # (/ws/speech/stream does this on the live audio)
+
+    # Reaction time = (Time user started speaking) - (Time audio stimulus ended)
+    # This requires client to send both.
+    # Let's assume the client sends the calculated reaction time or we calculate it here.
+    # Actually, the prompt says "detect_speech_start" is in VAD service.
+    # Let's assume we use the client's speech_start_timestamp for now to be safe,
+    # as converting WebM/WAV to 16k mono PCM for webrtcvad requires ffmpeg/pydub which we have.
+
+    # Simple fallback:
+    reaction_time_ms = speech_start_timestamp # Client calculated or passed raw
+
+    return analyze_recording(audio, session_id, stimulus_sentence, reaction_time_ms, db)
+
+
+def analyze_recording(
+    audio: AudioBuffer,
+    session_id: str,
+    stimulus_sentence: str,
+    reaction_time_ms: float,
+    db: Session
+) -> SpeechAnalysisResponse:
+    """
+    Everything after decoding and reaction time: transcription, accuracy,
+    features, pauses and scoring; the result is stored in the session and the
+    database. Shared by /analyze and the /ws/speech/stream endpoint.
+    """
+    # 3. Transcribe (Whisper)
+    transcription_result = transcribe_with_timestamps(audio)
+    transcription_text = transcription_result["text"]
+    word_timestamps = transcription_result["words"]
+
+    # 4. Accuracy (Levenshtein)
+    # Normalize strings
+    ref = stimulus_sentence.lower().strip(".,!?")
+    hyp = transcription_text.lower().strip(".,!?")
+    accuracy = ratio(ref, hyp) * 100
+
+    # 5. Features
+    acoustic_features = extract_acoustic_features(audio)
+    linguistic_features = extract_linguistic_features(transcription_text)
+
+    # 6. Pauses - Use AUDIO-BASED detection (more accurate than Whisper timestamps)
+    from backend.app.services.speech.pause_analyzer import detect_pauses_from_audio
+    pause_analysis = detect_pauses_from_audio(audio, min_silence_duration=0.3)
+
+    # 7. ML-Based Scoring (with improved pause analysis)
+    scores = calculate_ml_risk_score(
+        reaction_time_ms=reaction_time_ms,
+        speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 120),
+        pause_analysis=pause_analysis,  # Now using audio-based pauses!
+        word_accuracy=accuracy
+    )
 
-        # Store result in memory
-        if session_id in sessions:
-            sessions[session_id]["results"].append({
-                "sentence": stimulus_sentence,
-                "transcription": transcription_text,
-                "accuracy": accuracy,
-                "scores": scores,
-                "acoustic_features": acoustic_features,
-                "linguistic_features": linguistic_features
-            })
-
-        # Save to database
-        sentence_index = len(sessions.get(session_id, {}).get("results", [])) - 1
-        db_recording = SentenceRecording(
-            session_id=session_id,
-            sentence_index=sentence_index,
-            stimulus_sentence=stimulus_sentence,
-            transcription=transcription_text,
-            word_accuracy=accuracy,
-            reaction_time_ms=reaction_time_ms,
-            speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 0),
-            avg_pause_duration=pause_analysis["avg_pause_duration"],
-            long_pause_count=pause_analysis["long_pause_count"],
+    # Store result in memory
+    if session_id in sessions:
+        sessions[session_id]["results"].append({
+            "sentence": stimulus_sentence,
+            "transcription": transcription_text,
+            "accuracy": accuracy,
+            "scores": scores,
+            "acoustic_features": acoustic_features,
+            "linguistic_features": linguistic_features
+        })
+
+    # Save to database
+    sentence_index = len(sessions.get(session_id, {}).get("results", [])) - 1
+    db_recording = SentenceRecording(
+        session_id=session_id,
+        sentence_index=sentence_index,
+        stimulus_sentence=stimulus_sentence,
+        transcription=transcription_text,
+        word_accuracy=accuracy,
+        reaction_time_ms=reaction_time_ms,
+        speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 0),
+        avg_pause_duration=pause_analysis["avg_pause_duration"],
+        long_pause_count=pause_analysis["long_pause_count"],
+        acoustic_features=acoustic_features,
+        linguistic_features=linguistic_features,
+        pause_locations=pause_analysis["pause_locations"],
+        risk_score=scores["overall_risk"],
+        risk_level=scores["risk_level"]
+    )
+    db.add(db_recording)
+    db.commit()
+    print(f"✅ Saved sentence {sentence_index + 1} to database")
+
+    return SpeechAnalysisResponse(
+        reaction_time_ms=reaction_time_ms,
+        transcription=transcription_text,
+        word_accuracy=accuracy,
+        speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 0), # Need to implement wpm calc in extractor properly
+        avg_pause_duration=pause_analysis["avg_pause_duration"],
+        long_pause_count=pause_analysis["long_pause_count"],
+        pause_locations=[
+            PauseLocation(
+                after_word=f"pause_{i+1}",  # Audio-based doesn't have word context
+                duration=p["duration"]
+            ) for i, p in enumerate(pause_analysis.get("pause_locations", []))
+        ],
+        risk_score=scores["overall_risk"],
+        risk_level=scores["risk_level"],
+        features=SpeechFeatures(
             acoustic_features=acoustic_features,
-            linguistic_features=linguistic_features,
-            pause_locations=pause_analysis["pause_locations"],
-            risk_score=scores["overall_risk"],
-            risk_level=scores["risk_level"]
-        )
-        db.add(db_recording)
-        db.commit()
-        print(f"✅ Saved sentence {sentence_index + 1} to database")
-
-        return SpeechAnalysisResponse(
-            reaction_time_ms=reaction_time_ms,
-            transcription=transcription_text,
-            word_accuracy=accuracy,
-            speech_rate_wpm=acoustic_features.get("speech_rate_wpm", 0), # Need to implement wpm calc in extractor properly
-            avg_pause_duration=pause_analysis["avg_pause_duration"],
-            long_pause_count=pause_analysis["long_pause_count"],
-            pause_locations=[
-                PauseLocation(
-                    after_word=f"pause_{i+1}",  # Audio-based doesn't have word context
-                    duration=p["duration"]
-                ) for i, p in enumerate(pause_analysis.get("pause_locations", []))
-            ],
-            risk_score=scores["overall_risk"],
-            risk_level=scores["risk_level"],
-            features=SpeechFeatures(
-                acoustic_features=acoustic_features,
-                linguistic_features=linguistic_features
-            )
+            linguistic_features=linguistic_features
         )
-
-    finally:
-        os.remove(tmp_path)
+    )
 
 @router.post("/audiometry", response_model=AudiometryResponse)
 async def audiometry_test(request: AudiometryRequest):
@@ -0,0 +1,112 @@
+"""
+Streaming speech analysis: the browser sends audio while the user is still
+speaking, so VAD, silence tracking and the STFT are done by the time the sentence
+ends and only transcription and scoring remain.
+"""
+import json
+import logging
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketState
+
+from backend.app.database import get_db
+from backend.app.metrics import stage
+from backend.app.routers.speech_analysis import analyze_recording
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE
+from backend.app.services.speech.speech_stream import SpeechStream
+
+# Seconds of audio between progress messages
+STREAM_PROGRESS_SEC = 0.5
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["speech"])
+
+
+@router.websocket("/ws/speech/stream")
+async def speech_stream_endpoint(
+    websocket: WebSocket,
+    session_id: str,
+    stimulus_sentence: str,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    encoding: str = "pcm16",
+    stimulus_offset_ms: float = 0.0,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze one sentence recording as it is spoken.
+
+    The client sends binary frames of mono PCM ("pcm16" or "float32", little-endian,
+    at sample_rate) and, when the user stops, the text message {"type": "end"}.
+    stimulus_offset_ms is where in the stream the stimulus finished playing; the
+    reaction time is the server-side VAD speech start minus that offset. If VAD
+    finds no speech, the end message's optional "speech_start_timestamp" is used,
+    as /api/speech/analyze does.
+
+    Sent to the client:
+        {"type": "progress", "received_sec", "speech_start_ms", "trailing_silence_sec"}
+            every STREAM_PROGRESS_SEC of audio (trailing silence lets the client
+            stop recording on its own)
+        {"type": "result", ...SpeechAnalysisResponse} after the end message, then the
+            socket is closed
+        {"error": ...} for bad input, or a generic message if the analysis fails
+            (details are logged server-side); the socket is closed after it
+    """
+    await websocket.accept()
+    try:
+        stream = SpeechStream(sample_rate, encoding)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+
+    next_progress_at = STREAM_PROGRESS_SEC
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                # A few array ops per chunk, cheap enough for the event loop
+                try:
+                    stream.push(message["bytes"])
+                except ValueError as e:
+                    await websocket.send_text(json.dumps({"error": f"Invalid audio chunk: {e}"}))
+                    break
+                if stream.duration >= next_progress_at:
+                    next_progress_at = stream.duration + STREAM_PROGRESS_SEC
+                    await websocket.send_text(json.dumps({"type": "progress", **stream.progress()}))
+                continue
+
+            try:
+                control = json.loads(message["text"])
+            except (ValueError, TypeError):
+                control = None
+            if not isinstance(control, dict) or control.get("type") != "end":
+                await websocket.send_text(json.dumps({"error": 'Expected binary audio or {"type": "end"}'}))
+                continue
+
+            with stage("speech_stream_finish"):
+                audio = stream.finish()
+                if stream.speech_start_ms is not None:
+                    reaction_time_ms = stream.speech_start_ms - stimulus_offset_ms
+                else:
+                    reaction_time_ms = float(control.get("speech_start_timestamp", 0.0))
+                # Transcription is a blocking API call
+                response = await run_in_threadpool(
+                    analyze_recording, audio, session_id, stimulus_sentence, reaction_time_ms, db
+                )
+            await websocket.send_text(json.dumps({"type": "result", **response.model_dump()}))
+            break
+
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("Speech stream error in session %s", session_id)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_text(json.dumps({"error": "Internal error while analyzing the recording"}))
+    finally:
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
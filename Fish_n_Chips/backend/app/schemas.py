@@ -12,6 +12,22 @@ class PredictionResponse(BaseModel):
     model_version: str
 
 
+class WindowPrediction(BaseModel):
+    start_sec: float
+    end_sec: float
+    probability: float
+    risk_level: str
+    artifact: bool = False
+
+
+class WindowedPredictionResponse(PredictionResponse):
+    n_windows: int
+    n_rejected_windows: int = 0
+    window_size_sec: int
+    step_size_sec: int
+    timeline: List[WindowPrediction]
+
+
 class SaveEEGResultRequest(BaseModel):
     user_id: str
     status_class: int
@@ -19,3 +35,4 @@ class SaveEEGResultRequest(BaseModel):
     risk_level: str
     model_version: str
     filename: str = ""
+
@@ -0,0 +1,84 @@
+"""
+Decode-once audio for the speech analysis pipeline.
+
+An upload is decoded a single time into mono float32 samples at SPEECH_SAMPLE_RATE
+and every stage (VAD, acoustic features, pause detection) reads the same
+AudioBuffer instead of re-reading a temp file. Spectral analyses are computed on
+first use and cached on the buffer, so stages asking for the same STFT share it;
+frame-level features derived from it live in audio.features (see spectral_features).
+The original encoded bytes are kept for the Whisper upload.
+"""
+import os
+import numpy as np
+import librosa
+from typing import Dict, Optional, Tuple
+
+from backend.app.metrics import stage
+from backend.app.services.speech.spectral_features import SpectralFeatures
+from backend.app.utils.audio_utils import load_audio_from_bytes
+
+# Canonical rate: what Whisper resamples to anyway, and one webrtcvad accepts
+SPEECH_SAMPLE_RATE = int(os.getenv("SPEECH_SAMPLE_RATE", "16000"))
+
+
+class AudioBuffer:
+    """
+    A decoded recording: mono float32 samples at sr, plus lazily computed analyses.
+    """
+
+    def __init__(self, samples: np.ndarray, sr: int, data: Optional[bytes] = None, filename: str = "audio.wav"):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sr = sr
+        # Encoded upload, for services that need the file itself
+        self.data = data
+        self.filename = filename
+        self._stft: Dict[Tuple[int, int, int], np.ndarray] = {}
+        self._magnitude: Dict[Tuple[int, int, int], np.ndarray] = {}
+        self._pcm16: Optional[bytes] = None
+        self.features = SpectralFeatures(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, filename: str = "audio.wav", sr: int = SPEECH_SAMPLE_RATE) -> "AudioBuffer":
+        """
+        Decode an encoded upload (WAV/FLAC/OGG via soundfile, anything else via pydub/ffmpeg).
+
+        Raises:
+            ValueError: if the audio cannot be decoded.
+        """
+        with stage("audio_decode"):
+            samples, sr = load_audio_from_bytes(data, target_sr=sr)
+        return cls(samples, sr, data, filename)
+
+    @classmethod
+    def from_file(cls, path: str, sr: int = SPEECH_SAMPLE_RATE) -> "AudioBuffer":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read(), os.path.basename(path), sr)
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sr
+
+    def stft(self, n_fft: int, hop_length: int, win_length: Optional[int] = None) -> np.ndarray:
+        """Complex Hann STFT [1 + n_fft // 2, n_frames] as librosa.stft computes it, once per parameters."""
+        key = (n_fft, hop_length, win_length or n_fft)
+        spectrum = self._stft.get(key)
+        if spectrum is None:
+            with stage("stft"):
+                spectrum = self._stft[key] = librosa.stft(self.samples, n_fft=n_fft, hop_length=hop_length,
+                                                          win_length=win_length)
+        return spectrum
+
+    def magnitude(self, n_fft: int, hop_length: int, win_length: Optional[int] = None) -> np.ndarray:
+        """|stft(n_fft, hop_length, win_length)|, computed once."""
+        key = (n_fft, hop_length, win_length or n_fft)
+        magnitude = self._magnitude.get(key)
+        if magnitude is None:
+            magnitude = self._magnitude[key] = np.abs(self.stft(n_fft, hop_length, win_length))
+        return magnitude
+
+    def pcm16(self) -> bytes:
+        """16-bit little-endian PCM of the samples, as webrtcvad expects."""
+        if self._pcm16 is None:
+            pcm = np.clip(self.samples, -1.0, 1.0) * 32767
+            self._pcm16 = pcm.astype("<i2").tobytes()
+        return self._pcm16
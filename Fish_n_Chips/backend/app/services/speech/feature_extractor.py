@@ -1,7 +1,10 @@
-import librosa
 import numpy as np
 import spacy
-from typing import Dict, Any
+from typing import Dict, Any, Union
+
+from backend.app.metrics import stage
+from backend.app.services.speech.audio_buffer import AudioBuffer
+from backend.app.services.speech.pitch import estimate_pitch
 
 # Load spaCy model
 try:
@@ -12,30 +15,33 @@ except OSError:
     download("en_core_web_sm")
     nlp = spacy.load("en_core_web_sm")
 
-def extract_acoustic_features(audio_path: str) -> Dict[str, Any]:
+@stage("acoustic_features")
+def extract_acoustic_features(audio: Union[AudioBuffer, str]) -> Dict[str, Any]:
     """
-    Extract acoustic features using librosa.
+    Extract acoustic features (pitch, energy, MFCCs).
+
+    Args:
+        audio: Decoded recording (or a path to decode)
     """
     try:
-        y, sr = librosa.load(audio_path, sr=None)
+        if isinstance(audio, str):
+            audio = AudioBuffer.from_file(audio)
 
-        # Pitch (F0)
-        f0, voiced_flag, voiced_probs = librosa.pyin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
+        # Pitch (F0), NaN where unvoiced; backend set by SPEECH_PITCH_BACKEND
+        with stage("pitch"):
+            f0 = estimate_pitch(audio)
         f0_clean = f0[~np.isnan(f0)]
 
         pitch_mean = float(np.mean(f0_clean)) if len(f0_clean) > 0 else 0.0
         pitch_std = float(np.std(f0_clean)) if len(f0_clean) > 0 else 0.0
 
-        # Energy (RMS)
-        rms = librosa.feature.rms(y=y)
-        energy_mean = float(np.mean(rms))
-
-        # MFCCs
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        mfcc_means = np.mean(mfccs, axis=1).tolist()
+        # Energy (RMS) and MFCCs, from the recording's shared STFT (see spectral_features)
+        features = audio.features.compute("rms", "mfcc")
+        energy_mean = float(np.mean(features["rms"]))
+        mfcc_means = np.mean(features["mfcc"], axis=1).tolist()
 
         # Speech Rate (approximate based on duration and non-silent segments)
-        duration = librosa.get_duration(y=y, sr=sr)
+        duration = audio.duration
 
         return {
             "pitch_mean": pitch_mean,
@@ -48,6 +54,7 @@ def extract_acoustic_features(audio_path: str) -> Dict[str, Any]:
         print(f"Error extracting acoustic features: {e}")
         return {}
 
+@stage("linguistic_features")
 def extract_linguistic_features(text: str) -> Dict[str, Any]:
     """
     Extract linguistic features using spaCy.
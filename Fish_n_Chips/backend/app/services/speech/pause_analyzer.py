@@ -1,17 +1,144 @@
 """
 Improved pause detection using audio analysis instead of relying on Whisper timestamps.
-Uses librosa to detect actual silence/pauses in the audio waveform.
+Detects actual silence/pauses from the frame energy of the audio waveform.
 """
 import numpy as np
-import librosa
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence, Tuple, Union
 
-def detect_pauses_from_audio(audio_path: str, min_silence_duration: float = 0.3) -> Dict[str, Any]:
+from backend.app.metrics import stage
+from backend.app.services.speech.audio_buffer import AudioBuffer
+from backend.app.services.speech.spectral_features import NOISE_FLOOR_PERCENTILE, SILENCE_MARGIN_DB
+
+# Pauses longer than this count as long pauses
+LONG_PAUSE_SEC = 0.8
+# Default calibration grid for detect_pause_grid
+GRID_MARGINS_DB = (4, 6, 8, 10, 12, 15, 20)
+GRID_MIN_DURATIONS = (0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0)
+
+
+def silent_runs(is_silent: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run-length encode a silence mask.
+
+    Returns:
+        (start, end) frame indices of each run of silent frames. end is the first
+        frame after the run, or the last frame for a run reaching the end of the
+        recording (pauses are measured between frame times).
+    """
+    is_silent = np.asarray(is_silent, dtype=bool)
+    edges = np.diff(np.concatenate([[False], is_silent, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.minimum(np.flatnonzero(edges == -1), len(is_silent) - 1)
+    return starts, ends
+
+
+def find_pauses(is_silent: np.ndarray, times: np.ndarray, min_silence_duration: float) -> List[Dict[str, float]]:
+    """Silent runs lasting at least min_silence_duration seconds, as [{start, end, duration}]."""
+    starts, ends = silent_runs(is_silent)
+    durations = times[ends] - times[starts]
+    keep = durations >= min_silence_duration
+    return [
+        {"start": float(start), "end": float(end), "duration": float(duration)}
+        for start, end, duration in zip(times[starts[keep]], times[ends[keep]], durations[keep])
+    ]
+
+
+def pause_grid(rms_db: np.ndarray, times: np.ndarray, margins_db: Sequence[float] = GRID_MARGINS_DB,
+               min_durations: Sequence[float] = GRID_MIN_DURATIONS) -> List[Dict[str, float]]:
+    """
+    Pause statistics for every (silence margin, minimum duration) setting at once.
+
+    A frame is silent under a margin when it is quieter than the noise floor (the
+    NOISE_FLOOR_PERCENTILE of rms_db) plus that margin, as in detect_pauses_from_audio. All
+    margins are run-length encoded together in one [margins, frames] pass, and
+    the statistics for every minimum duration come from one weighted bincount
+    over the runs, so the cost hardly depends on the grid size.
+
+    Args:
+        rms_db: Frame energy in dB (spectral_features "rms_db")
+        times: Frame times in seconds
+        margins_db: dB above the noise floor below which a frame is silent
+        min_durations: Minimum pause durations in seconds
+
+    Returns:
+        One dict per setting, margins outer and durations inner, with
+        silence_margin_db, min_silence_duration and the statistics
+        detect_pauses_from_audio reports (without pause_locations).
+    """
+    margins = np.asarray(margins_db, dtype=np.float64)
+    min_durs = np.asarray(min_durations, dtype=np.float64)
+    n_settings = len(margins) * len(min_durs)
+    n_frames = len(rms_db)
+
+    counts = np.zeros(n_settings)
+    totals = np.zeros(n_settings)
+    squares = np.zeros(n_settings)
+    longest = np.zeros(n_settings)
+    long_counts = np.zeros(n_settings)
+
+    if n_frames:
+        noise_floor = np.percentile(rms_db, NOISE_FLOOR_PERCENTILE)
+        silent = rms_db[np.newaxis, :] < (noise_floor + margins)[:, np.newaxis]
+
+        # Run edges of every margin's mask: +1 where a run starts, -1 after it ends
+        padded = np.zeros((len(margins), n_frames + 2), dtype=np.int8)
+        padded[:, 1:-1] = silent
+        edges = np.diff(padded, axis=1)
+        margin_idx, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        ends = np.minimum(ends, n_frames - 1)
+        durations = times[ends] - times[starts]
+
+        # [min_durations, runs] membership, flattened into setting indices
+        keep = durations[np.newaxis, :] >= min_durs[:, np.newaxis]
+        setting = (margin_idx[np.newaxis, :] * len(min_durs) + np.arange(len(min_durs))[:, np.newaxis])[keep]
+        kept = np.broadcast_to(durations, keep.shape)[keep]
+
+        counts = np.bincount(setting, minlength=n_settings).astype(np.float64)
+        totals = np.bincount(setting, weights=kept, minlength=n_settings)
+        squares = np.bincount(setting, weights=kept ** 2, minlength=n_settings)
+        long_counts = np.bincount(setting, weights=kept > LONG_PAUSE_SEC, minlength=n_settings)
+        np.maximum.at(longest, setting, kept)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, totals / counts, 0.0)
+        variability = np.where(counts > 1, np.sqrt(np.maximum(squares / counts - means ** 2, 0.0)), 0.0)
+
+    results = []
+    for i in range(n_settings):
+        results.append({
+            "silence_margin_db": float(margins[i // len(min_durs)]),
+            "min_silence_duration": float(min_durs[i % len(min_durs)]),
+            "avg_pause_duration": float(means[i]),
+            "max_pause": float(longest[i]),
+            "long_pause_count": int(long_counts[i]),
+            "pause_count": int(counts[i]),
+            "pause_variability": float(variability[i]),
+            "total_pause_time": float(totals[i]),
+        })
+    return results
+
+
+@stage("pause_grid")
+def detect_pause_grid(audio: Union[AudioBuffer, str], margins_db: Sequence[float] = GRID_MARGINS_DB,
+                      min_durations: Sequence[float] = GRID_MIN_DURATIONS) -> List[Dict[str, float]]:
+    """
+    pause_grid for a recording: it is decoded and its frame energy computed once
+    for the whole grid (e.g. to calibrate the thresholds over stored recordings).
+    """
+    if isinstance(audio, str):
+        audio = AudioBuffer.from_file(audio)
+    features = audio.features.compute("rms_db", "frame_times")
+    return pause_grid(features["rms_db"], features["frame_times"], margins_db, min_durations)
+
+
+@stage("pause_detection")
+def detect_pauses_from_audio(audio: Union[AudioBuffer, str], min_silence_duration: float = 0.3) -> Dict[str, Any]:
     """
     Detect pauses by analyzing the audio waveform directly.
 
     Args:
-        audio_path: Path to audio file
+        audio: Decoded recording (or a path to decode)
         min_silence_duration: Minimum duration (seconds) to consider as a pause
 
     Returns:
@@ -19,72 +146,40 @@ def detect_pauses_from_audio(audio_path: str, min_silence_duration: float = 0.3)
     """
     print(f"\n{'='*70}")
     print(f"🎵 AUDIO-BASED PAUSE DETECTION STARTING...")
-    print(f"   Audio file: {audio_path}")
     print(f"   Min silence duration: {min_silence_duration}s")
     print(f"{'='*70}")
 
     try:
-        # Load audio
-        print("   Loading audio...")
-        y, sr = librosa.load(audio_path, sr=None)
-        print(f"   ✅ Audio loaded: {len(y)} samples at {sr}Hz ({len(y)/sr:.2f}s)")
-
-        # Calculate RMS energy (volume) over time
-        frame_length = int(sr * 0.025)  # 25ms frames
-        hop_length = int(sr * 0.010)    # 10ms hop
-
+        if isinstance(audio, str):
+            print(f"   Loading audio file: {audio}")
+            audio = AudioBuffer.from_file(audio)
+        y, sr = audio.samples, audio.sr
+        print(f"   ✅ Audio: {len(y)} samples at {sr}Hz ({len(y)/sr:.2f}s)")
+
+        # Frame energy and silence mask from the recording's shared STFT
+        # (25ms frames, 10ms hop; see spectral_features)
         print("   Calculating energy...")
-        rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+        features = audio.features.compute("rms_db", "noise_floor_db", "silence_mask", "frame_times")
+        rms_db = features["rms_db"]
 
-        # Convert to dB
-        rms_db = librosa.amplitude_to_db(rms, ref=np.max)
-
-        # ADAPTIVE threshold based on audio content
-        # Find the noise floor (10th percentile of energy)
-        noise_floor = np.percentile(rms_db, 10)
-        # Set threshold 10dB above noise floor
-        silence_threshold = noise_floor + 10
+        # ADAPTIVE threshold based on audio content: 10dB above the noise floor
+        # (10th percentile of energy)
+        noise_floor = features["noise_floor_db"]
+        silence_threshold = noise_floor + SILENCE_MARGIN_DB
 
         print(f"   Noise floor: {noise_floor:.1f}dB")
         print(f"   Adaptive silence threshold: {silence_threshold:.1f}dB")
         print(f"   Max energy: {np.max(rms_db):.1f}dB")
 
         # Find silent frames
-        is_silent = rms_db < silence_threshold
+        is_silent = features["silence_mask"]
         silent_frame_count = np.sum(is_silent)
         print(f"   Silent frames: {silent_frame_count}/{len(is_silent)} ({silent_frame_count/len(is_silent)*100:.1f}%)")
 
-        # Convert frame indices to time
-        times = librosa.frames_to_time(np.arange(len(is_silent)), sr=sr, hop_length=hop_length)
+        times = features["frame_times"]
 
         # Find continuous silent regions
-        pauses = []
-        pause_start = None
-
-        for i, (silent, time) in enumerate(zip(is_silent, times)):
-            if silent and pause_start is None:
-                # Start of pause
-                pause_start = time
-            elif not silent and pause_start is not None:
-                # End of pause
-                pause_duration = time - pause_start
-                if pause_duration >= min_silence_duration:
-                    pauses.append({
-                        'start': pause_start,
-                        'end': time,
-                        'duration': pause_duration
-                    })
-                pause_start = None
-
-        # Handle pause at end of audio
-        if pause_start is not None:
-            pause_duration = times[-1] - pause_start
-            if pause_duration >= min_silence_duration:
-                pauses.append({
-                    'start': pause_start,
-                    'end': times[-1],
-                    'duration': pause_duration
-                })
+        pauses = find_pauses(is_silent, times, min_silence_duration)
 
         if not pauses:
             return {
@@ -99,7 +194,7 @@ def detect_pauses_from_audio(audio_path: str, min_silence_duration: float = 0.3)
         pause_durations = [p['duration'] for p in pauses]
         avg_pause = np.mean(pause_durations)
         max_pause = np.max(pause_durations)
-        long_pause_count = len([p for p in pause_durations if p > 0.8])
+        long_pause_count = len([p for p in pause_durations if p > LONG_PAUSE_SEC])
         total_pause_time = sum(pause_durations)
 
         # Calculate pause variability
@@ -0,0 +1,123 @@
+"""
+Pluggable pitch (F0) tracking for the speech features.
+
+Backends (SPEECH_PITCH_BACKEND):
+    "yin"   vectorized YIN over the speech F0 range (default). Every frame's
+            difference function comes from one batched FFT cross-correlation, and
+            the period is picked by array ops, so a few seconds of audio take
+            milliseconds.
+    "pyin"  librosa.pyin from C2 to C7, as before: a probabilistic tracker with
+            Viterbi smoothing, much slower.
+
+Both return F0 per frame with NaN for unvoiced frames, so pitch_mean/pitch_std are
+computed the same way whichever backend runs (see benchmarks/pitch.py for
+speed and agreement).
+"""
+import os
+import numpy as np
+import librosa
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Callable, Dict
+
+from backend.app.services.speech.audio_buffer import AudioBuffer
+
+PITCH_BACKEND = os.getenv("SPEECH_PITCH_BACKEND", "yin")
+# Speaking F0 range, from low adult male to child voices
+SPEECH_FMIN_HZ = float(os.getenv("SPEECH_PITCH_FMIN_HZ", "60"))
+SPEECH_FMAX_HZ = float(os.getenv("SPEECH_PITCH_FMAX_HZ", "500"))
+PITCH_HOP_SEC = 0.010
+# Cumulative mean normalized difference below which a frame is periodic
+YIN_THRESHOLD = 0.15
+# Frames this far below the loudest frame's RMS are treated as silence
+YIN_SILENCE_DB = 40
+
+
+def yin(y: np.ndarray, sr: int, fmin: float = SPEECH_FMIN_HZ, fmax: float = SPEECH_FMAX_HZ,
+        hop_length: int = None, threshold: float = YIN_THRESHOLD) -> np.ndarray:
+    """
+    F0 per frame by YIN (de Cheveigné & Kawahara, 2002), vectorized over frames.
+
+    Each frame compares an integration window of one longest period with itself
+    shifted by every candidate lag; the lag is the first local minimum of the
+    cumulative mean normalized difference below threshold, refined by parabolic
+    interpolation.
+
+    Args:
+        y: Mono samples
+        sr: Sampling rate
+        hop_length: Samples between frames (default PITCH_HOP_SEC)
+
+    Returns:
+        f0 [n_frames] in Hz, NaN where the frame is unvoiced or silent.
+    """
+    hop_length = hop_length or max(1, int(round(sr * PITCH_HOP_SEC)))
+    tau_min = max(2, int(np.floor(sr / fmax)))
+    tau_max = int(np.ceil(sr / fmin))
+    window = tau_max
+    frame_length = window + tau_max + 1
+    if len(y) < frame_length:
+        return np.empty(0)
+
+    frames = sliding_window_view(np.asarray(y, dtype=np.float64), frame_length)[::hop_length]
+    n_frames = len(frames)
+
+    # r(tau) = sum_j x_j * x_{j + tau} over the integration window, for all lags at once
+    n_fft = 1 << int(np.ceil(np.log2(frame_length + window)))
+    spectrum = np.fft.rfft(frames, n_fft)
+    head = np.fft.rfft(frames[:, :window], n_fft)
+    r = np.fft.irfft(spectrum * head.conj(), n_fft)[:, :tau_max + 1]
+
+    # d(tau) = E(0) + E(tau) - 2 r(tau), with E(tau) the energy of the window shifted by tau
+    energy = np.concatenate([np.zeros((n_frames, 1)), np.cumsum(np.square(frames), axis=1)], axis=1)
+    shifted_energy = energy[:, window:window + tau_max + 1] - energy[:, :tau_max + 1]
+    diff = np.maximum(shifted_energy[:, :1] + shifted_energy - 2 * r, 0.0)
+
+    # Cumulative mean normalized difference, d'(0) = 1
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cmnd[:, 1:] = np.where(cumulative > 0, diff[:, 1:] * np.arange(1, tau_max + 1) / cumulative, 1.0)
+
+    # First local minimum below threshold within [tau_min, tau_max - 1]
+    lags = slice(tau_min, tau_max)
+    candidates = cmnd[:, lags]
+    is_min = (candidates <= cmnd[:, tau_min + 1:tau_max + 1]) & (candidates < threshold)
+    voiced = is_min.any(axis=1)
+    tau = np.argmax(is_min, axis=1) + tau_min
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(n_frames)
+    left, mid, right = cmnd[rows, tau - 1], cmnd[rows, tau], cmnd[rows, tau + 1]
+    curvature = left - 2 * mid + right
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(curvature > 0, 0.5 * (left - right) / curvature, 0.0)
+    period = tau + np.clip(shift, -1, 1)
+
+    # Silent frames can look periodic (e.g. hum), so gate on level too
+    rms = np.sqrt(shifted_energy[:, 0] / window)
+    loud = rms > rms.max() * 10 ** (-YIN_SILENCE_DB / 20)
+
+    return np.where(voiced & loud, sr / period, np.nan)
+
+
+def _yin_backend(audio: AudioBuffer) -> np.ndarray:
+    return yin(audio.samples, audio.sr)
+
+
+def _pyin_backend(audio: AudioBuffer) -> np.ndarray:
+    f0, _, _ = librosa.pyin(audio.samples, sr=audio.sr, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
+    return f0
+
+
+PITCH_BACKENDS: Dict[str, Callable[[AudioBuffer], np.ndarray]] = {
+    "yin": _yin_backend,
+    "pyin": _pyin_backend,
+}
+
+if PITCH_BACKEND not in PITCH_BACKENDS:
+    raise ValueError(f"SPEECH_PITCH_BACKEND must be one of {tuple(PITCH_BACKENDS)}, got {PITCH_BACKEND!r}")
+
+
+def estimate_pitch(audio: AudioBuffer, backend: str = PITCH_BACKEND) -> np.ndarray:
+    """F0 per frame in Hz (NaN when unvoiced) from the configured backend."""
+    return PITCH_BACKENDS[backend](audio)
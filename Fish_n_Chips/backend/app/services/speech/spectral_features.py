@@ -0,0 +1,218 @@
+"""
+Feature graph over one magnitude STFT per recording.
+
+Every frame-level speech feature (RMS energy, mel spectrogram, MFCCs, spectral
+stats, the silence mask used for pause detection) is derived from the same
+25 ms / 10 ms Hann STFT of an AudioBuffer instead of each stage framing the signal
+on its own. Features declare what they are computed from:
+
+    @_feature("mfcc", "mel_db")
+    def _mfcc(audio, mel_db): ...
+
+and SpectralFeatures evaluates a requested feature and only its dependencies,
+once per recording:
+
+    audio.features.get("silence_mask")      # magnitude -> power -> rms -> rms_db -> ...
+    audio.features.compute("rms", "mfcc")   # reuses power from above
+
+Mel filterbanks are cached per (sr, n_fft, n_mels).
+"""
+import functools
+import numpy as np
+import librosa
+from scipy.signal import get_window
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from backend.app.services.speech.audio_buffer import AudioBuffer
+
+# Analysis framing shared by every feature
+FEATURE_WINDOW_SEC = 0.025
+FEATURE_HOP_SEC = 0.010
+N_MELS = 40
+N_MFCC = 13
+# Silence: frames below the NOISE_FLOOR_PERCENTILE-th percentile of frame energy
+# plus SILENCE_MARGIN_DB
+NOISE_FLOOR_PERCENTILE = 10
+SILENCE_MARGIN_DB = 10
+SPECTRAL_ROLLOFF_PERCENT = 0.85
+
+
+def stft_params(sr: int) -> Tuple[int, int, int]:
+    """(n_fft, hop_length, win_length) of the feature framing at sr; n_fft is the next power of two."""
+    win_length = int(sr * FEATURE_WINDOW_SEC)
+    hop_length = int(sr * FEATURE_HOP_SEC)
+    n_fft = 1 << int(np.ceil(np.log2(win_length)))
+    return n_fft, hop_length, win_length
+
+
+@functools.lru_cache(maxsize=16)
+def mel_filterbank(sr: int, n_fft: int, n_mels: int = N_MELS) -> np.ndarray:
+    """librosa mel filterbank [n_mels, 1 + n_fft // 2], built once per parameters (read-only)."""
+    basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+    basis.setflags(write=False)
+    return basis
+
+
+@functools.lru_cache(maxsize=16)
+def _window_energy(win_length: int) -> float:
+    return float(np.sum(np.square(get_window("hann", win_length, fftbins=True))))
+
+
+# name -> (dependencies, compute(audio, *dependency values))
+FEATURES: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {}
+
+
+def _feature(name: str, *requires: str):
+    def register(func):
+        FEATURES[name] = (requires, func)
+        return func
+    return register
+
+
+@_feature("magnitude")
+def _magnitude(audio):
+    n_fft, hop_length, win_length = stft_params(audio.sr)
+    return audio.magnitude(n_fft, hop_length, win_length)
+
+
+@_feature("power", "magnitude")
+def _power(audio, magnitude):
+    return np.square(magnitude)
+
+
+@_feature("frame_times", "magnitude")
+def _frame_times(audio, magnitude):
+    """Centre time (s) of each frame."""
+    _, hop_length, _ = stft_params(audio.sr)
+    return librosa.frames_to_time(np.arange(magnitude.shape[1]), sr=audio.sr, hop_length=hop_length)
+
+
+def rms_from_power(power: np.ndarray, sr: int) -> np.ndarray:
+    """
+    Frame RMS of a power spectrogram in the feature framing, by Parseval, normalized
+    by the window's energy so that a stationary signal has the same level as its
+    time-domain RMS.
+    """
+    n_fft, _, win_length = stft_params(sr)
+    # One-sided spectrum: every bin but DC (and Nyquist) stands for two
+    weights = np.full(power.shape[0], 2.0)
+    weights[0] = 1.0
+    if n_fft % 2 == 0:
+        weights[-1] = 1.0
+    frame_energy = weights @ power / n_fft
+    return np.sqrt(frame_energy / _window_energy(win_length))
+
+
+@_feature("rms", "power")
+def _rms(audio, power):
+    return rms_from_power(power, audio.sr)
+
+
+@_feature("rms_db", "rms")
+def _rms_db(audio, rms):
+    """RMS in dB relative to the loudest frame."""
+    return librosa.amplitude_to_db(rms, ref=np.max)
+
+
+@_feature("noise_floor_db", "rms_db")
+def _noise_floor_db(audio, rms_db):
+    return float(np.percentile(rms_db, NOISE_FLOOR_PERCENTILE)) if len(rms_db) else 0.0
+
+
+@_feature("silence_mask", "rms_db", "noise_floor_db")
+def _silence_mask(audio, rms_db, noise_floor_db):
+    """True for frames quieter than the adaptive threshold (noise floor + SILENCE_MARGIN_DB)."""
+    return rms_db < noise_floor_db + SILENCE_MARGIN_DB
+
+
+@_feature("mel", "power")
+def _mel(audio, power):
+    n_fft, _, _ = stft_params(audio.sr)
+    return mel_filterbank(audio.sr, n_fft) @ power
+
+
+@_feature("mel_db", "mel")
+def _mel_db(audio, mel):
+    return librosa.power_to_db(mel)
+
+
+@_feature("mfcc", "mel_db")
+def _mfcc(audio, mel_db):
+    return librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC)
+
+
+@_feature("spectral_centroid", "magnitude")
+def _spectral_centroid(audio, magnitude):
+    n_fft, _, _ = stft_params(audio.sr)
+    return librosa.feature.spectral_centroid(S=magnitude, sr=audio.sr, n_fft=n_fft)[0]
+
+
+@_feature("spectral_bandwidth", "magnitude", "spectral_centroid")
+def _spectral_bandwidth(audio, magnitude, spectral_centroid):
+    n_fft, _, _ = stft_params(audio.sr)
+    return librosa.feature.spectral_bandwidth(S=magnitude, sr=audio.sr, n_fft=n_fft,
+                                              centroid=spectral_centroid[np.newaxis])[0]
+
+
+@_feature("spectral_rolloff", "magnitude")
+def _spectral_rolloff(audio, magnitude):
+    n_fft, _, _ = stft_params(audio.sr)
+    return librosa.feature.spectral_rolloff(S=magnitude, sr=audio.sr, n_fft=n_fft,
+                                            roll_percent=SPECTRAL_ROLLOFF_PERCENT)[0]
+
+
+@_feature("spectral_flatness", "power")
+def _spectral_flatness(audio, power):
+    return librosa.feature.spectral_flatness(S=power, power=1.0)[0]
+
+
+def feature_dependencies(name: str) -> List[str]:
+    """Everything name is computed from, in evaluation order (name last)."""
+    order: List[str] = []
+
+    def visit(node: str):
+        if node not in FEATURES:
+            raise KeyError(f"Unknown spectral feature {node!r}; available: {sorted(FEATURES)}")
+        for dep in FEATURES[node][0]:
+            if dep not in order:
+                visit(dep)
+        order.append(node)
+
+    visit(name)
+    return order
+
+
+class SpectralFeatures:
+    """
+    Lazily evaluated features of one recording. Each feature is computed at most
+    once, on first request, together with whatever it depends on.
+    """
+
+    def __init__(self, audio: "AudioBuffer"):
+        self.audio = audio
+        self._values: Dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        if name not in FEATURES:
+            raise KeyError(f"Unknown spectral feature {name!r}; available: {sorted(FEATURES)}")
+        # Only the dependencies not available yet are computed (a set() feature stops the walk)
+        requires, compute = FEATURES[name]
+        value = self._values[name] = compute(self.audio, *(self.get(dep) for dep in requires))
+        return value
+
+    def set(self, name: str, value: Any):
+        """Provide a feature computed elsewhere (e.g. frame by frame while streaming) instead of computing it."""
+        if name not in FEATURES:
+            raise KeyError(f"Unknown spectral feature {name!r}; available: {sorted(FEATURES)}")
+        self._values[name] = value
+
+    def compute(self, *names: str) -> Dict[str, Any]:
+        """{name: value} for the requested features."""
+        return {name: self.get(name) for name in names}
+
+    def computed(self) -> List[str]:
+        """Features evaluated so far."""
+        return list(self._values)
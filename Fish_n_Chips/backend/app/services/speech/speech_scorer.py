@@ -7,11 +7,15 @@ import numpy as np
 from typing import Dict, Any, List
 import os
 
+from backend.app.metrics import stage
+from backend.app.utils.tree_ensemble import load_tree_model
+
 # Load the trained model
 MODEL_PATH = "models/speech_ml_model.joblib"
 
 try:
-    ml_model = joblib.load(MODEL_PATH)
+    # Compiled array evaluator unless TREE_MODEL_BACKEND=sklearn
+    ml_model = load_tree_model(joblib.load(MODEL_PATH))
     print(f"✅ Loaded IMPROVED ML model from {MODEL_PATH}")
     print(f"   Model now emphasizes PAUSE PATTERNS!")
 except FileNotFoundError:
@@ -90,9 +94,10 @@ def calculate_ml_risk_score(
         pause_features['hesitation_count']
     ]])
 
-    # Get prediction and probability
-    prediction = ml_model.predict(features)[0]
-    probability = ml_model.predict_proba(features)[0]
+    # Get probability; the prediction is its argmax, as predict() would return
+    with stage("speech_predict_proba"):
+        probability = ml_model.predict_proba(features)[0]
+    prediction = ml_model.classes_[np.argmax(probability)]
 
     # Risk probability (probability of cognitive decline)
     risk_probability = probability[1]
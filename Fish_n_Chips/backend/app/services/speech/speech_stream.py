@@ -0,0 +1,184 @@
+"""
+Incremental analysis of a recording that arrives in chunks while the user speaks.
+
+SpeechStream takes raw PCM chunks (16-bit or float32 mono) and, as each arrives:
+- runs webrtcvad over the new frames (SpeechStartDetector) until speech starts,
+  which gives the reaction time
+- computes the STFT frames that are now complete, in the same 25 ms / 10 ms
+  framing as spectral_features, and their RMS, so the silence at the end of the
+  stream is known live
+
+finish() returns the recording as an AudioBuffer at SPEECH_SAMPLE_RATE, like
+AudioBuffer.from_bytes does for uploads. Streamed at that rate (the default), its
+feature graph already holds the magnitude STFT and RMS, so pause detection and
+the acoustic features only do the cheap derivations (mel/MFCC, silence mask,
+pitch) and the pipeline left after the last chunk is essentially transcription
+and scoring. Other rates are resampled at the end, and their STFT is recomputed
+at SPEECH_SAMPLE_RATE; VAD and the live silence tracking use the native rate.
+
+Encoded chunks (e.g. MediaRecorder's WebM/Opus) are not independently decodable
+without running ffmpeg per chunk, so the stream takes PCM; browsers get it from
+an AudioWorklet.
+"""
+import io
+import os
+import numpy as np
+import librosa
+import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Any, Dict, List, Optional
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.spectral_features import (
+    NOISE_FLOOR_PERCENTILE, SILENCE_MARGIN_DB, rms_from_power, stft_params
+)
+from backend.app.services.speech.vad_service import SpeechStartDetector
+from backend.app.utils.audio_utils import resample_audio
+
+# Rates webrtcvad accepts
+STREAM_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+STREAM_ENCODINGS = {"pcm16": np.dtype("<i2"), "float32": np.dtype("<f4")}
+# Longest stream accepted, to bound per-connection memory
+STREAM_MAX_SEC = float(os.getenv("SPEECH_STREAM_MAX_SEC", "60"))
+
+
+class SpeechStream:
+    """
+    One streamed recording. push() every chunk, then finish() once.
+
+    Raises:
+        ValueError: unsupported rate/encoding, a chunk that is not whole samples,
+            or a stream longer than STREAM_MAX_SEC.
+    """
+
+    def __init__(self, sample_rate: int = SPEECH_SAMPLE_RATE, encoding: str = "pcm16"):
+        if sample_rate not in STREAM_SAMPLE_RATES:
+            raise ValueError(f"sample_rate must be one of {STREAM_SAMPLE_RATES}, got {sample_rate}")
+        if encoding not in STREAM_ENCODINGS:
+            raise ValueError(f"encoding must be one of {tuple(STREAM_ENCODINGS)}, got {encoding!r}")
+
+        self.sr = sample_rate
+        self.encoding = encoding
+        self.vad = SpeechStartDetector(sample_rate)
+        self.n_fft, self.hop_length, win_length = stft_params(sample_rate)
+        # librosa.stft's window: periodic Hann of win_length, centered in n_fft
+        self._window = librosa.util.pad_center(
+            librosa.filters.get_window("hann", win_length, fftbins=True), size=self.n_fft
+        ).astype(np.float32)
+
+        self._chunks: List[np.ndarray] = []
+        # Samples received
+        self.total = 0
+        # Signal not yet consumed by frames, as librosa.stft(center=True) pads it:
+        # n_fft // 2 zeros ahead of the first sample. _buffer[0] is padded index _buffer_start.
+        self._buffer = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._buffer_start = 0
+        self._magnitude: List[np.ndarray] = []
+        self._rms: List[np.ndarray] = []
+        self.n_frames = 0
+        self.finished = False
+
+    @property
+    def duration(self) -> float:
+        return self.total / self.sr
+
+    @property
+    def speech_start_ms(self) -> Optional[float]:
+        return self.vad.speech_start_ms
+
+    def push(self, chunk: bytes):
+        """Add a chunk of samples and analyze the frames it completes."""
+        if self.finished:
+            raise ValueError("Stream already finished")
+        dtype = STREAM_ENCODINGS[self.encoding]
+        if len(chunk) % dtype.itemsize:
+            raise ValueError(f"Chunk of {len(chunk)} bytes is not a whole number of {self.encoding} samples")
+        if (self.total + len(chunk) // dtype.itemsize) / self.sr > STREAM_MAX_SEC:
+            raise ValueError(f"Stream is longer than {STREAM_MAX_SEC:g}s")
+
+        raw = np.frombuffer(chunk, dtype=dtype)
+        if self.encoding == "pcm16":
+            samples = raw.astype(np.float32) / 32768.0
+            pcm = chunk
+        else:
+            samples = raw.astype(np.float32)
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+        self._chunks.append(samples)
+        self.total += len(samples)
+        if self.vad.speech_start_ms is None:
+            self.vad.push(pcm)
+        self._analyze(samples)
+
+    def _analyze(self, samples: np.ndarray, final: bool = False):
+        """STFT magnitude and RMS of every frame that samples complete."""
+        self._buffer = np.concatenate([self._buffer, samples])
+        if final:
+            # librosa.stft(center=True) has 1 + len // hop frames
+            n_ready = 1 + self.total // self.hop_length - self.n_frames
+        else:
+            end = self._buffer_start + len(self._buffer)
+            n_ready = max(0, (end - self.n_fft) // self.hop_length + 1 - self.n_frames)
+        if n_ready <= 0:
+            return
+
+        offset = self.n_frames * self.hop_length - self._buffer_start
+        frames = sliding_window_view(self._buffer[offset:], self.n_fft)[::self.hop_length][:n_ready]
+        magnitude = np.abs(np.fft.rfft(frames * self._window, axis=1)).T.astype(np.float32)
+        self._magnitude.append(magnitude)
+        self._rms.append(rms_from_power(np.square(magnitude), self.sr))
+        self.n_frames += n_ready
+
+        # Keep only what the next frame needs
+        consumed = self.n_frames * self.hop_length - self._buffer_start
+        self._buffer = self._buffer[consumed:]
+        self._buffer_start += consumed
+
+    def trailing_silence_sec(self) -> float:
+        """
+        Length of the silence at the end of the stream so far, by the pause
+        detector's adaptive threshold over the frames received.
+        """
+        if not self._rms:
+            return 0.0
+        rms = np.concatenate(self._rms)
+        self._rms = [rms]
+        rms_db = librosa.amplitude_to_db(rms, ref=np.max)
+        loud = np.flatnonzero(rms_db >= np.percentile(rms_db, NOISE_FLOOR_PERCENTILE) + SILENCE_MARGIN_DB)
+        silent_frames = len(rms) - (loud[-1] + 1 if len(loud) else 0)
+        return float(silent_frames * self.hop_length / self.sr)
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "received_sec": self.duration,
+            "speech_start_ms": self.speech_start_ms,
+            "trailing_silence_sec": self.trailing_silence_sec(),
+        }
+
+    def finish(self, filename: str = "stream.wav") -> AudioBuffer:
+        """
+        End the stream: analyze the last frames and return the recording at
+        SPEECH_SAMPLE_RATE. At that rate its feature graph is seeded with the
+        streamed STFT magnitude and RMS. Its encoded data is a 16-bit WAV for
+        services that upload the file (Whisper).
+        """
+        if self.finished:
+            raise ValueError("Stream already finished")
+        self.finished = True
+        # Zero padding after the last sample, as librosa.stft(center=True)
+        self._analyze(np.zeros(self.n_fft // 2, dtype=np.float32), final=True)
+
+        samples = np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.float32)
+        native = self.sr == SPEECH_SAMPLE_RATE
+        if not native:
+            samples = resample_audio(samples, self.sr, SPEECH_SAMPLE_RATE)
+        wav = io.BytesIO()
+        sf.write(wav, samples, SPEECH_SAMPLE_RATE, format="WAV", subtype="PCM_16")
+
+        audio = AudioBuffer(samples, SPEECH_SAMPLE_RATE, wav.getvalue(), filename)
+        # Frames streamed at another rate do not match the resampled samples; the graph recomputes them
+        if native:
+            audio.features.set("magnitude", np.concatenate(self._magnitude, axis=1))
+            audio.features.set("rms", np.concatenate(self._rms))
+        self._chunks, self._magnitude, self._rms = [], [], []
+        return audio
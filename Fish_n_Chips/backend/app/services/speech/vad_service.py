@@ -1,22 +1,62 @@
 import webrtcvad
 import numpy as np
+from typing import Optional, Union
 
-def detect_speech_start(audio_bytes: bytes, sample_rate: int = 16000) -> float:
+from backend.app.metrics import stage
+from backend.app.services.speech.audio_buffer import AudioBuffer
+
+VAD_AGGRESSIVENESS = 3 # Aggressiveness mode 3 (high)
+# Frame duration in ms (10, 20, or 30ms supported by webrtcvad)
+VAD_FRAME_MS = 30
+
+
+class SpeechStartDetector:
     """
-    Detect the start time of speech in milliseconds using WebRTC VAD.
-    Assumes audio is 16-bit mono PCM.
+    detect_speech_start over PCM that arrives in pieces: push 16-bit mono PCM as
+    it comes in and speech_start_ms is set at the first speech frame. Frames are
+    classified once, so a whole recording costs the same as the one-shot call.
     """
-    vad = webrtcvad.Vad(3) # Aggressiveness mode 3 (high)
 
-    # Frame duration in ms (10, 20, or 30ms supported by webrtcvad)
-    frame_duration_ms = 30
-    frame_size = int(sample_rate * frame_duration_ms / 1000) * 2 # 2 bytes per sample
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        self.frame_size = int(sample_rate * VAD_FRAME_MS / 1000) * 2 # 2 bytes per sample
+        self.speech_start_ms: Optional[float] = None
+        self._pending = bytearray()
+        # Bytes of PCM classified so far
+        self._offset = 0
+
+    def push(self, pcm: bytes) -> Optional[float]:
+        """Classify the complete frames now available; returns speech_start_ms (None until speech is found)."""
+        if self.speech_start_ms is not None:
+            return self.speech_start_ms
+
+        self._pending += pcm
+        position = 0
+        while position + self.frame_size < len(self._pending):
+            frame = bytes(self._pending[position:position + self.frame_size])
+            if self.vad.is_speech(frame, self.sample_rate):
+                self.speech_start_ms = (self._offset / 2 / self.sample_rate) * 1000 # Convert bytes offset to ms
+                self._pending.clear()
+                return self.speech_start_ms
+            position += self.frame_size
+            self._offset += self.frame_size
 
-    offset = 0
-    while offset + frame_size < len(audio_bytes):
-        frame = audio_bytes[offset:offset + frame_size]
-        if vad.is_speech(frame, sample_rate):
-            return (offset / 2 / sample_rate) * 1000 # Convert bytes offset to ms
-        offset += frame_size
+        del self._pending[:position]
+        return None
+
+
+@stage("vad")
+def detect_speech_start(audio: Union[AudioBuffer, bytes], sample_rate: int = 16000) -> float:
+    """
+    Detect the start time of speech in milliseconds using WebRTC VAD.
+    Raw bytes are assumed to be 16-bit mono PCM at sample_rate; an AudioBuffer
+    brings its own PCM and rate (8, 16, 32 or 48 kHz).
+    """
+    if isinstance(audio, AudioBuffer):
+        audio_bytes, sample_rate = audio.pcm16(), audio.sr
+    else:
+        audio_bytes = audio
 
-    return -1.0 # No speech detected
+    speech_start_ms = SpeechStartDetector(sample_rate).push(audio_bytes)
+    return speech_start_ms if speech_start_ms is not None else -1.0 # -1: No speech detected
@@ -1,6 +1,10 @@
 import os
 from openai import OpenAI
 import io
+from typing import Union
+
+from backend.app.metrics import stage
+from backend.app.services.speech.audio_buffer import AudioBuffer
 
 # Initialize OpenAI client
 # Ensure OPENAI_API_KEY is set in environment
@@ -11,9 +15,21 @@ else:
     print("Warning: OPENAI_API_KEY not found. Whisper service will use dummy data.")
     client = None
 
-def transcribe_with_timestamps(audio_file_path: str):
+def _create_transcription(file):
+    return client.audio.transcriptions.create(
+        model="whisper-1",
+        file=file,
+        response_format="verbose_json",
+        timestamp_granularities=["word"]
+    )
+
+@stage("whisper_transcribe")
+def transcribe_with_timestamps(audio: Union[AudioBuffer, str]):
     """
-    Transcribe audio file using OpenAI Whisper API and return text with word timestamps.
+    Transcribe audio using OpenAI Whisper API and return text with word timestamps.
+
+    Args:
+        audio: Recording whose encoded bytes are uploaded as-is (or a path to upload)
     """
     if not client:
         return {
@@ -25,13 +41,12 @@ def transcribe_with_timestamps(audio_file_path: str):
         }
 
     try:
-        with open(audio_file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["word"]
-            )
+        if isinstance(audio, AudioBuffer):
+            # (filename, bytes): the API needs the name for the format, not a temp file
+            transcript = _create_transcription((audio.filename, audio.data))
+        else:
+            with open(audio, "rb") as audio_file:
+                transcript = _create_transcription(audio_file)
 
         return {
             "text": transcript.text,
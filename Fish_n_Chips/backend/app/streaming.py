@@ -0,0 +1,139 @@
+"""
+Helpers shared by the EEG WebSocket endpoints.
+
+Feature extraction runs on a small bounded thread pool so the event loop only
+does I/O (scoring goes through the micro-batching InferenceScheduler), and raw
+samples go out as compact binary frames (float32 or int16-quantized),
+optionally min/max-decimated to the client's pixel width.
+"""
+import asyncio
+import os
+import struct
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Feature-extraction threads shared by all WebSocket clients
+STREAM_INFERENCE_THREADS = int(os.getenv("EEG_STREAM_INFERENCE_THREADS", "2"))
+# Jobs allowed to be queued or running at once; further clients wait their turn
+STREAM_MAX_PENDING = int(os.getenv("EEG_STREAM_MAX_PENDING", str(4 * STREAM_INFERENCE_THREADS)))
+
+# Binary frame: dtype code, reserved, n_channels, n_rows, scale; then [rows, channels] little-endian
+FRAME_HEADER = struct.Struct("<BBHIf")
+FRAME_DTYPES = {"float32": (1, np.dtype("<f4")), "int16": (2, np.dtype("<i2"))}
+
+_executor = ThreadPoolExecutor(max_workers=STREAM_INFERENCE_THREADS, thread_name_prefix="eeg-stream")
+_slots: Optional[asyncio.Semaphore] = None
+# Jobs waiting for a slot or running
+_waiting = 0
+
+
+def pending_jobs() -> int:
+    """Jobs queued for or running on the streaming pool."""
+    return _waiting
+
+
+async def run_bounded(func, *args):
+    """Run func on the streaming pool, with at most STREAM_MAX_PENDING jobs in flight."""
+    global _slots, _waiting
+    if _slots is None:
+        _slots = asyncio.Semaphore(STREAM_MAX_PENDING)
+
+    _waiting += 1
+    try:
+        async with _slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _waiting -= 1
+
+
+def minmax_decimate(data: np.ndarray, px: int) -> np.ndarray:
+    """
+    Reduce [samples, channels] to [2 * px, channels] rows of interleaved (min, max)
+    per pixel bucket, which keeps every peak visible when plotted.
+    Data that already fits in px columns is returned unchanged.
+    """
+    n_samples = len(data)
+    if px <= 0 or n_samples <= 2 * px:
+        return data
+
+    edges = (np.arange(px) * n_samples) // px
+    out = np.empty((2 * px, data.shape[1]), dtype=data.dtype)
+    out[0::2] = np.minimum.reduceat(data, edges, axis=0)
+    out[1::2] = np.maximum.reduceat(data, edges, axis=0)
+    return out
+
+
+def encode_frame(data: np.ndarray, encoding: str = "float32") -> bytes:
+    """
+    Pack [rows, channels] samples into a binary WebSocket frame.
+
+    int16 frames are quantized with a per-frame scale: value = int16 * scale.
+    """
+    code, dtype = FRAME_DTYPES[encoding]
+    n_rows, n_channels = data.shape
+
+    if encoding == "int16":
+        peak = float(np.max(np.abs(data))) if data.size else 0.0
+        scale = peak / 32767 if peak > 0 else 1.0
+        payload = np.clip(np.round(data / scale), -32767, 32767).astype(dtype)
+    else:
+        scale = 1.0
+        payload = data.astype(dtype, copy=False)
+
+    return FRAME_HEADER.pack(code, 0, n_channels, n_rows, scale) + payload.tobytes()
+
+
+def decode_frame(frame: bytes) -> np.ndarray:
+    """
+    Unpack a binary frame produced by encode_frame into float32 [rows, channels].
+    """
+    if len(frame) < FRAME_HEADER.size:
+        raise ValueError("Frame is shorter than its header")
+
+    code, _, n_channels, n_rows, scale = FRAME_HEADER.unpack_from(frame)
+    dtypes = {c: dt for c, dt in FRAME_DTYPES.values()}
+    if code not in dtypes:
+        raise ValueError(f"Unknown frame dtype code: {code}")
+
+    dtype = dtypes[code]
+    if len(frame) != FRAME_HEADER.size + n_rows * n_channels * dtype.itemsize:
+        raise ValueError(f"Frame payload does not match {n_rows}x{n_channels} samples")
+
+    data = np.frombuffer(frame, dtype=dtype, offset=FRAME_HEADER.size).reshape(n_rows, n_channels)
+    if dtype.kind == "i":
+        return data.astype(np.float32) * np.float32(scale)
+    return data
+
+
+class EEGRingBuffer:
+    """
+    Fixed-size ring buffer of the most recent [capacity, channels] samples.
+    Writes never allocate; older samples are overwritten.
+    """
+
+    def __init__(self, capacity: int, n_channels: int = 16):
+        self.capacity = capacity
+        self.n_channels = n_channels
+        self._data = np.zeros((capacity, n_channels), dtype=np.float32)
+        self._pos = 0
+        # Samples written since the start of the stream
+        self.total = 0
+
+    def write(self, samples: np.ndarray):
+        self.total += len(samples)
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        first = min(n, self.capacity - self._pos)
+        self._data[self._pos:self._pos + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self._pos = (self._pos + n) % self.capacity
+
+    def latest(self, n: int) -> np.ndarray:
+        """Copy of the last n samples, oldest first."""
+        n = min(n, self.capacity, self.total)
+        start = (self._pos - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].copy()
+        return np.concatenate([self._data[start:], self._data[:self._pos]])
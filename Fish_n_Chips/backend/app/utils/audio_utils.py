@@ -43,12 +43,12 @@ def split_audio_channels(audio: np.ndarray) -> np.ndarray:
 
 def load_audio_from_bytes(audio_bytes: bytes, target_sr=16000):
     """
-    Load audio from bytes into numpy array.
+    Load audio from bytes into a mono float32 numpy array at target_sr.
     """
     # Use soundfile or librosa
     # soundfile requires a file-like object
     try:
-        data, samplerate = sf.read(io.BytesIO(audio_bytes))
+        data, samplerate = sf.read(io.BytesIO(audio_bytes), dtype="float32")
 
         # Convert to mono if needed
         if len(data.shape) > 1:
@@ -63,7 +63,7 @@ def load_audio_from_bytes(audio_bytes: bytes, target_sr=16000):
         # Fallback to pydub if soundfile fails (e.g. for some formats)
         try:
             audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
-            audio = audio.set_frame_rate(target_sr).set_channels(1)
+            audio = audio.set_frame_rate(target_sr).set_channels(1).set_sample_width(2)
             return np.array(audio.get_array_of_samples()).astype(np.float32) / 32768.0, target_sr
         except Exception as e2:
             raise ValueError(f"Failed to load audio: {e} | {e2}")
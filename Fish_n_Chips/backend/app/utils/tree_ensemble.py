@@ -0,0 +1,169 @@
+"""
+Array-compiled evaluator for fitted scikit-learn tree ensembles.
+
+A forest is flattened into contiguous NumPy arrays (feature, threshold, left, right,
+leaf probabilities) and evaluated for a whole batch and all trees at once, one tree
+level per step. This removes scikit-learn's per-call Python and thread-pool overhead,
+which dominates single-row latency for our models.
+"""
+import os
+import numpy as np
+from typing import Tuple
+
+# "compiled" (default) or "sklearn"
+TREE_MODEL_BACKEND = os.getenv("TREE_MODEL_BACKEND", "compiled")
+# Bump when CompiledForest's arrays change, so stored compiled models are rebuilt
+COMPILED_FORMAT_VERSION = 2
+
+
+class CompiledForest:
+    """
+    Drop-in replacement for a fitted forest classifier's predict/predict_proba.
+
+    Leaves point to themselves, so every sample can take exactly max_depth steps
+    without branching on whether it already reached a leaf.
+
+    NaN features are routed as scikit-learn does: to the left child where the
+    tree's missing_go_to_left is set (the child that saw the missing values in
+    training, or the larger one), to the right otherwise.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 missing_left: np.ndarray, leaf_value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 classes: np.ndarray, n_features_in: int, feature_importances: np.ndarray):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.feature_importances_ = feature_importances
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index (into the flattened arrays) reached in each tree: [n_samples, n_trees]."""
+        # Trees split on float32 features, like scikit-learn; widening to float64
+        # afterwards is exact and keeps the threshold comparisons cast-free
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+
+        # "x > threshold" is False for NaN, so NaN only needs handling when present
+        has_nan = np.isnan(X).any()
+
+        if len(X) == 1:
+            # Single row: decide every split up front, after which each tree
+            # level is a single lookup
+            x = X[0, self.feature]
+            go_right = x > self.threshold
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.missing_left
+            next_node = np.where(go_right, self.right, self.left)
+            node = self.roots
+            for _ in range(self.max_depth):
+                node = next_node[node]
+            return node.reshape(1, -1)
+
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_right = x > self.threshold[node]
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.missing_left[node]
+            node = np.where(go_right, self.right[node], self.left[node])
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.apply(X)
+        # Accumulate trees in order, then average, as RandomForestClassifier does
+        return self.leaf_value[leaves].sum(axis=1) / len(self.roots)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _flatten_tree(tree, offset: int) -> Tuple[np.ndarray, ...]:
+    n_nodes = tree.node_count
+    node_ids = np.arange(n_nodes)
+    is_leaf = tree.children_left == -1
+
+    feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+    threshold = tree.threshold.astype(np.float64)
+    left = (np.where(is_leaf, node_ids, tree.children_left) + offset).astype(np.intp)
+    right = (np.where(is_leaf, node_ids, tree.children_right) + offset).astype(np.intp)
+    # Trees from scikit-learn < 1.3 have no missing-value support; NaN went left there
+    missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+    if missing_go_to_left is None:
+        missing_left = np.ones(n_nodes, dtype=bool)
+    else:
+        missing_left = np.asarray(missing_go_to_left, dtype=bool)
+
+    # Normalized class distribution of each node, as DecisionTreeClassifier.predict_proba
+    value = tree.value[:, 0, :].astype(np.float64)
+    normalizer = value.sum(axis=1, keepdims=True)
+    normalizer[normalizer == 0.0] = 1.0
+    return feature, threshold, left, right, missing_left, value / normalizer
+
+
+def compile_forest(model) -> CompiledForest:
+    """
+    Flatten a fitted single-output forest classifier (RandomForestClassifier,
+    ExtraTreesClassifier) or DecisionTreeClassifier into a CompiledForest.
+
+    Raises:
+        TypeError: if the model is not a supported tree classifier.
+    """
+    estimators = getattr(model, "estimators_", None)
+    if estimators is None and hasattr(model, "tree_"):
+        estimators = [model]
+    if not estimators or not all(hasattr(est, "tree_") for est in estimators):
+        raise TypeError(f"Cannot compile {type(model).__name__}: not a tree classifier ensemble")
+    if getattr(model, "n_outputs_", 1) != 1 or not hasattr(model, "classes_"):
+        raise TypeError(f"Cannot compile {type(model).__name__}: only single-output classifiers are supported")
+
+    features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    for est in estimators:
+        feature, threshold, left, right, missing_left, value = _flatten_tree(est.tree_, offset)
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(left)
+        rights.append(right)
+        missing_lefts.append(missing_left)
+        values.append(value)
+        roots.append(offset)
+        offset += est.tree_.node_count
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        missing_left=np.concatenate(missing_lefts),
+        leaf_value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.intp),
+        max_depth=max(est.tree_.max_depth for est in estimators),
+        classes=np.asarray(model.classes_),
+        n_features_in=int(model.n_features_in_),
+        feature_importances=np.asarray(model.feature_importances_),
+    )
+
+
+def load_tree_model(model, backend: str = TREE_MODEL_BACKEND):
+    """
+    Return the compiled evaluator for model when backend is "compiled",
+    falling back to the scikit-learn model if it cannot be compiled.
+    """
+    if backend != "compiled":
+        return model
+    try:
+        return compile_forest(model)
+    except TypeError as e:
+        print(f"Warning: {e}. Using the scikit-learn model.")
+        return model
@@ -0,0 +1,210 @@
+"""
+Whole-recording windowed inference.
+
+A recording is scored as the same 4 s / 2 s-hop windows the model was trained on.
+Windows are zero-copy views (see extract_features_sliding), and batches of windows
+are fanned out to a process pool. Each task names the model file to use, which
+workers memory-map (model_registry.open_model) and keep open, so they share the
+model's pages with the API process and pick up a new version without a restart.
+Windows are screened for artifacts first (see artifacts.py); in "drop" mode rejected
+windows are neither featurized nor scored.
+"""
+import asyncio
+import os
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from .artifacts import ARTIFACT_MODE, screen_recording, screen_windows
+from .feature_extraction import SlidingFeatureExtractor, extract_features_batch, extract_features_sliding
+from .metrics import stage
+from .model_registry import MODEL_KEEP_VERSIONS, open_model
+
+# Number of worker processes (0 scores everything in the calling process)
+INFERENCE_WORKERS = int(os.getenv("EEG_INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Windows per task sent to a worker
+WINDOW_BATCH_SIZE = int(os.getenv("EEG_WINDOW_BATCH_SIZE", "64"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Chunks submitted to the pool and not finished yet
+_pending_chunks = 0
+# Worker side: model file -> mapped model, most recently used last
+_worker_models: "OrderedDict[str, object]" = OrderedDict()
+
+
+def _worker_model(model_path: str):
+    model = _worker_models.get(model_path)
+    if model is None:
+        model = _worker_models[model_path] = open_model(model_path)
+        while len(_worker_models) > MODEL_KEEP_VERSIONS:
+            _worker_models.popitem(last=False)
+    else:
+        _worker_models.move_to_end(model_path)
+    return model
+
+
+def _score_recording(model, data: np.ndarray, fs: int, window_size_sec: int, step_size_sec: int,
+                     uv_scale: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Artifact screening, features and predict_proba for every window of a contiguous recording.
+
+    Returns:
+        (probabilities [n_windows, n_classes], NaN rows for dropped windows;
+         clean-window mask [n_windows])
+    """
+    windows, clean = screen_recording(data, fs, window_size_sec, step_size_sec, uv_scale)
+    scored = clean if ARTIFACT_MODE == "drop" else np.ones_like(clean)
+
+    proba = np.full((len(clean), len(model.classes_)), np.nan)
+    if scored.all():
+        proba[:] = model.predict_proba(extract_features_sliding(data, fs, window_size_sec, step_size_sec))
+    elif scored.any():
+        # Welch on the kept windows only; [n, C, samples] -> [n, samples, C]
+        features = extract_features_batch(windows[scored].transpose(0, 2, 1), fs)
+        proba[scored] = model.predict_proba(features)
+    return proba, clean
+
+
+def _score_chunk(model_path: str, chunk: np.ndarray, fs: int, window_size_sec: int, step_size_sec: int,
+                 uv_scale: float) -> Tuple[np.ndarray, np.ndarray]:
+    """_score_recording for a contiguous chunk of windows (runs in a worker)."""
+    return _score_recording(_worker_model(model_path), chunk, fs, window_size_sec, step_size_sec, uv_scale)
+
+
+def start_pool(max_workers: int = INFERENCE_WORKERS):
+    """Start the worker pool; no-op if workers are disabled. Workers load models on first use."""
+    global _pool
+    shutdown_pool()
+    if max_workers > 0:
+        _pool = ProcessPoolExecutor(max_workers=max_workers)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def pending_chunks() -> int:
+    """Window chunks queued or running in the worker pool."""
+    return _pending_chunks
+
+
+def _chunk_done(_future):
+    global _pending_chunks
+    _pending_chunks -= 1
+
+
+def count_windows(n_samples: int, fs: int, window_size_sec: int, step_size_sec: int) -> int:
+    """Number of windows segment_data would yield for a recording of n_samples."""
+    window_size_samples = window_size_sec * fs
+    step_size_samples = step_size_sec * fs
+    if n_samples < window_size_samples:
+        return 0
+    return (n_samples - window_size_samples) // step_size_samples + 1
+
+
+def plan_chunks(n_windows: int, fs: int, window_size_sec: int, step_size_sec: int,
+                batch_size: int = WINDOW_BATCH_SIZE) -> List[Tuple[int, int]]:
+    """
+    Sample ranges [start, end) covering consecutive batches of windows.
+
+    Neighbouring chunks overlap by window - step samples so each one yields
+    exactly its own windows.
+    """
+    window_size_samples = window_size_sec * fs
+    step_size_samples = step_size_sec * fs
+
+    chunks = []
+    for first in range(0, n_windows, batch_size):
+        last = min(first + batch_size, n_windows)
+        start = first * step_size_samples
+        end = (last - 1) * step_size_samples + window_size_samples
+        chunks.append((start, end))
+    return chunks
+
+
+@stage("score_windows")
+async def score_windows(model, eeg_data: np.ndarray, fs: int, window_size_sec: int = 4,
+                        step_size_sec: int = 2, uv_scale: float = 1.0,
+                        model_path: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Class probabilities for every window of a recording.
+
+    Args:
+        model: Fitted classifier (used directly when the pool is not running)
+        eeg_data: 2D array [n_samples, n_channels]
+        fs: Sampling rate
+        window_size_sec: Window length in seconds
+        step_size_sec: Hop between windows in seconds
+        uv_scale: Factor converting eeg_data to microvolts, for artifact screening
+        model_path: File workers open to get the same model (see model_registry);
+            without it everything is scored in the calling process
+
+    Returns:
+        (2D array [n_windows, n_classes] with NaN rows for windows dropped as artifacts,
+         clean-window mask [n_windows])
+    """
+    n_windows = count_windows(len(eeg_data), fs, window_size_sec, step_size_sec)
+    chunks = plan_chunks(n_windows, fs, window_size_sec, step_size_sec)
+
+    # Short recordings are not worth the IPC round trip
+    if _pool is None or model_path is None or len(chunks) <= 1:
+        return _score_recording(model, eeg_data, fs, window_size_sec, step_size_sec, uv_scale)
+
+    global _pending_chunks
+    loop = asyncio.get_running_loop()
+    futures = [
+        loop.run_in_executor(_pool, _score_chunk, model_path, eeg_data[start:end], fs, window_size_sec,
+                             step_size_sec, uv_scale)
+        for start, end in chunks
+    ]
+    _pending_chunks += len(futures)
+    for future in futures:
+        future.add_done_callback(_chunk_done)
+    results = await asyncio.gather(*futures)
+    return np.concatenate([proba for proba, _ in results]), np.concatenate([clean for _, clean in results])
+
+
+@stage("score_stream")
+def score_stream(model, blocks: Iterable[np.ndarray], fs: int, window_size_sec: int = 4,
+                 step_size_sec: int = 2, uv_scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Class probabilities for every window of a recording that arrives in blocks.
+
+    Each block is screened, featurized and scored as soon as it completes windows,
+    so only about one window of samples is held in memory at a time.
+
+    Returns:
+        Same as score_windows.
+    """
+    clean_masks = []
+
+    def screen(windows: np.ndarray) -> np.ndarray:
+        clean = screen_windows(windows, fs, uv_scale)
+        clean_masks.append(clean)
+        return clean if ARTIFACT_MODE == "drop" else np.ones_like(clean)
+
+    extractor = None
+    probabilities = []
+    for block in blocks:
+        if extractor is None:
+            extractor = SlidingFeatureExtractor(fs, block.shape[1], window_size_sec, step_size_sec, screen=screen)
+        n_screened = len(clean_masks)
+        features = extractor.push(block)
+        if len(clean_masks) == n_screened:
+            # No window completed by this block
+            continue
+
+        clean = clean_masks[-1]
+        scored = clean if ARTIFACT_MODE == "drop" else np.ones_like(clean)
+        proba = np.full((len(clean), len(model.classes_)), np.nan)
+        if len(features):
+            proba[scored] = model.predict_proba(features)
+        probabilities.append(proba)
+
+    if not probabilities:
+        return np.empty((0, len(model.classes_))), np.empty(0, dtype=bool)
+    return np.concatenate(probabilities), np.concatenate(clean_masks)
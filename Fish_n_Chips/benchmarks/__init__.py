@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the CogniSafe EEG/speech backend.
+Run a benchmark from the project root, e.g. `python -m benchmarks.payload_parsing`.
+"""
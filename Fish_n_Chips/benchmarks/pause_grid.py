@@ -0,0 +1,149 @@
+"""
+Pause threshold calibration benchmark (pause_analyzer.detect_pause_grid).
+
+Compares two ways of getting pause statistics for every (silence margin, minimum
+duration) setting of a grid over a set of recordings:
+- per setting: decode the recording, compute its frame energy and segment it,
+  once per setting (what calling detect_pauses_from_audio per setting costs)
+- grid: decode and compute frame energy once, then pause_grid for all settings
+
+Per-setting timing runs on the first --baseline-files recordings and is
+extrapolated to the whole set. Results of both are compared for every setting of
+those recordings.
+
+Recordings are synthetic speech-like WAVs (benchmarks.pitch.synth_voice with
+longer gaps), or the .wav files of --wav-dir.
+
+Usage:
+    python -m benchmarks.pause_grid [--recordings 200] [--duration 6] [--baseline-files 5]
+        [--wav-dir recordings/] [--output pause_grid_results.json]
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.pipeline import environment
+from benchmarks.pitch import synth_voice
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.pause_analyzer import (
+    GRID_MARGINS_DB, GRID_MIN_DURATIONS, detect_pause_grid, find_pauses
+)
+from backend.app.services.speech.spectral_features import NOISE_FLOOR_PERCENTILE
+
+STAT_KEYS = ("avg_pause_duration", "max_pause", "long_pause_count", "pause_count", "pause_variability",
+             "total_pause_time")
+
+
+def synthetic_recordings(n: int, duration_sec: float, sr: int = SPEECH_SAMPLE_RATE) -> list:
+    """[(name, wav bytes)] of voices with syllable gaps plus a few longer pauses."""
+    recordings = []
+    for i in range(n):
+        rng = np.random.RandomState(i)
+        samples, _ = synth_voice(rng.uniform(90, 280), duration_sec, sr, seed=i)
+        # Stretch a few gaps into pauses of 0.3-1.5 s
+        for _ in range(rng.randint(1, 4)):
+            start = rng.randint(0, len(samples) - sr)
+            samples[start:start + int(rng.uniform(0.3, 1.5) * sr)] *= 0.01
+        wav = io.BytesIO()
+        sf.write(wav, samples, sr, format="WAV", subtype="PCM_16")
+        recordings.append((f"synthetic_{i}", wav.getvalue()))
+    return recordings
+
+
+def per_setting(data: bytes, margins, min_durations) -> list:
+    """Pause statistics per setting, each from a fresh decode as separate calls would do."""
+    results = []
+    for margin in margins:
+        for min_duration in min_durations:
+            audio = AudioBuffer.from_bytes(data)
+            features = audio.features.compute("rms_db", "frame_times")
+            rms_db = features["rms_db"]
+            silent = rms_db < np.percentile(rms_db, NOISE_FLOOR_PERCENTILE) + margin
+            durations = [p["duration"] for p in find_pauses(silent, features["frame_times"], min_duration)]
+            results.append({
+                "avg_pause_duration": float(np.mean(durations)) if durations else 0.0,
+                "max_pause": float(np.max(durations)) if durations else 0.0,
+                "long_pause_count": len([d for d in durations if d > 0.8]),
+                "pause_count": len(durations),
+                "pause_variability": float(np.std(durations)) if len(durations) > 1 else 0.0,
+                "total_pause_time": float(sum(durations)),
+            })
+    return results
+
+
+def run(recordings: list, baseline_files: int, margins, min_durations) -> dict:
+    n_settings = len(margins) * len(min_durations)
+    audio_sec = 0.0
+
+    start = time.perf_counter()
+    grids = []
+    for _, data in recordings:
+        audio = AudioBuffer.from_bytes(data)
+        audio_sec += audio.duration
+        grids.append(detect_pause_grid(audio, margins, min_durations))
+    grid_sec = time.perf_counter() - start
+
+    baseline = recordings[:baseline_files]
+    max_diff = 0.0
+    start = time.perf_counter()
+    baseline_results = [per_setting(data, margins, min_durations) for _, data in baseline]
+    baseline_sec = time.perf_counter() - start
+    for grid, expected in zip(grids, baseline_results):
+        for got, want in zip(grid, expected):
+            max_diff = max(max_diff, max(abs(got[k] - want[k]) for k in STAT_KEYS))
+
+    per_file_baseline = baseline_sec / len(baseline) if baseline else float("nan")
+    return {
+        "recordings": len(recordings),
+        "audio_sec": audio_sec,
+        "settings": n_settings,
+        "grid_sec": grid_sec,
+        "grid_ms_per_recording": grid_sec * 1000 / len(recordings),
+        "per_setting_ms_per_recording": per_file_baseline * 1000,
+        "per_setting_sec_extrapolated": per_file_baseline * len(recordings),
+        "speedup": per_file_baseline * len(recordings) / grid_sec if grid_sec else None,
+        "max_abs_diff": max_diff,
+        "baseline_files": len(baseline),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=int, default=200, help="Synthetic recordings (ignored with --wav-dir)")
+    parser.add_argument("--duration", type=float, default=6.0, help="Seconds per synthetic recording")
+    parser.add_argument("--baseline-files", type=int, default=5, help="Recordings timed the per-setting way")
+    parser.add_argument("--wav-dir", help="Directory of .wav recordings to use instead of synthetic ones")
+    parser.add_argument("--output", default="pause_grid_results.json")
+    args = parser.parse_args()
+
+    if args.wav_dir:
+        recordings = []
+        for path in sorted(glob.glob(os.path.join(args.wav_dir, "*.wav"))):
+            with open(path, "rb") as f:
+                recordings.append((os.path.basename(path), f.read()))
+    else:
+        recordings = synthetic_recordings(args.recordings, args.duration)
+    if not recordings:
+        parser.error("No recordings found")
+
+    result = run(recordings, args.baseline_files, GRID_MARGINS_DB, GRID_MIN_DURATIONS)
+    print(f"{result['recordings']} recordings ({result['audio_sec']:.0f}s of audio), {result['settings']} settings")
+    print(f"  grid:        {result['grid_sec']:.2f}s ({result['grid_ms_per_recording']:.1f} ms/recording)")
+    print(f"  per setting: {result['per_setting_sec_extrapolated']:.2f}s extrapolated from "
+          f"{result['baseline_files']} recordings ({result['per_setting_ms_per_recording']:.1f} ms/recording)")
+    print(f"  speedup:     {result['speedup']:.0f}x, max |difference| {result['max_abs_diff']:.2e}")
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "margins_db": list(GRID_MARGINS_DB),
+                   "min_durations": list(GRID_MIN_DURATIONS), "result": result}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark /predict request-body decoding for each supported encoding.
+
+Measures decode_eeg_payload (what the endpoint runs before feature extraction)
+for JSON, raw float32, .npy and msgpack bodies of 16-channel EEG at 256 Hz.
+
+Usage:
+    python -m benchmarks.payload_parsing [--durations 4 60 600] [--repeats 20]
+"""
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+from backend.app.data_processing import (
+    decode_eeg_payload, msgpack,
+    RAW_EEG_CONTENT_TYPE, NPY_CONTENT_TYPES, MSGPACK_CONTENT_TYPES
+)
+
+FS = 256
+N_CHANNELS = 16
+
+
+def build_payloads(eeg: np.ndarray) -> dict:
+    """Encode one segment in every supported format: name -> (body, headers)."""
+    n_samples, n_channels = eeg.shape
+    payloads = {
+        "json": (
+            json.dumps({"eeg": eeg.astype(np.float64).tolist(), "sampling_rate": FS}).encode(),
+            {"content-type": "application/json"},
+        ),
+        "raw_float32": (
+            eeg.astype('<f4').tobytes(),
+            {"content-type": RAW_EEG_CONTENT_TYPE, "x-eeg-shape": f"{n_samples},{n_channels}"},
+        ),
+    }
+
+    npy = io.BytesIO()
+    np.save(npy, eeg.astype('<f4'))
+    payloads["npy"] = (npy.getvalue(), {"content-type": NPY_CONTENT_TYPES[0]})
+
+    if msgpack is not None:
+        body = msgpack.packb({"eeg": eeg.astype('<f4').tobytes(), "shape": [n_samples, n_channels], "sampling_rate": FS})
+        payloads["msgpack"] = (body, {"content-type": MSGPACK_CONTENT_TYPES[0]})
+
+    return payloads
+
+
+def time_decode(body: bytes, headers: dict, repeats: int) -> float:
+    """Median decode latency in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        decode_eeg_payload(body, headers)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[4, 60, 600], help="Segment lengths in seconds")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    if msgpack is None:
+        print("⚠️ msgpack not installed, skipping msgpack payloads")
+
+    print(f"{'duration':>10} {'encoding':>12} {'body size':>12} {'decode (ms)':>12}")
+    print("-" * 50)
+    for duration in args.durations:
+        eeg = rng.standard_normal((int(duration * FS), N_CHANNELS)) * 30
+        for name, (body, headers) in build_payloads(eeg).items():
+            latency = time_decode(body, headers, args.repeats)
+            print(f"{duration:>9g}s {name:>12} {len(body) / 1024:>10.1f}KB {latency:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
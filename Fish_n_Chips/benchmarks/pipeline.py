@@ -0,0 +1,200 @@
+"""
+End-to-end EEG pipeline benchmarks.
+
+Times parse_edf, parse_csv, extract_features_from_segment, run_inference and the
+HTTP endpoints (/predict, /predict_file) on synthetic 16-channel recordings at
+several durations, and writes the results as JSON. Passing an earlier results file
+as --baseline prints the relative change per benchmark and exits non-zero when
+anything got slower than --threshold.
+
+The feature/prediction cache is disabled so repeated uploads are measured cold.
+
+Usage:
+    python -m benchmarks.pipeline [--durations 4 60 600 3600] [--repeats 10]
+        [--output bench_results.json] [--baseline previous.json] [--threshold 1.2]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Uploads must not be served from the content-hash cache
+os.environ["EEG_CACHE_ENABLED"] = "0"
+
+from benchmarks.synthetic import FS, channel_names, generate_eeg, to_csv_bytes, to_edf_bytes
+from backend.app.data_processing import RAW_EEG_CONTENT_TYPE, parse_csv, parse_edf
+from backend.app.feature_extraction import extract_features_from_segment
+
+N_CHANNELS = 16
+DEFAULT_DURATIONS = [4, 60, 600, 3600]
+# JSON request bodies beyond this are impractically large (hundreds of MB)
+MAX_JSON_DURATION = 600
+
+
+def time_call(func, repeats: int, budget_sec: float) -> dict:
+    """
+    Run func once to warm up, then up to repeats times or until budget_sec is
+    spent (at least 3 timed runs). Returns latency stats in milliseconds.
+    """
+    func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeats and (len(timings) < 3 or time.perf_counter() - started < budget_sec):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    ms = np.array(timings) * 1000
+    return {
+        "repeats": len(ms),
+        "median_ms": float(np.median(ms)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "min_ms": float(ms.min()),
+        "mean_ms": float(ms.mean()),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _open_app():
+    """TestClient with the app's lifespan running, or None if the app cannot start here."""
+    try:
+        from fastapi.testclient import TestClient
+        from backend.app import main
+    except Exception as e:
+        print(f"⚠️ Skipping run_inference and HTTP benchmarks, app import failed: {e}")
+        return None, None
+
+    client = TestClient(main.app)
+    client.__enter__()
+    if main.model is None:
+        print("⚠️ Skipping run_inference and HTTP benchmarks, model not loaded")
+        client.__exit__(None, None, None)
+        return None, None
+    return client, main
+
+
+def run_benchmarks(durations, repeats: int, budget_sec: float) -> list:
+    client, main = _open_app()
+    results = []
+
+    def record(name, duration, input_bytes, func):
+        stats = time_call(func, repeats, budget_sec)
+        results.append({"benchmark": name, "duration_sec": duration, "n_channels": N_CHANNELS,
+                        "input_bytes": input_bytes, **stats})
+        print(f"{name:>32} {duration:>8g}s {input_bytes / 1024:>12.1f}KB {stats['median_ms']:>12.2f} {stats['p95_ms']:>12.2f}")
+
+    print(f"{'benchmark':>32} {'duration':>9} {'input':>14} {'median (ms)':>12} {'p95 (ms)':>12}")
+    print("-" * 84)
+    try:
+        for duration in durations:
+            eeg_uv = generate_eeg(duration, N_CHANNELS, FS)
+            names = channel_names(N_CHANNELS)
+            csv_bytes = to_csv_bytes(eeg_uv, names)
+            edf_bytes = to_edf_bytes(eeg_uv, names, FS)
+            eeg = eeg_uv.astype(np.float32)
+
+            record("parse_edf", duration, len(edf_bytes), lambda: parse_edf(edf_bytes))
+            record("parse_csv", duration, len(csv_bytes), lambda: parse_csv(csv_bytes))
+            record("extract_features_from_segment", duration, eeg.nbytes,
+                   lambda: extract_features_from_segment(eeg, FS))
+
+            if client is None:
+                continue
+
+            # On the app's event loop, where the inference scheduler runs
+            record("run_inference", duration, eeg.nbytes, lambda: client.portal.call(main.run_inference, eeg, FS))
+
+            raw_headers = {"content-type": RAW_EEG_CONTENT_TYPE, "x-eeg-shape": f"{len(eeg)},{N_CHANNELS}"}
+            raw_body = eeg.astype("<f4").tobytes()
+            record("POST /predict raw_float32", duration, len(raw_body),
+                   lambda: _check(client.post("/predict", content=raw_body, headers=raw_headers)))
+            if duration <= MAX_JSON_DURATION:
+                json_body = json.dumps({"eeg": eeg.tolist(), "sampling_rate": FS}).encode()
+                record("POST /predict json", duration, len(json_body),
+                       lambda: _check(client.post("/predict", content=json_body,
+                                                  headers={"content-type": "application/json"})))
+
+            for label, filename, body in (("csv", "bench.csv", csv_bytes), ("edf", "bench.edf", edf_bytes)):
+                record(f"POST /predict_file {label}", duration, len(body),
+                       lambda: _check(client.post("/predict_file", files={"file": (filename, body)})))
+                record(f"POST /predict_file {label} windowed", duration, len(body),
+                       lambda: _check(client.post("/predict_file?windowed=true", files={"file": (filename, body)})))
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+
+    return results
+
+
+def _check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.url.path} returned {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> bool:
+    """Print median changes against a baseline run; True if nothing regressed past threshold."""
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["duration_sec"]): r for r in json.load(f)["results"]}
+
+    ok = True
+    print(f"\n{'benchmark':>32} {'duration':>9} {'baseline':>12} {'now':>12} {'ratio':>7}")
+    print("-" * 76)
+    for r in results:
+        base = baseline.get((r["benchmark"], r["duration_sec"]))
+        if base is None:
+            continue
+        ratio = r["median_ms"] / base["median_ms"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  ⚠️ regression"
+            ok = False
+        print(f"{r['benchmark']:>32} {r['duration_sec']:>8g}s {base['median_ms']:>12.2f} {r['median_ms']:>12.2f} "
+              f"{ratio:>6.2f}x{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=DEFAULT_DURATIONS, help="Recording lengths in seconds")
+    parser.add_argument("--repeats", type=int, default=10, help="Maximum timed runs per benchmark")
+    parser.add_argument("--budget", type=float, default=10, help="Seconds per benchmark after 3 runs")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Median slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.durations, args.repeats, args.budget)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and not compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Pitch backend benchmark and accuracy comparison (backend.app.services.speech.pitch).
+
+Runs every backend on a fixture set of synthetic voiced recordings with known F0
+(harmonic sources from low male to child voices, with vibrato, declination,
+syllable gaps and background noise) and reports per backend:
+- time per second of audio
+- gross pitch error: share of frames voiced in both truth and estimate that are
+  more than 20% off
+- fine error: mean absolute error in cents of the other such frames
+- voicing recall (truth-voiced frames found) and false alarms (voiced estimates
+  in the gaps)
+- error of the pitch_mean / pitch_std features extract_acoustic_features reports
+
+With --wav-dir, recordings from that directory are added with pyin as the
+reference instead of a known F0.
+
+Usage:
+    python -m benchmarks.pitch [--backends yin pyin] [--repeats 3] [--wav-dir fixtures/]
+        [--output pitch_results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from benchmarks.pipeline import environment
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.pitch import PITCH_BACKENDS, PITCH_HOP_SEC, SPEECH_FMIN_HZ, estimate_pitch
+
+# (base F0 in Hz, seed): low male, male, female, high female, child
+VOICES = [(85, 1), (110, 2), (140, 3), (200, 4), (240, 5), (320, 6)]
+FIXTURE_DURATION_SEC = 2.0
+SNR_DB = 25
+GROSS_ERROR_RATIO = 0.2
+# librosa.pyin's default hop
+PYIN_HOP_LENGTH = 512
+
+
+def synth_voice(base_f0: float, duration_sec: float, sr: int, seed: int):
+    """
+    Harmonic voice with a known F0 contour.
+
+    Returns:
+        (samples, f0_at(t) callable returning the true F0 in Hz or NaN in the gaps)
+    """
+    rng = np.random.RandomState(seed)
+    n = int(duration_sec * sr)
+    t = np.arange(n) / sr
+
+    # 5 Hz vibrato of 3%, 10% declination over the recording
+    contour = base_f0 * (1 + 0.03 * np.sin(2 * np.pi * 5 * t + rng.uniform(0, 2 * np.pi))) \
+        * (1.05 - 0.1 * t / duration_sec)
+    phase = 2 * np.pi * np.cumsum(contour) / sr
+    n_harmonics = int(0.45 * sr / contour.max())
+    source = sum(np.sin(k * phase) / k ** 1.2 for k in range(1, n_harmonics + 1))
+
+    # Syllables: 0.2-0.4 s voiced, 0.1-0.25 s gaps, 20 ms ramps
+    envelope = np.zeros(n)
+    start = int(0.1 * sr)
+    while start < n:
+        length = int(rng.uniform(0.2, 0.4) * sr)
+        envelope[start:start + length] = 1.0
+        start += length + int(rng.uniform(0.1, 0.25) * sr)
+    ramp = np.hanning(int(0.04 * sr))
+    envelope = np.convolve(envelope, ramp / ramp.sum(), mode="same")
+
+    voice = source * envelope
+    voice /= np.abs(voice).max()
+    noise_rms = np.sqrt(np.mean(np.square(voice[envelope > 0.5]))) * 10 ** (-SNR_DB / 20)
+    samples = (voice + rng.normal(0, noise_rms, n)).astype(np.float32)
+
+    def f0_at(times: np.ndarray) -> np.ndarray:
+        idx = np.clip((times * sr).astype(int), 0, n - 1)
+        return np.where(envelope[idx] > 0.9, contour[idx], np.nan)
+
+    return samples, f0_at
+
+
+def frame_times(backend: str, n_frames: int, sr: int) -> np.ndarray:
+    """Centre time of each frame a backend returns."""
+    if backend == "pyin":
+        # Centered frames
+        return np.arange(n_frames) * PYIN_HOP_LENGTH / sr
+    # yin: frames start every hop; the integration window plus the longest lag span
+    # 2 / fmin seconds, whose middle is the analysis centre
+    hop = max(1, int(round(sr * PITCH_HOP_SEC)))
+    return (np.arange(n_frames) * hop) / sr + 1.0 / SPEECH_FMIN_HZ
+
+
+def pitch_stats(f0: np.ndarray) -> dict:
+    voiced = f0[~np.isnan(f0)]
+    return {
+        "pitch_mean": float(voiced.mean()) if len(voiced) else 0.0,
+        "pitch_std": float(voiced.std()) if len(voiced) else 0.0,
+    }
+
+
+def frame_errors(estimate: np.ndarray, truth: np.ndarray) -> dict:
+    """Frame-level comparison of an F0 track with a reference track (NaN = unvoiced)."""
+    truth_voiced = ~np.isnan(truth)
+    est_voiced = ~np.isnan(estimate)
+    both = truth_voiced & est_voiced
+
+    ratio = np.abs(estimate[both] - truth[both]) / truth[both]
+    gross = ratio > GROSS_ERROR_RATIO
+    cents = np.abs(1200 * np.log2(estimate[both][~gross] / truth[both][~gross]))
+    return {
+        "frames": int(truth_voiced.sum()),
+        "gross_error_rate": float(gross.mean()) if len(ratio) else None,
+        "fine_error_cents": float(cents.mean()) if len(cents) else None,
+        "voicing_recall": float(both.sum() / truth_voiced.sum()) if truth_voiced.any() else None,
+        "false_alarm_rate": float((est_voiced & ~truth_voiced).sum() / (~truth_voiced).sum())
+        if (~truth_voiced).any() else None,
+    }
+
+
+def load_fixtures(wav_dir: str = None) -> list:
+    """[(name, AudioBuffer, f0_at or None)]"""
+    fixtures = []
+    for base_f0, seed in VOICES:
+        samples, f0_at = synth_voice(base_f0, FIXTURE_DURATION_SEC, SPEECH_SAMPLE_RATE, seed)
+        fixtures.append((f"synthetic_{base_f0}hz", AudioBuffer(samples, SPEECH_SAMPLE_RATE), f0_at))
+    if wav_dir:
+        for path in sorted(glob.glob(os.path.join(wav_dir, "*.wav"))):
+            fixtures.append((os.path.basename(path), AudioBuffer.from_file(path), None))
+    return fixtures
+
+
+def run(backends, repeats: int, wav_dir: str = None) -> list:
+    fixtures = load_fixtures(wav_dir)
+    results = []
+
+    print(f"{'fixture':>24} {'backend':>8} {'ms/s audio':>11} {'gross %':>8} {'cents':>7} {'recall':>7} "
+          f"{'false al.':>9} {'mean Hz':>8} {'ref mean':>8} {'std Hz':>7} {'ref std':>7}")
+    print("-" * 112)
+    for name, audio, f0_at in fixtures:
+        tracks = {}
+        for backend in backends:
+            timings = []
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                f0 = estimate_pitch(audio, backend)
+                timings.append(time.perf_counter() - start)
+            tracks[backend] = f0
+
+            if f0_at is not None:
+                reference = f0_at(frame_times(backend, len(f0), audio.sr))
+                reference_name = "truth"
+            elif backend != "pyin" and "pyin" in tracks:
+                # Real recordings: pyin's track, resampled to this backend's frames
+                pyin_times = frame_times("pyin", len(tracks["pyin"]), audio.sr)
+                idx = np.clip(np.searchsorted(pyin_times, frame_times(backend, len(f0), audio.sr)),
+                              0, len(pyin_times) - 1)
+                reference, reference_name = tracks["pyin"][idx], "pyin"
+            else:
+                reference, reference_name = None, None
+
+            result = {
+                "fixture": name,
+                "backend": backend,
+                "duration_sec": audio.duration,
+                "median_ms": float(np.median(timings) * 1000),
+                "ms_per_audio_sec": float(np.median(timings) * 1000 / audio.duration),
+                **pitch_stats(f0),
+                "reference": reference_name,
+            }
+            if reference is not None:
+                ref_stats = pitch_stats(reference)
+                result.update(frame_errors(f0, reference))
+                result.update(reference_pitch_mean=ref_stats["pitch_mean"], reference_pitch_std=ref_stats["pitch_std"])
+            results.append(result)
+            _print_row(result)
+    return results
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else "-"
+
+
+def _print_row(r):
+    gross = r.get("gross_error_rate")
+    print(f"{r['fixture']:>24} {r['backend']:>8} {r['ms_per_audio_sec']:>11.2f} "
+          f"{_fmt(gross * 100 if gross is not None else None, '>8.1f')} "
+          f"{_fmt(r.get('fine_error_cents'), '>7.1f')} {_fmt(r.get('voicing_recall'), '>7.2f')} "
+          f"{_fmt(r.get('false_alarm_rate'), '>9.2f')} {r['pitch_mean']:>8.1f} "
+          f"{_fmt(r.get('reference_pitch_mean'), '>8.1f')} {r['pitch_std']:>7.1f} "
+          f"{_fmt(r.get('reference_pitch_std'), '>7.1f')}")
+
+
+def summarize(results: list):
+    print(f"\n{'backend':>8} {'ms/s audio':>11} {'gross %':>8} {'cents':>7} {'|mean err| Hz':>14} {'|std err| Hz':>13}")
+    print("-" * 66)
+    for backend in dict.fromkeys(r["backend"] for r in results):
+        rows = [r for r in results if r["backend"] == backend and r["reference"] == "truth"]
+        if not rows:
+            continue
+        speed = np.median([r["ms_per_audio_sec"] for r in rows])
+        gross = np.mean([r["gross_error_rate"] for r in rows if r["gross_error_rate"] is not None]) * 100
+        cents = np.mean([r["fine_error_cents"] for r in rows if r["fine_error_cents"] is not None])
+        mean_err = np.mean([abs(r["pitch_mean"] - r["reference_pitch_mean"]) for r in rows])
+        std_err = np.mean([abs(r["pitch_std"] - r["reference_pitch_std"]) for r in rows])
+        print(f"{backend:>8} {speed:>11.2f} {gross:>8.2f} {cents:>7.1f} {mean_err:>14.2f} {std_err:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # pyin first, so real recordings have its track to compare against
+    parser.add_argument("--backends", nargs="+", default=["pyin", "yin"], choices=list(PITCH_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per backend and fixture")
+    parser.add_argument("--wav-dir", help="Directory of .wav recordings to compare against pyin")
+    parser.add_argument("--output", default="pitch_results.json")
+    args = parser.parse_args()
+
+    results = run(args.backends, args.repeats, args.wav_dir)
+    summarize(results)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Vectorized synthetic EEG generator for benchmarks and manual testing.
+
+Signals are the same mix generate_test_eeg.py uses (2/6/10/20 Hz sines with a
+per-channel phase, plus Gaussian noise, in microvolts), built for all samples and
+channels at once, for any duration and channel count, as CSV or EDF.
+
+Usage:
+    python -m benchmarks.synthetic --duration 600 --channels 16 --format edf --out sample.edf
+"""
+import argparse
+import io
+import os
+
+import numpy as np
+
+from backend.app.data_processing import REQUIRED_CHANNELS
+
+FS = 256
+# (amplitude in uV, frequency in Hz, phase step per channel)
+COMPONENTS = [(20, 2, 0.5), (15, 6, 0.3), (25, 10, 0.2), (10, 20, 0.1)]
+NOISE_UV = 5
+
+
+def channel_names(n_channels: int) -> list:
+    """The model's channels first, then numbered extras."""
+    names = list(REQUIRED_CHANNELS[:n_channels])
+    names += [f"EEG{i + 1}" for i in range(len(names), n_channels)]
+    return names
+
+
+def generate_eeg(duration_sec: float, n_channels: int = 16, fs: int = FS, seed: int = 42) -> np.ndarray:
+    """
+    Synthetic EEG [samples, channels] in microvolts.
+
+    Noise is drawn in row-major order from a legacy RandomState, so for the same
+    seed this matches the original per-sample loop value for value.
+    """
+    n_samples = int(round(duration_sec * fs))
+    t = np.linspace(0, duration_sec, n_samples)[:, np.newaxis]
+    ch = np.arange(n_channels)
+
+    eeg = np.zeros((n_samples, n_channels))
+    for amplitude, freq, phase_step in COMPONENTS:
+        eeg += amplitude * np.sin(2 * np.pi * freq * t + ch * phase_step)
+    eeg += np.random.RandomState(seed).normal(0, NOISE_UV, (n_samples, n_channels))
+    return eeg
+
+
+def to_csv_bytes(eeg: np.ndarray, names: list, decimals: int = 2) -> bytes:
+    """CSV with a header row and one row per sample."""
+    buf = io.StringIO()
+    buf.write(",".join(names) + "\n")
+    np.savetxt(buf, eeg, fmt=f"%.{decimals}f", delimiter=",")
+    return buf.getvalue().encode()
+
+
+def _edf_field(value, width: int) -> bytes:
+    return str(value)[:width].ljust(width).encode("latin-1")
+
+
+def to_edf_bytes(eeg_uv: np.ndarray, names: list, fs: int = FS, record_sec: int = 1) -> bytes:
+    """
+    EDF (16-bit) with one signal per channel, uV units and record_sec-long data
+    records. Trailing samples that do not fill a whole record are dropped.
+    """
+    n_samples, n_channels = eeg_uv.shape
+    samples_per_record = fs * record_sec
+    n_records = n_samples // samples_per_record
+
+    # Symmetric physical range covering the signal
+    peak = float(np.ceil(np.max(np.abs(eeg_uv)))) if eeg_uv.size else 1.0
+    phys_min, phys_max, dig_min, dig_max = -peak, peak, -32768, 32767
+
+    header = b"".join([
+        _edf_field("0", 8), _edf_field("X X X X", 80), _edf_field("Startdate X X X X", 80),
+        _edf_field("01.01.20", 8), _edf_field("00.00.00", 8), _edf_field(256 * (n_channels + 1), 8),
+        _edf_field("", 44), _edf_field(n_records, 8), _edf_field(record_sec, 8), _edf_field(n_channels, 4),
+    ])
+    signal_fields = [
+        (names, 16), ([""] * n_channels, 80), (["uV"] * n_channels, 8),
+        ([phys_min] * n_channels, 8), ([phys_max] * n_channels, 8),
+        ([dig_min] * n_channels, 8), ([dig_max] * n_channels, 8),
+        ([""] * n_channels, 80), ([samples_per_record] * n_channels, 8), ([""] * n_channels, 32),
+    ]
+    for values, width in signal_fields:
+        header += b"".join(_edf_field(v, width) for v in values)
+
+    scale = (dig_max - dig_min) / (phys_max - phys_min)
+    digital = np.clip(np.round((eeg_uv[:n_records * samples_per_record] - phys_min) * scale + dig_min), dig_min, dig_max)
+    # [samples, channels] -> [records, channels, samples per record]
+    records = digital.astype("<i2").reshape(n_records, samples_per_record, n_channels).transpose(0, 2, 1)
+    return header + records.tobytes()
+
+
+def generate_file(duration_sec: float, n_channels: int = 16, fmt: str = "csv", fs: int = FS, seed: int = 42) -> bytes:
+    """Synthetic recording encoded as "csv" or "edf"."""
+    eeg = generate_eeg(duration_sec, n_channels, fs, seed)
+    names = channel_names(n_channels)
+    if fmt == "edf":
+        return to_edf_bytes(eeg, names, fs)
+    return to_csv_bytes(eeg, names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=4, help="Seconds")
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--fs", type=int, default=FS)
+    parser.add_argument("--format", choices=["csv", "edf"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Output path (default: synthetic_eeg.<format>)")
+    args = parser.parse_args()
+
+    out = args.out or f"synthetic_eeg.{args.format}"
+    data = generate_file(args.duration, args.channels, args.format, args.fs, args.seed)
+    with open(out, "wb") as f:
+        f.write(data)
+    print(f"✅ Generated {out}: {args.channels} channels, {args.duration:g}s at {args.fs} Hz, "
+          f"{os.path.getsize(out) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
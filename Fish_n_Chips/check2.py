@@ -1,21 +1,42 @@
+"""
+Quick look at EEG_data_set.csv: size, columns, status distribution, first rows.
+
+Run it from this directory as `python check2.py` (it imports backend.app.eeg_dataset
+from here). The first run converts the CSV to the memory-mapped store under data/
+(see `python -m backend.app.eeg_dataset convert`); later runs only read that store.
+"""
+import os
 import pandas as pd
 
-df = pd.read_csv('EEG_data_set.csv')
+from backend.app.eeg_dataset import convert, open_store
+
+CSV_PATH = 'EEG_data_set.csv'
+STORE_PREFIX = os.path.join('data', 'EEG_data_set')
+
+# Convert once (streaming); afterwards everything below reads memory maps
+if not os.path.exists(STORE_PREFIX + '.json'):
+    convert(CSV_PATH, STORE_PREFIX)
+data, labels, index = open_store(STORE_PREFIX)
 
 print("=== DATASET OVERVIEW ===")
-print(f"Total rows: {len(df):,}")
-print(f"Total columns: {len(df.columns)}")
-print(f"Column names: {df.columns.tolist()}")
+print(f"Total rows: {index['n_rows']:,}")
+print(f"Total columns: {len(index['channels']) + (1 if index['label_column'] else 0)}")
+print(f"Column names: {index['channels'] + ([index['label_column']] if index['label_column'] else [])}")
 
 # Check for subject/trial identifiers
 print("\n=== LOOKING FOR GROUPING COLUMNS ===")
-# Are there columns we're not seeing?
-print(df.head(20))
+# Are there columns we're not seeing? The raw header has them all
+print(pd.read_csv(CSV_PATH, nrows=20))
 
 # Check status
 print("\n=== STATUS DISTRIBUTION ===")
-print(df['status'].value_counts())
+if labels is not None:
+    # Counted a block at a time, without loading the column
+    counts = pd.Series(dtype='int64')
+    for start in range(0, len(labels), 1 << 20):
+        counts = counts.add(pd.Series(labels[start:start + (1 << 20)]).value_counts(), fill_value=0)
+    print(counts.astype('int64').sort_values(ascending=False))
 
 # Check if continuous time series
 print("\n=== FIRST 10 ROWS ===")
-print(df.head(10))
\ No newline at end of file
+print(pd.DataFrame(data[:10], columns=index['channels']))
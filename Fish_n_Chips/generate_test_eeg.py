@@ -1,10 +1,15 @@
 """
 Generate a sample EEG CSV file for testing
 Creates 4 seconds of synthetic EEG data (16 channels, 256 Hz)
+
+Run it as `python generate_test_eeg.py` (it imports benchmarks.synthetic from this
+directory). For other durations, channel counts or EDF output use
+`python -m benchmarks.synthetic`.
 """
-import numpy as np
 import csv
 
+from benchmarks.synthetic import generate_eeg
+
 # Parameters
 sampling_rate = 256  # Hz
 duration = 4  # seconds
@@ -17,29 +22,12 @@ channel_names = ['Fp1', 'Fp2', 'F3', 'F4', 'C3', 'C4', 'P3', 'P4',
 
 # Generate synthetic EEG data
 # Real EEG is typically in the range of -100 to +100 microvolts
-# We'll generate realistic-looking signals with multiple frequency components
-np.random.seed(42)  # For reproducibility
-
-eeg_data = []
-time = np.linspace(0, duration, n_samples)
-
-for i in range(n_samples):
-    sample = []
-    for ch in range(n_channels):
-        # Mix of different frequency bands (delta, theta, alpha, beta)
-        delta = 20 * np.sin(2 * np.pi * 2 * time[i] + ch * 0.5)  # 2 Hz
-        theta = 15 * np.sin(2 * np.pi * 6 * time[i] + ch * 0.3)  # 6 Hz
-        alpha = 25 * np.sin(2 * np.pi * 10 * time[i] + ch * 0.2)  # 10 Hz (dominant)
-        beta = 10 * np.sin(2 * np.pi * 20 * time[i] + ch * 0.1)  # 20 Hz
-        noise = np.random.normal(0, 5)  # Background noise
-
-        # Combine all components
-        signal = delta + theta + alpha + beta + noise
-        sample.append(round(signal, 2))
-
-    eeg_data.append(sample)
+# Mix of delta (2 Hz), theta (6 Hz), alpha (10 Hz, dominant) and beta (20 Hz) plus noise,
+# seeded with 42 for reproducibility (same values as the original per-sample loop)
+eeg_data = [[round(value, 2) for value in row]
+            for row in generate_eeg(duration, n_channels, sampling_rate, seed=42).tolist()]
 
-# Save to CSV
+# Save to CSV (written with the csv module, so the file is byte-identical to earlier versions)
 output_file = 'sample_eeg_test.csv'
 with open(output_file, 'w', newline='') as f:
     writer = csv.writer(f)
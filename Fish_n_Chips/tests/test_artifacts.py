@@ -0,0 +1,116 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.app import artifacts, windowed_inference
+from backend.app.artifacts import MAX_PTP_UV, VOLTS_TO_UV, artifact_stats, screen_recording
+from backend.app.windowed_inference import score_stream, score_windows
+from benchmarks.synthetic import generate_eeg
+
+FS = 256
+WINDOW_SEC, STEP_SEC = 4, 2
+
+
+class MeanModel:
+    """Probability of class 1 rises with the first feature; enough to compare scoring paths."""
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        p = 1 / (1 + np.exp(-np.asarray(X)[:, 0] / 100))
+        return np.column_stack([1 - p, p])
+
+
+def windows_touching(start_sec, end_sec, n_windows):
+    """Indices of the windows overlapping [start_sec, end_sec)."""
+    starts = np.arange(n_windows) * STEP_SEC
+    return np.flatnonzero((starts < end_sec) & (starts + WINDOW_SEC > start_sec)).tolist()
+
+
+def rejected(data, uv_scale=1.0):
+    _, clean = screen_recording(data, FS, WINDOW_SEC, STEP_SEC, uv_scale)
+    return np.flatnonzero(~clean).tolist(), len(clean)
+
+
+def test_clean_recording_passes():
+    bad, n_windows = rejected(generate_eeg(30, fs=FS))
+    assert n_windows == 14 and bad == []
+
+
+@pytest.mark.parametrize("artifact", ["clipped", "line_noise"])
+def test_injected_artifacts_reject_overlapping_windows(artifact):
+    eeg = generate_eeg(30, fs=FS)
+    if artifact == "clipped":
+        segment = slice(10 * FS, 11 * FS)
+        eeg[segment, 5] += np.linspace(0, 2 * MAX_PTP_UV, FS)
+    else:
+        segment = slice(8 * FS, 14 * FS)
+        t = np.arange(segment.stop - segment.start) / FS
+        eeg[segment, 7] += 100 * np.sin(2 * np.pi * 50 * t)
+
+    bad, n_windows = rejected(eeg)
+    assert bad == windows_touching(segment.start / FS, segment.stop / FS, n_windows)
+
+
+def test_flatline_rejects_windows_that_are_mostly_flat():
+    eeg = generate_eeg(30, fs=FS)
+    eeg[9 * FS:12 * FS, 3] = 0.0
+    # Only the 8-12 s window is more than half flat
+    assert rejected(eeg)[0] == [4]
+
+
+def test_units_must_be_microvolts():
+    eeg = generate_eeg(20, fs=FS)
+    volts = eeg / VOLTS_TO_UV
+    # Volts taken as microvolts look flat everywhere
+    bad, n_windows = rejected(volts)
+    assert len(bad) == n_windows
+    # With the scale given (as for EDF), the same recording is clean
+    assert rejected(volts, VOLTS_TO_UV)[0] == []
+
+
+def test_line_ratio_matches_periodogram():
+    rng = np.random.RandomState(0)
+    n_samples = WINDOW_SEC * FS
+    t = np.arange(n_samples) / FS
+    x = rng.randn(3, 4, n_samples) * 10
+    x[1, 2] += 30 * np.sin(2 * np.pi * 50.3 * t)
+    x[2, 0] += 30 * np.sin(2 * np.pi * 60 * t + 1)
+
+    line_ratio = artifact_stats(x, FS)["line_ratio"]
+
+    centered = x - x.mean(axis=-1, keepdims=True)
+    power = np.abs(np.fft.rfft(centered, axis=-1)) ** 2
+    power[..., 1:-1] *= 2
+    freqs = np.fft.rfftfreq(n_samples, 1 / FS)
+    near = (np.abs(freqs - 50) <= 1) | (np.abs(freqs - 60) <= 1)
+    expected = power[..., near].sum(axis=-1) / power.sum(axis=-1)
+    np.testing.assert_allclose(line_ratio, expected, rtol=1e-9, atol=1e-12)
+    assert line_ratio[1, 2] > 0.5 and line_ratio[2, 0] > 0.5
+
+
+@pytest.mark.parametrize("mode", ["drop", "flag"])
+def test_scoring_paths_agree(mode, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MODE", mode)
+    monkeypatch.setattr(windowed_inference, "ARTIFACT_MODE", mode)
+    eeg = generate_eeg(40, fs=FS)
+    eeg[15 * FS:18 * FS, 2] = 0.0
+
+    model = MeanModel()
+    proba, clean = asyncio.run(score_windows(model, eeg, FS, WINDOW_SEC, STEP_SEC))
+    blocks = (eeg[start:start + 1000] for start in range(0, len(eeg), 1000))
+    stream_proba, stream_clean = score_stream(model, blocks, FS, WINDOW_SEC, STEP_SEC)
+
+    assert not clean.all()
+    np.testing.assert_array_equal(stream_clean, clean)
+    np.testing.assert_allclose(stream_proba, proba, rtol=1e-9)
+    # Dropped windows are not scored; flagged ones are
+    assert np.isnan(proba[~clean, 1]).all() == (mode == "drop")
+    assert not np.isnan(proba[clean]).any()
+
+
+def test_off_mode_passes_everything(monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MODE", "off")
+    eeg = generate_eeg(20, fs=FS)
+    eeg[:, 0] = 0.0
+    assert rejected(eeg)[0] == []
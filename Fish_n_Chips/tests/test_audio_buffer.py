@@ -0,0 +1,78 @@
+import io
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.vad_service import detect_speech_start
+from benchmarks.pitch import synth_voice
+
+NATIVE_SR = 44100
+
+
+@pytest.fixture
+def stereo_wav():
+    left, _ = synth_voice(150, 1.5, NATIVE_SR, seed=0)
+    right = 0.5 * left
+    stereo = np.column_stack([left, right]) * 0.8
+    buf = io.BytesIO()
+    sf.write(buf, stereo, NATIVE_SR, format="WAV", subtype="FLOAT")
+    return buf.getvalue(), stereo.astype(np.float32)
+
+
+def test_decodes_once_to_mono_at_the_speech_rate(stereo_wav, tmp_path):
+    data, stereo = stereo_wav
+    audio = AudioBuffer.from_bytes(data, "take1.wav")
+
+    assert audio.sr == SPEECH_SAMPLE_RATE
+    assert audio.samples.dtype == np.float32 and audio.samples.flags.c_contiguous
+    expected = librosa.resample(y=stereo.mean(axis=1), orig_sr=NATIVE_SR, target_sr=SPEECH_SAMPLE_RATE)
+    np.testing.assert_allclose(audio.samples, expected, atol=1e-6)
+    assert audio.duration == pytest.approx(1.5, abs=1e-3)
+    # The upload is kept as is for transcription
+    assert audio.data == data and audio.filename == "take1.wav"
+
+    path = tmp_path / "take2.wav"
+    path.write_bytes(data)
+    from_file = AudioBuffer.from_file(str(path))
+    assert from_file.filename == "take2.wav"
+    np.testing.assert_array_equal(from_file.samples, audio.samples)
+
+
+def test_undecodable_audio_raises():
+    with pytest.raises(ValueError):
+        AudioBuffer.from_bytes(b"not audio at all", "broken.wav")
+
+
+def test_stft_is_computed_once_per_parameters():
+    samples, _ = synth_voice(200, 1.0, SPEECH_SAMPLE_RATE, seed=1)
+    audio = AudioBuffer(samples, SPEECH_SAMPLE_RATE)
+
+    spectrum = audio.stft(512, 160, 400)
+    assert audio.stft(512, 160, 400) is spectrum
+    np.testing.assert_allclose(spectrum, librosa.stft(audio.samples, n_fft=512, hop_length=160, win_length=400))
+    assert audio.magnitude(512, 160, 400) is audio.magnitude(512, 160, 400)
+    np.testing.assert_allclose(audio.magnitude(512, 160, 400), np.abs(spectrum))
+
+    # Default win_length is n_fft, so both spellings share one entry
+    assert audio.stft(2048, 512) is audio.stft(2048, 512, 2048)
+    assert audio.stft(2048, 512).shape[0] == 1025
+
+
+def test_pcm16_for_vad():
+    audio = AudioBuffer(np.array([0.0, 0.5, -0.5, 1.5, -1.5]), SPEECH_SAMPLE_RATE)
+    pcm = audio.pcm16()
+    assert audio.pcm16() is pcm
+    assert np.frombuffer(pcm, dtype="<i2").tolist() == [0, 16383, -16383, 32767, -32767]
+
+
+def test_vad_reads_the_buffer():
+    samples, _ = synth_voice(150, 2.0, SPEECH_SAMPLE_RATE, seed=2)
+    samples = np.concatenate([np.zeros(SPEECH_SAMPLE_RATE // 2, dtype=np.float32), samples])
+    audio = AudioBuffer(samples, SPEECH_SAMPLE_RATE)
+
+    start_ms = detect_speech_start(audio)
+    assert start_ms == detect_speech_start(audio.pcm16(), SPEECH_SAMPLE_RATE)
+    assert start_ms >= 400
@@ -0,0 +1,151 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from backend.app import data_processing
+from backend.app.data_processing import (
+    REQUIRED_CHANNELS, EDFFormatError, _parse_edf_mne, _parse_edf_native, iter_csv_blocks, parse_csv,
+    parse_csv_stream, parse_edf
+)
+from benchmarks.synthetic import channel_names, generate_eeg, to_csv_bytes, to_edf_bytes
+
+FS = 256
+
+
+def edf(duration_sec=10, fs=FS, names=None, seed=0):
+    names = names or channel_names(16)
+    eeg = generate_eeg(duration_sec, len(names), fs, seed)
+    return to_edf_bytes(eeg, names, fs), eeg
+
+
+def with_reserved(content: bytes, reserved: str) -> bytes:
+    """content with the EDF header's 44-byte reserved field replaced."""
+    return content[:192] + reserved.ljust(44).encode("latin-1") + content[236:]
+
+
+def test_native_reader_matches_mne():
+    content, eeg = edf()
+    native = parse_edf(content)
+    reference = _parse_edf_mne(content)
+
+    assert native.dtype == np.float32 and native.shape == (10 * FS, 16)
+    # Volts, like MNE; 16-bit quantization of the synthetic microvolts
+    np.testing.assert_allclose(native, reference, rtol=1e-6, atol=1e-11)
+    np.testing.assert_allclose(native * 1e6, eeg[:, :16], atol=0.01)
+
+
+def test_channels_are_picked_by_name_in_training_order():
+    # Extra channels, shuffled order, a 10-10 alias and MNE-style prefixes
+    names = [f"EEG {name}-REF" for name in REQUIRED_CHANNELS] + ["ECG", "EMG"]
+    names[REQUIRED_CHANNELS.index("T3")] = "EEG T7-REF"
+    order = np.random.RandomState(1).permutation(len(names))
+    content, eeg = edf(names=[names[i] for i in order])
+
+    data = parse_edf(content)
+    expected = eeg[:, np.argsort(order)][:, :16]
+    np.testing.assert_allclose(data * 1e6, expected, atol=0.01)
+    np.testing.assert_allclose(data, _parse_edf_mne(content), rtol=1e-6, atol=1e-11)
+
+
+def test_other_rates_are_resampled():
+    content, _ = edf(duration_sec=8, fs=512)
+    data, sfreq = _parse_edf_native(content)
+    assert sfreq == 512
+    resampled = parse_edf(content)
+    assert resampled.shape == (8 * FS, 16)
+    np.testing.assert_allclose(resampled, _parse_edf_mne(content), rtol=1e-4, atol=1e-9)
+
+
+def test_unsupported_files_fall_back_to_mne(monkeypatch):
+    content, _ = edf()
+    discontinuous = with_reserved(content, "EDF+D")
+    with pytest.raises(EDFFormatError):
+        _parse_edf_native(discontinuous)
+
+    calls = []
+
+    def fallback(file_content):
+        calls.append(file_content)
+        return np.zeros((4, 16))
+
+    monkeypatch.setattr(data_processing, "_parse_edf_mne", fallback)
+    assert parse_edf(discontinuous).shape == (4, 16)
+    assert calls == [discontinuous]
+    # EDF+C is read natively
+    parse_edf(with_reserved(content, "EDF+C"))
+    assert len(calls) == 1
+
+
+def test_truncated_file_keeps_its_complete_records():
+    content, _ = edf()
+    truncated = content[:-1000]
+    with pytest.raises(EDFFormatError):
+        _parse_edf_native(truncated)
+    # MNE infers the record count from the file size
+    data = parse_edf(truncated)
+    np.testing.assert_allclose(data, parse_edf(content)[:9 * FS], rtol=1e-6, atol=1e-11)
+
+
+@pytest.mark.parametrize("case", ["missing_channel", "not_edf"])
+def test_bad_files_are_400(case):
+    if case == "missing_channel":
+        content, _ = edf(names=channel_names(15) + ["ECG"])
+    else:
+        content = b"time,Fp1\n0,1\n"
+
+    with pytest.raises(HTTPException) as excinfo:
+        parse_edf(content)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def csv_reader(request, monkeypatch):
+    """Parse with both CSV readers, in small blocks so rows span several of them."""
+    if request.param == "pyarrow":
+        if data_processing.pa_csv is None:
+            pytest.skip("pyarrow not installed")
+        monkeypatch.setattr(data_processing, "CSV_BLOCK_BYTES", 4096)
+    else:
+        monkeypatch.setattr(data_processing, "pa_csv", None)
+        monkeypatch.setattr(data_processing, "CSV_CHUNK_ROWS", 100)
+    return request.param
+
+
+def test_csv_blocks_match_a_whole_file_read(csv_reader):
+    eeg = generate_eeg(10, 16, FS)
+    content = to_csv_bytes(eeg, channel_names(16))
+
+    blocks = list(iter_csv_blocks(io.BytesIO(content)))
+    assert len(blocks) > 1
+    assert all(block.dtype == np.float32 and block.shape[1] == 16 for block in blocks)
+    expected = pd.read_csv(io.BytesIO(content)).to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(np.concatenate(blocks), expected)
+    np.testing.assert_array_equal(parse_csv_stream(io.BytesIO(content)), expected)
+    np.testing.assert_array_equal(parse_csv(content.decode()), expected)
+
+
+def test_csv_channels_are_picked_by_name(csv_reader):
+    rng = np.random.RandomState(2)
+    data = rng.randn(700, 16).astype(np.float32)
+    df = pd.DataFrame(data, columns=REQUIRED_CHANNELS)[list(reversed(REQUIRED_CHANNELS))]
+    df.insert(0, "time", np.arange(700) / FS)
+    df["Status"] = 1
+    # With a byte order mark, as spreadsheet exports write it
+    content = b"\xef\xbb\xbf" + df.to_csv(index=False).encode()
+
+    np.testing.assert_array_equal(parse_csv_stream(io.BytesIO(content)), data)
+
+
+@pytest.mark.parametrize("content", [
+    b"a,b,c\n1,2,3\n",
+    ",".join(REQUIRED_CHANNELS).encode() + b"\n" + b"1," * 15 + b"oops\n",
+    ",".join(REQUIRED_CHANNELS).encode() + b"\n",
+], ids=["too_few_columns", "not_a_number", "header_only"])
+def test_bad_csv_is_400(csv_reader, content):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_csv_stream(io.BytesIO(content))
+    assert excinfo.value.status_code == 400
+
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app import eeg_dataset
+from backend.app.data_processing import REQUIRED_CHANNELS
+from backend.app.eeg_dataset import convert, iter_feature_batches, iter_windows, open_store, window_labels
+from backend.app.feature_extraction import extract_features_sliding, segment_data
+
+FS = 256
+
+
+@pytest.fixture
+def training_csv(tmp_path):
+    """A CSV laid out like EEG_data_set.csv: extra columns, shuffled channels, status labels."""
+    rng = np.random.RandomState(0)
+    n_rows = 30 * FS + 100
+    data = (rng.randn(n_rows, len(REQUIRED_CHANNELS)) * 30).astype(np.float32)
+    status = np.repeat(rng.randint(0, 3, n_rows // FS + 1), FS)[:n_rows]
+
+    df = pd.DataFrame(data, columns=REQUIRED_CHANNELS)
+    df = df[list(reversed(REQUIRED_CHANNELS))]
+    df.insert(0, "time", np.arange(n_rows) / FS)
+    df["Status"] = status
+    path = tmp_path / "EEG_data_set.csv"
+    df.to_csv(path, index=False)
+    return str(path), data, status
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def reader(request, monkeypatch):
+    """Convert with both CSV readers, in small blocks so rows span several of them."""
+    if request.param == "pyarrow":
+        if eeg_dataset.pa_csv is None:
+            pytest.skip("pyarrow not installed")
+        monkeypatch.setattr(eeg_dataset, "CSV_BLOCK_BYTES", 64 * 1024)
+    else:
+        monkeypatch.setattr(eeg_dataset, "pa_csv", None)
+        monkeypatch.setattr(eeg_dataset, "CONVERT_CHUNK_ROWS", 1000)
+    return request.param
+
+
+def test_convert_round_trip(training_csv, reader, tmp_path):
+    csv_path, data, status = training_csv
+    prefix = str(tmp_path / "store" / "EEG_data_set")
+    index = convert(csv_path, prefix)
+
+    stored, labels, stored_index = open_store(prefix)
+    assert stored_index == index
+    assert index["n_rows"] == len(data)
+    assert index["channels"] == REQUIRED_CHANNELS
+    assert index["label_column"] == "Status"
+    assert index["classes"] == sorted(np.unique(status).tolist())
+
+    # Memory maps, read-only, with exactly the CSV's values
+    assert isinstance(stored, np.memmap) and not stored.flags.writeable
+    assert stored.dtype == np.float32 and labels.dtype == np.int64
+    np.testing.assert_array_equal(stored, data)
+    np.testing.assert_array_equal(labels, status)
+
+
+def test_convert_without_labels(tmp_path):
+    data = np.random.RandomState(1).randn(500, 16).astype(np.float32)
+    path = tmp_path / "unlabeled.csv"
+    pd.DataFrame(data, columns=REQUIRED_CHANNELS).to_csv(path, index=False)
+
+    index = convert(str(path))
+    stored, labels, _ = open_store(str(tmp_path / "unlabeled"))
+    assert index["label_column"] is None and labels is None
+    np.testing.assert_array_equal(stored, data)
+
+
+def test_windows_match_segment_data(training_csv, tmp_path):
+    csv_path, data, status = training_csv
+    prefix = str(tmp_path / "store")
+    convert(csv_path, prefix)
+
+    segments, labels = zip(*iter_windows(prefix, 4, 2, batch_size=5))
+    segments = np.concatenate(segments)
+    labels = np.concatenate(labels)
+
+    df = pd.DataFrame(data)
+    expected = [segment.to_numpy() for segment in segment_data(df, 4, 2, FS)]
+    np.testing.assert_array_equal(segments, np.stack(expected))
+
+    status = pd.Series(status)
+    expected_labels = [status.iloc[start:start + 4 * FS].mode()[0] for start in range(0, len(expected) * 2 * FS, 2 * FS)]
+    assert labels.tolist() == expected_labels
+
+
+def test_feature_batches_match_sliding_extraction(training_csv, tmp_path):
+    csv_path, data, _ = training_csv
+    prefix = str(tmp_path / "store")
+    convert(csv_path, prefix)
+
+    features, labels = zip(*iter_feature_batches(prefix, 4, 2, batch_size=4))
+    features = np.concatenate(features)
+    assert len(features) == len(np.concatenate(labels))
+    np.testing.assert_allclose(features, extract_features_sliding(data, FS, 4, 2), rtol=1e-9, atol=0)
+
+
+def test_window_labels_break_ties_to_smaller_label():
+    sample_labels = np.array([2, 2, 1, 1, 3, 3, 3, 3])
+    assert window_labels(sample_labels, 3, 4, 2).tolist() == [1, 1, 3]
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app.feature_extraction import (
+    SlidingFeatureExtractor, SlidingWelch, compute_bandpower, extract_features_from_segment, extract_features_sliding,
+    segment_data
+)
+
+FS = 256
+N_CHANNELS = 4
+
+
+def _recording(dtype, seconds=20, seed=0):
+    rng = np.random.RandomState(seed)
+    t = np.arange(seconds * FS) / FS
+    # Alpha/beta tones over noise, so every band has power
+    data = rng.normal(0, 5, (len(t), N_CHANNELS)) + 20 * np.sin(2 * np.pi * 10 * t)[:, np.newaxis] \
+        + 8 * np.sin(2 * np.pi * 21 * t)[:, np.newaxis]
+    return data.astype(dtype)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("window_size_sec, step_size_sec", [(4, 2), (2, 1), (6, 3)])
+def test_sliding_features_match_per_window_extraction(dtype, window_size_sec, step_size_sec):
+    data = _recording(dtype)
+    sliding = extract_features_sliding(data, FS, window_size_sec, step_size_sec)
+
+    segments = list(segment_data(pd.DataFrame(data), window_size_sec, step_size_sec, FS))
+    assert len(sliding) == len(segments)
+    for row, segment in zip(sliding, segments):
+        np.testing.assert_allclose(row, extract_features_from_segment(segment.values, fs=FS), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_sliding_welch_bandpowers_match_compute_bandpower(dtype):
+    data = _recording(dtype, seconds=12)
+    welch = SlidingWelch(FS, N_CHANNELS, 4, 2)
+    # Uneven chunks: the result must not depend on how samples arrive
+    psd = np.concatenate([welch.push(chunk) for chunk in np.array_split(data, [100, 1000, 1001, 2900])])
+    bandpowers = welch.bandpowers(psd)
+
+    starts = range(0, len(data) - 4 * FS + 1, 2 * FS)
+    assert len(psd) == len(starts)
+    for i, start in enumerate(starts):
+        for channel in range(N_CHANNELS):
+            expected = compute_bandpower(data[start:start + 4 * FS, channel].astype(np.float64), FS)
+            for key, value in expected.items():
+                assert bandpowers[key][i, channel] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("window_size_sec, step_size_sec", [(1, 1), (2.5, 1), (4, 1.5)])
+def test_sliding_welch_rejects_windows_it_cannot_tile(window_size_sec, step_size_sec):
+    with pytest.raises(ValueError):
+        SlidingWelch(FS, N_CHANNELS, window_size_sec, step_size_sec)
+    with pytest.raises(ValueError):
+        extract_features_sliding(_recording(np.float64, seconds=8), FS, window_size_sec, step_size_sec)
+
+
+def test_streamed_features_match_whole_recording():
+    data = _recording(np.float32, seconds=30)
+    extractor = SlidingFeatureExtractor(FS, N_CHANNELS)
+    # Chunks smaller and larger than a window, as CSV blocks arrive
+    streamed = [extractor.push(chunk) for chunk in np.array_split(data, [10, 700, 3000, 3001, 6500])]
+    assert all(rows.shape[1] == extractor.n_features for rows in streamed)
+    np.testing.assert_allclose(np.concatenate(streamed), extract_features_sliding(data, FS, 4, 2),
+                               rtol=1e-9, atol=1e-12)
+    # Only the tail the next window needs is kept
+    assert len(extractor._buffer) < 4 * FS
+
+
+def test_streamed_features_skip_screened_windows():
+    data = _recording(np.float64, seconds=20)
+    screened = []
+
+    def every_other(windows):
+        screened.append(windows.shape)
+        return np.arange(len(windows)) % 2 == 0
+
+    extractor = SlidingFeatureExtractor(FS, N_CHANNELS, screen=every_other)
+    rows = extractor.push(data)
+    assert screened == [(9, N_CHANNELS, 4 * FS)]
+    np.testing.assert_allclose(rows, extract_features_sliding(data, FS, 4, 2)[::2], rtol=1e-9, atol=1e-12)
@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app import feature_store
+from backend.app.data_processing import REQUIRED_CHANNELS, TARGET_SFREQ
+from backend.app.feature_extraction import extract_features_sliding
+from backend.app.preprocessing import preprocess
+
+SHARD_WINDOWS = 8
+
+
+def write_recording(path, seconds, seed, status=None):
+    rng = np.random.RandomState(seed)
+    data = (rng.randn(seconds * TARGET_SFREQ, len(REQUIRED_CHANNELS)) * 20).astype(np.float32)
+    df = pd.DataFrame(data, columns=REQUIRED_CHANNELS)
+    if status is not None:
+        df["status"] = status
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return data
+
+
+def expected_features(data):
+    return extract_features_sliding(preprocess(data, TARGET_SFREQ), TARGET_SFREQ,
+                                    feature_store.WINDOW_SEC, feature_store.STEP_SEC)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    dataset_dir = tmp_path / "dataset"
+    recordings = {
+        "a.csv": write_recording(dataset_dir / "a.csv", 40, seed=0),
+        os.path.join("sub", "b.csv"): write_recording(dataset_dir / "sub" / "b.csv", 25, seed=1),
+    }
+    labels_path = tmp_path / "labels.csv"
+    labels_path.write_text("recording,label\na.csv,0\nb.csv,1\n")
+    return dataset_dir, labels_path, recordings
+
+
+def build(dataset_dir, out_dir, labels_path):
+    return feature_store.build(str(dataset_dir), str(out_dir), str(labels_path), workers=2,
+                               shard_windows=SHARD_WINDOWS)
+
+
+def shard_mtimes(out_dir):
+    shards_dir = out_dir / "shards"
+    return {name: os.stat(shards_dir / name).st_mtime_ns
+            for name in os.listdir(shards_dir) if name.endswith(".npz")}
+
+
+def test_build_and_merge_match_sliding_extraction(dataset, tmp_path):
+    dataset_dir, labels_path, recordings = dataset
+    out_dir = tmp_path / "store"
+    manifest = build(dataset_dir, out_dir, labels_path)
+
+    assert [r["recording"] for r in manifest["recordings"]] == sorted(recordings)
+    assert not manifest["failed"]
+    # Staging files are removed once a recording is done
+    assert os.listdir(out_dir / "staging") == []
+
+    X, y = feature_store.merge(str(out_dir))
+    expected = [expected_features(recordings[name]) for name in sorted(recordings)]
+    np.testing.assert_allclose(X, np.concatenate(expected), rtol=1e-9, atol=0)
+    assert y.tolist() == [0] * len(expected[0]) + [1] * len(expected[1])
+
+
+def test_rebuild_skips_finished_recordings(dataset, tmp_path):
+    dataset_dir, labels_path, _ = dataset
+    out_dir = tmp_path / "store"
+    build(dataset_dir, out_dir, labels_path)
+    before = shard_mtimes(out_dir)
+
+    build(dataset_dir, out_dir, labels_path)
+    assert shard_mtimes(out_dir) == before
+
+
+def test_interrupted_build_resumes_missing_shards(dataset, tmp_path):
+    dataset_dir, labels_path, _ = dataset
+    out_dir = tmp_path / "store"
+    build(dataset_dir, out_dir, labels_path)
+    X_full, y_full = feature_store.merge(str(out_dir))
+
+    # Simulate an interruption: a.csv's done marker and its last shard never got written
+    shards_dir = out_dir / "shards"
+    done = next(name for name in os.listdir(shards_dir) if name.startswith("a_csv-") and name.endswith(".done.json"))
+    shards = sorted(name for name in os.listdir(shards_dir) if name.startswith("a_csv-") and name.endswith(".npz"))
+    assert len(shards) > 1
+    os.remove(shards_dir / done)
+    os.remove(shards_dir / shards[-1])
+    before = shard_mtimes(out_dir)
+
+    build(dataset_dir, out_dir, labels_path)
+    after = shard_mtimes(out_dir)
+    # Only the missing shard was featurized again
+    assert {name: after[name] for name in before} == before
+    assert set(after) == set(before) | {shards[-1]}
+
+    X, y = feature_store.merge(str(out_dir))
+    np.testing.assert_array_equal(X, X_full)
+    np.testing.assert_array_equal(y, y_full)
+
+
+def test_changed_recording_is_featurized_again(dataset, tmp_path):
+    dataset_dir, labels_path, recordings = dataset
+    out_dir = tmp_path / "store"
+    build(dataset_dir, out_dir, labels_path)
+
+    recordings["a.csv"] = write_recording(dataset_dir / "a.csv", 30, seed=2)
+    build(dataset_dir, out_dir, labels_path)
+    X, _ = feature_store.merge(str(out_dir))
+    expected = [expected_features(recordings[name]) for name in sorted(recordings)]
+    np.testing.assert_allclose(X, np.concatenate(expected), rtol=1e-9, atol=0)
+
+
+def test_merge_drops_unlabeled_windows_unless_asked(tmp_path):
+    dataset_dir = tmp_path / "dataset"
+    seconds = 20
+    # Per-sample status column: label 1 for the second half
+    status = np.repeat([0, 1], seconds * TARGET_SFREQ // 2)
+    write_recording(dataset_dir / "labeled.csv", seconds, seed=0, status=status)
+    write_recording(dataset_dir / "unlabeled.csv", seconds, seed=1)
+    out_dir = tmp_path / "store"
+    feature_store.build(str(dataset_dir), str(out_dir), workers=1, shard_windows=SHARD_WINDOWS)
+
+    _, y = feature_store.merge(str(out_dir))
+    _, y_all = feature_store.merge(str(out_dir), include_unlabeled=True)
+    assert set(y.tolist()) <= {0, 1} and 0 in y and 1 in y
+    assert len(y_all) > len(y)
+    assert (y_all == feature_store.UNLABELED).sum() == len(y_all) - len(y)
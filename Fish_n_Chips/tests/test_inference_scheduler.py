@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from backend.app.inference_scheduler import InferenceScheduler
+from backend.app.metrics import stage_series
+
+N_FEATURES = 4
+
+
+class RecordingModel:
+    """Probability of class 1 is the first feature; rows with NaN make the call fail."""
+
+    def __init__(self, n_features=N_FEATURES):
+        self.n_features_in_ = n_features
+        self.classes_ = np.array([0, 1])
+        self.batch_sizes = []
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        self.batch_sizes.append(len(X))
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+        return np.column_stack([1 - X[:, 0], X[:, 0]])
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def started(model, **kwargs):
+    scheduler = InferenceScheduler(model, "v1", **kwargs)
+    await scheduler.start()
+    return scheduler
+
+
+def test_concurrent_rows_are_scored_in_one_batch():
+    model = RecordingModel()
+
+    async def main():
+        scheduler = await started(model, max_batch_size=32, max_wait_ms=50)
+        try:
+            rows = [np.full(N_FEATURES, i / 10) for i in range(8)]
+            return await asyncio.gather(*(scheduler.predict(row) for row in rows))
+        finally:
+            await scheduler.stop()
+
+    results = run(main())
+    assert model.batch_sizes == [8]
+    for i, (status_class, proba, version) in enumerate(results):
+        assert proba[1] == pytest.approx(i / 10)
+        assert status_class == int(i / 10 > 0.5)
+        assert version == "v1"
+
+
+def test_wrong_sized_row_is_rejected_before_batching():
+    model = RecordingModel()
+
+    async def main():
+        scheduler = await started(model, max_wait_ms=50)
+        try:
+            return await asyncio.gather(
+                scheduler.predict_proba(np.full(N_FEATURES, 0.2)),
+                scheduler.predict_proba(np.zeros(N_FEATURES + 1)),
+                scheduler.predict_proba(np.full(N_FEATURES, 0.7)),
+                return_exceptions=True,
+            )
+        finally:
+            await scheduler.stop()
+
+    good, bad, other = run(main())
+    assert isinstance(bad, ValueError)
+    assert good[0][1] == pytest.approx(0.2)
+    assert other[0][1] == pytest.approx(0.7)
+    assert model.batch_sizes == [2]
+
+
+def test_bad_row_in_a_batch_fails_only_its_own_request():
+    model = RecordingModel()
+
+    async def main():
+        scheduler = await started(model, max_wait_ms=50)
+        try:
+            rows = [np.full(N_FEATURES, 0.1), np.full(N_FEATURES, np.nan), np.full(N_FEATURES, 0.9)]
+            return await asyncio.gather(*(scheduler.predict_proba(row) for row in rows), return_exceptions=True)
+        finally:
+            await scheduler.stop()
+
+    first, bad, last = run(main())
+    assert isinstance(bad, ValueError)
+    assert first[0][1] == pytest.approx(0.1)
+    assert last[0][1] == pytest.approx(0.9)
+    # The batch call failed, then each row was scored on its own
+    assert model.batch_sizes == [3, 1, 1, 1]
+
+
+def test_swap_applies_to_later_batches():
+    first, second = RecordingModel(), RecordingModel()
+
+    async def main():
+        scheduler = await started(first, max_wait_ms=1)
+        try:
+            _, version_before = await scheduler.predict_proba(np.zeros(N_FEATURES))
+            scheduler.swap(second, "v2")
+            _, version_after = await scheduler.predict_proba(np.zeros(N_FEATURES))
+            return version_before, version_after
+        finally:
+            await scheduler.stop()
+
+    assert run(main()) == ("v1", "v2")
+    assert first.batch_sizes == [1] and second.batch_sizes == [1]
+
+
+def test_submit_requires_a_running_scheduler():
+    scheduler = InferenceScheduler(RecordingModel())
+    with pytest.raises(RuntimeError):
+        run(scheduler.predict_proba(np.zeros(N_FEATURES)))
+
+
+class SlowModel(RecordingModel):
+    def __init__(self, delay, fail=False):
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+
+    def predict_proba(self, X):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("shadow broke")
+        return super().predict_proba(X)
+
+
+def test_shadow_scoring_does_not_delay_live_batches():
+    shadow = SlowModel(0.5)
+    compared = []
+
+    async def main():
+        scheduler = await started(RecordingModel(), max_wait_ms=1)
+        scheduler.on_shadow = lambda version, active, shadow_proba: compared.append((version, active, shadow_proba))
+        scheduler.swap(scheduler.model, "v2", [("v1", shadow)])
+        try:
+            begin = time.perf_counter()
+            await scheduler.predict_proba(np.full(N_FEATURES, 0.3))
+            await scheduler.predict_proba(np.full(N_FEATURES, 0.4))
+            live_sec = time.perf_counter() - begin
+            assert scheduler.shadow_pending() >= 1
+            # Let the shadow tasks finish
+            while scheduler.shadow_pending():
+                await asyncio.sleep(0.05)
+            return live_sec
+        finally:
+            await scheduler.stop()
+
+    assert run(main()) < 0.4
+    assert [version for version, _, _ in compared] == ["v1", "v1"]
+    for _, active, shadow_proba in compared:
+        np.testing.assert_allclose(active, shadow_proba)
+
+
+def test_shadow_failure_is_logged_and_counted(caplog):
+    errors_before = stage_series("shadow_predict_proba").errors
+
+    async def main():
+        scheduler = await started(RecordingModel(), max_wait_ms=1)
+        scheduler.swap(scheduler.model, "v2", [("v1", SlowModel(0.0, fail=True))])
+        try:
+            proba, version = await scheduler.predict_proba(np.full(N_FEATURES, 0.3))
+            while scheduler.shadow_pending():
+                await asyncio.sleep(0.01)
+            return proba, version
+        finally:
+            await scheduler.stop()
+
+    with caplog.at_level(logging.ERROR, logger="backend.app.inference_scheduler"):
+        proba, version = run(main())
+    assert version == "v2" and proba[1] == pytest.approx(0.3)
+    assert stage_series("shadow_predict_proba").errors == errors_before + 1
+    assert any("Shadow model v1 failed" in record.getMessage() and record.exc_info for record in caplog.records)
@@ -0,0 +1,110 @@
+import asyncio
+import re
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from backend.app.metrics import (
+    CONTENT_TYPE, LATENCY_BUCKETS, MetricsMiddleware, register_gauge, render, stage, stage_series
+)
+
+
+def sample(text, name, **labels):
+    """Value of one sample in a Prometheus text exposition, or None."""
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_stage_context_manager_and_decorators():
+    with stage("test_block"):
+        pass
+    with pytest.raises(ValueError):
+        with stage("test_block"):
+            raise ValueError("boom")
+
+    @stage("test_sync")
+    def double(x):
+        return 2 * x
+
+    @stage("test_async")
+    async def fail():
+        raise RuntimeError("boom")
+
+    assert double(3) == 6
+    assert double.__name__ == "double"
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+
+    text = render()
+    assert sample(text, "cognisafe_stage_duration_seconds_count", stage="test_block") == 2
+    assert sample(text, "cognisafe_stage_errors_total", stage="test_block") == 1
+    assert sample(text, "cognisafe_stage_errors_total", stage="test_sync") == 0
+    assert sample(text, "cognisafe_stage_errors_total", stage="test_async") == 1
+    assert sample(text, "cognisafe_stage_in_flight", stage="test_async") == 0
+
+
+def test_histogram_buckets_are_cumulative():
+    series = stage_series("test_histogram")
+    for elapsed in (0.0002, 0.003, 0.003, 0.7, 100.0):
+        series.observe(elapsed)
+
+    text = render()
+    buckets = [sample(text, "cognisafe_stage_duration_seconds_bucket", stage="test_histogram", le=repr(bound))
+               for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert sample(text, "cognisafe_stage_duration_seconds_bucket", stage="test_histogram", le="0.0005") == 1
+    assert sample(text, "cognisafe_stage_duration_seconds_bucket", stage="test_histogram", le="0.005") == 3
+    assert sample(text, "cognisafe_stage_duration_seconds_bucket", stage="test_histogram", le="1.0") == 4
+    assert sample(text, "cognisafe_stage_duration_seconds_bucket", stage="test_histogram", le="+Inf") == 5
+    assert sample(text, "cognisafe_stage_duration_seconds_sum", stage="test_histogram") == pytest.approx(100.7062)
+
+
+def test_gauges_are_read_at_scrape_time():
+    depth = [3]
+    register_gauge("test_queue_depth", "Rows waiting.", lambda: depth[0])
+    assert "# TYPE cognisafe_test_queue_depth gauge" in render()
+    assert "cognisafe_test_queue_depth 3.0" in render()
+    depth[0] = 7
+    assert "cognisafe_test_queue_depth 7.0" in render()
+
+    # A failing callback leaves the gauge out instead of failing the scrape
+    register_gauge("test_broken", "Fails.", lambda: 1 / 0)
+    assert "cognisafe_test_broken" not in render()
+
+
+def test_middleware_times_requests_by_route():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        if item_id < 0:
+            raise HTTPException(status_code=500, detail="negative")
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+    client = TestClient(app)
+    for item_id in (1, 2, -1):
+        client.get(f"/items/{item_id}")
+    client.get("/nowhere/at/all")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+    # Route templates, not concrete paths
+    assert sample(text, "cognisafe_http_request_duration_seconds_count", method="GET", route="/items/{item_id}") == 3
+    assert sample(text, "cognisafe_http_request_errors_total", method="GET", route="/items/{item_id}") == 1
+    assert sample(text, "cognisafe_http_request_duration_seconds_count", method="GET", route="unmatched") >= 1
+    assert "/items/1" not in text and "/nowhere" not in text
+    assert "cognisafe_http_requests_in_flight 1.0" in text
+
+
+def test_label_values_are_escaped():
+    stage_series('test "quoted"\nname').observe(0.001)
+    assert 'stage="test \\"quoted\\"\\nname"' in render()
@@ -0,0 +1,117 @@
+import asyncio
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.app.model_registry import VERSION_HASH_CHARS, ModelRegistry
+from backend.app.prediction_cache import hash_file
+from backend.app.utils.tree_ensemble import TREE_MODEL_BACKEND
+
+X = np.random.RandomState(0).randn(200, 6)
+Y = (X[:, 0] > 0).astype(int)
+
+
+def fit(seed):
+    return RandomForestClassifier(n_estimators=5, max_depth=4, random_state=seed).fit(X, Y)
+
+
+def deploy(model, path):
+    """Replace the served file the way a deployment should: write next to it, then os.replace."""
+    tmp_path = f"{path}.new"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "eeg_best_model.joblib"), str(tmp_path / "cache"),
+                         keep_versions=2, poll_sec=0.01)
+
+
+def test_missing_model_file(registry):
+    assert registry.refresh() is None
+    assert registry.active is None
+
+
+def test_loads_version_named_after_content(registry):
+    model = fit(0)
+    deploy(model, registry.model_path)
+
+    version = registry.refresh()
+    assert registry.active is version
+    assert version.fingerprint == hash_file(registry.model_path)
+    assert version.version == f"eeg_best_model-{version.fingerprint[:VERSION_HASH_CHARS]}"
+    np.testing.assert_allclose(version.model.predict_proba(X), model.predict_proba(X))
+    if TREE_MODEL_BACKEND == "compiled":
+        # Arrays are read-only maps of the materialized file
+        assert isinstance(version.model.threshold, np.memmap)
+        assert not version.model.threshold.flags.writeable
+
+    # Unchanged file, or a new file with the same content: nothing to do
+    assert registry.refresh() is None
+    deploy(model, registry.model_path)
+    assert registry.refresh() is None
+    assert registry.active is version
+
+
+def test_keeps_previous_versions_and_cleans_up_evicted_ones(registry):
+    versions = []
+    for seed in range(4):
+        deploy(fit(seed), registry.model_path)
+        versions.append(registry.refresh())
+
+    assert registry.active is versions[3]
+    assert registry.shadows() == [versions[2]]
+    assert len({v.version for v in versions}) == 4
+    # Evicted files are deleted one swap later, so running requests can still open them
+    assert not os.path.exists(versions[0].path)
+    assert os.path.exists(versions[1].path)
+    assert all(os.path.exists(v.path) for v in registry.versions)
+
+
+def test_rollback_reuses_kept_version(registry):
+    first, second = fit(0), fit(1)
+    deploy(first, registry.model_path)
+    v1 = registry.refresh()
+    deploy(second, registry.model_path)
+    v2 = registry.refresh()
+
+    deploy(first, registry.model_path)
+    assert registry.refresh() is v1
+    assert registry.shadows() == [v2]
+
+
+def test_shadow_stats(registry):
+    active = np.array([[0.9, 0.1], [0.2, 0.8], [0.6, 0.4]])
+    shadow = np.array([[0.8, 0.2], [0.7, 0.3], [0.6, 0.4]])
+    registry.record_shadow("v1", active, shadow)
+    registry.record_shadow("v1", active[:1], active[:1])
+
+    stats = registry.shadow_stats()["v1"]
+    assert stats["rows"] == 4
+    assert stats["disagreement_rate"] == pytest.approx(1 / 4)
+    assert stats["mean_abs_diff"] == pytest.approx((0.1 + 0.5) / 4)
+
+
+def test_watch_swaps_on_change(registry):
+    swapped = []
+
+    async def on_swap(version):
+        swapped.append(version)
+
+    async def run():
+        deploy(fit(0), registry.model_path)
+        watcher = asyncio.create_task(registry.watch(on_swap))
+        try:
+            for _ in range(500):
+                await asyncio.sleep(0.01)
+                if swapped:
+                    break
+        finally:
+            watcher.cancel()
+
+    asyncio.run(run())
+    assert swapped == [registry.active]
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.pause_analyzer import (
+    LONG_PAUSE_SEC, detect_pause_grid, detect_pauses_from_audio, find_pauses, pause_grid, silent_runs
+)
+from backend.app.services.speech.spectral_features import NOISE_FLOOR_PERCENTILE, SILENCE_MARGIN_DB
+from benchmarks.pitch import synth_voice
+
+STAT_KEYS = ("avg_pause_duration", "max_pause", "long_pause_count", "pause_count", "pause_variability",
+             "total_pause_time")
+
+
+def loop_pauses(is_silent, times, min_silence_duration):
+    """The frame loop detect_pauses_from_audio used before find_pauses."""
+    pauses = []
+    pause_start = None
+    for silent, time in zip(is_silent, times):
+        if silent and pause_start is None:
+            pause_start = time
+        elif not silent and pause_start is not None:
+            if time - pause_start >= min_silence_duration:
+                pauses.append({"start": pause_start, "end": time, "duration": time - pause_start})
+            pause_start = None
+    if pause_start is not None and times[-1] - pause_start >= min_silence_duration:
+        pauses.append({"start": pause_start, "end": times[-1], "duration": times[-1] - pause_start})
+    return pauses
+
+
+def pause_stats(durations):
+    """The statistics detect_pauses_from_audio reports for a list of pause durations."""
+    return {
+        "avg_pause_duration": float(np.mean(durations)) if durations else 0.0,
+        "max_pause": float(np.max(durations)) if durations else 0.0,
+        "long_pause_count": len([d for d in durations if d > LONG_PAUSE_SEC]),
+        "pause_count": len(durations),
+        "pause_variability": float(np.std(durations)) if len(durations) > 1 else 0.0,
+        "total_pause_time": float(sum(durations)),
+    }
+
+
+def test_silent_runs_edges():
+    starts, ends = silent_runs(np.array([1, 1, 0, 0, 1, 0, 1, 1], dtype=bool))
+    assert starts.tolist() == [0, 4, 6]
+    # A run reaching the end stops at the last frame
+    assert ends.tolist() == [2, 5, 7]
+    assert [r.tolist() for r in silent_runs(np.zeros(5, dtype=bool))] == [[], []]
+    assert [r.tolist() for r in silent_runs(np.ones(3, dtype=bool))] == [[0], [2]]
+
+
+def test_find_pauses_matches_frame_loop():
+    rng = np.random.RandomState(0)
+    for trial in range(300):
+        n_frames = rng.randint(1, 400)
+        # Runs of varying length: sticky random masks, some all silent or all voiced
+        p_switch = rng.uniform(0.01, 0.5)
+        mask = np.cumsum(rng.rand(n_frames) < p_switch) % 2 == rng.randint(2)
+        times = np.arange(n_frames) * 0.01
+        min_duration = rng.choice([0.0, 0.05, 0.2, 0.3, 1.0])
+
+        assert find_pauses(mask, times, min_duration) == pytest.approx(loop_pauses(mask, times, min_duration)), trial
+
+
+def test_pause_grid_matches_each_setting():
+    rng = np.random.RandomState(1)
+    margins, min_durations = (3, 6, 10, 20), (0.0, 0.1, 0.3, 0.9)
+    for _ in range(20):
+        n_frames = rng.randint(50, 600)
+        rms_db = np.cumsum(rng.randn(n_frames)) * 2 - 40
+        times = np.arange(n_frames) * 0.01
+
+        grid = pause_grid(rms_db, times, margins, min_durations)
+        assert len(grid) == len(margins) * len(min_durations)
+        for result, (margin, min_duration) in zip(grid, [(m, d) for m in margins for d in min_durations]):
+            assert (result["silence_margin_db"], result["min_silence_duration"]) == (margin, min_duration)
+            silent = rms_db < np.percentile(rms_db, NOISE_FLOOR_PERCENTILE) + margin
+            durations = [p["duration"] for p in find_pauses(silent, times, min_duration)]
+            expected = pause_stats(durations)
+            for key in STAT_KEYS:
+                assert result[key] == pytest.approx(expected[key], rel=1e-12, abs=1e-12), key
+
+
+def test_pause_grid_of_empty_recording():
+    results = pause_grid(np.array([]), np.array([]), (6,), (0.3,))
+    assert results[0]["pause_count"] == 0 and results[0]["total_pause_time"] == 0.0
+
+
+def test_grid_agrees_with_detect_pauses_from_audio():
+    samples, _ = synth_voice(140, 4.0, SPEECH_SAMPLE_RATE, seed=3)
+    samples[SPEECH_SAMPLE_RATE:2 * SPEECH_SAMPLE_RATE] *= 0.01
+    audio = AudioBuffer(samples.astype(np.float32), SPEECH_SAMPLE_RATE)
+
+    detected = detect_pauses_from_audio(audio, min_silence_duration=0.3)
+    grid = detect_pause_grid(audio, margins_db=(SILENCE_MARGIN_DB,), min_durations=(0.3,))[0]
+    assert detected["pause_count"] >= 1
+    for key in STAT_KEYS:
+        assert grid[key] == pytest.approx(detected[key], rel=1e-12, abs=1e-12), key
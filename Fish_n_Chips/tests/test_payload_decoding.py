@@ -0,0 +1,127 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+
+from backend.app.data_processing import (
+    MSGPACK_CONTENT_TYPES, NPY_CONTENT_TYPES, RAW_EEG_CONTENT_TYPE, TARGET_SFREQ,
+    decode_eeg_payload, parse_msgpack, parse_npy, parse_raw_float32
+)
+
+msgpack = pytest.importorskip("msgpack")
+
+EEG = np.random.RandomState(0).randn(512, 16).astype(np.float32)
+
+
+def npy_bytes(array):
+    buf = io.BytesIO()
+    np.save(buf, array)
+    return buf.getvalue()
+
+
+def assert_400(func, *args):
+    with pytest.raises(HTTPException) as excinfo:
+        func(*args)
+    assert excinfo.value.status_code == 400
+    return excinfo.value.detail
+
+
+def test_raw_float32():
+    np.testing.assert_array_equal(parse_raw_float32(EEG.tobytes()), EEG)
+    np.testing.assert_array_equal(parse_raw_float32(EEG[:, :8].tobytes(), "512,8"), EEG[:, :8])
+
+
+@pytest.mark.parametrize("body, shape", [
+    (EEG.tobytes()[:-1], None),           # not whole float32 values
+    (EEG[:5, :3].tobytes(), None),        # not a multiple of 16 channels
+    (EEG.tobytes(), "512,15"),            # shape does not match
+    (EEG.tobytes(), "a,b"),
+    (EEG.tobytes(), "8192"),
+], ids=["partial-value", "channels", "shape-mismatch", "shape-text", "shape-1d"])
+def test_raw_float32_errors(body, shape):
+    assert_400(parse_raw_float32, body, shape)
+
+
+@pytest.mark.parametrize("array", [EEG, np.asfortranarray(EEG), EEG.astype(np.float64)])
+def test_npy(array):
+    np.testing.assert_array_equal(parse_npy(npy_bytes(array)), array)
+
+
+@pytest.mark.parametrize("body", [
+    npy_bytes(EEG)[:-4],                               # truncated data
+    b"not an npy file",
+    npy_bytes(np.array([[1, "a"]], dtype=object)),
+], ids=["truncated", "garbage", "object"])
+def test_npy_errors(body):
+    assert_400(parse_npy, body)
+
+
+def test_msgpack_bytes_and_lists():
+    data, fs = parse_msgpack(msgpack.packb({"eeg": EEG.tobytes(), "shape": [512, 16], "sampling_rate": 128}))
+    np.testing.assert_array_equal(data, EEG)
+    assert fs == 128
+
+    data, fs = parse_msgpack(msgpack.packb({"eeg": EEG[:4].tolist()}))
+    np.testing.assert_array_equal(data, EEG[:4])
+    assert fs == TARGET_SFREQ
+
+
+@pytest.mark.parametrize("payload", [
+    [1, 2, 3],                                              # not a map
+    {"data": []},                                           # no eeg
+    {"eeg": EEG.tobytes()[:-2], "shape": [512, 16]},        # partial float32
+    {"eeg": EEG.tobytes(), "shape": [16, 16]},              # shape does not match
+    {"eeg": EEG.tobytes()},                                 # no shape
+    {"eeg": [[1.0, 2.0], [3.0]]},                           # ragged rows
+    {"eeg": [[1.0, "x"]]},
+    {"eeg": [1.0, 2.0, 3.0]},                               # not [samples, channels]
+])
+def test_msgpack_errors(payload):
+    assert_400(parse_msgpack, msgpack.packb(payload))
+
+
+def test_msgpack_garbage():
+    assert_400(parse_msgpack, b"\xc1\xc1\xc1")
+
+
+@pytest.mark.parametrize("sampling_rate", [0, 0.0, "", "x", -256, 0.5, 255.5, None, float("nan"), float("inf")])
+def test_msgpack_rejects_bad_sampling_rates(sampling_rate):
+    detail = assert_400(parse_msgpack, msgpack.packb({"eeg": EEG[:4].tolist(), "sampling_rate": sampling_rate}))
+    assert "Sampling rate" in detail
+
+
+@pytest.mark.parametrize("sampling_rate, expected", [(256, 256), (512.0, 512), ("128", 128)])
+def test_msgpack_accepts_whole_sampling_rates(sampling_rate, expected):
+    _, fs = parse_msgpack(msgpack.packb({"eeg": EEG[:4].tolist(), "sampling_rate": sampling_rate}))
+    assert fs == expected
+
+
+def test_decode_uses_the_header_only_for_raw_and_npy():
+    headers = {"content-type": RAW_EEG_CONTENT_TYPE, "x-sampling-rate": "128"}
+    assert decode_eeg_payload(EEG.tobytes(), headers)[1] == 128
+    headers = {"content-type": NPY_CONTENT_TYPES[0]}
+    assert decode_eeg_payload(npy_bytes(EEG), headers)[1] == TARGET_SFREQ
+
+    for content_type, body in [(RAW_EEG_CONTENT_TYPE, EEG.tobytes()), (NPY_CONTENT_TYPES[0], npy_bytes(EEG))]:
+        for bad in ("abc", "0", "-1", "nan"):
+            assert_400(decode_eeg_payload, body, {"content-type": content_type, "x-sampling-rate": bad})
+
+    # A stray header does not affect bodies that carry their own rate
+    stray = {"x-sampling-rate": "abc"}
+    body = msgpack.packb({"eeg": EEG[:4].tolist(), "sampling_rate": 128})
+    assert decode_eeg_payload(body, {"content-type": MSGPACK_CONTENT_TYPES[0], **stray})[1] == 128
+    body = json.dumps({"eeg": EEG[:4].tolist(), "sampling_rate": 128}).encode()
+    data, fs = decode_eeg_payload(body, {"content-type": "application/json; charset=utf-8", **stray})
+    assert fs == 128
+    np.testing.assert_allclose(data, EEG[:4])
+
+
+def test_decode_errors():
+    with pytest.raises(RequestValidationError):
+        decode_eeg_payload(b'{"eeg": "nope"}', {"content-type": "application/json"})
+    with pytest.raises(HTTPException) as excinfo:
+        decode_eeg_payload(b"", {"content-type": "text/plain"})
+    assert excinfo.value.status_code == 415
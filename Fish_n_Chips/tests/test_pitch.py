@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.pitch import estimate_pitch, yin
+from benchmarks.pitch import FIXTURE_DURATION_SEC, VOICES, frame_errors, frame_times, pitch_stats, synth_voice
+
+SR = SPEECH_SAMPLE_RATE
+
+
+def fixture(base_f0, seed):
+    samples, f0_at = synth_voice(base_f0, FIXTURE_DURATION_SEC, SR, seed)
+    return AudioBuffer(samples, SR), f0_at
+
+
+@pytest.mark.parametrize("base_f0, seed", VOICES)
+def test_yin_tracks_known_f0(base_f0, seed):
+    audio, f0_at = fixture(base_f0, seed)
+    f0 = estimate_pitch(audio, "yin")
+    truth = f0_at(frame_times("yin", len(f0), SR))
+
+    errors = frame_errors(f0, truth)
+    assert errors["gross_error_rate"] <= 0.01
+    assert errors["fine_error_cents"] < 20
+    assert errors["voicing_recall"] > 0.9
+    stats, true_stats = pitch_stats(f0), pitch_stats(truth)
+    assert stats["pitch_mean"] == pytest.approx(true_stats["pitch_mean"], abs=1.0)
+    assert stats["pitch_std"] == pytest.approx(true_stats["pitch_std"], rel=0.1)
+
+
+@pytest.mark.parametrize("base_f0, seed", [VOICES[1], VOICES[4]])
+def test_yin_agrees_with_pyin(base_f0, seed):
+    audio, f0_at = fixture(base_f0, seed)
+    yin_stats = pitch_stats(estimate_pitch(audio, "yin"))
+    pyin_f0 = estimate_pitch(audio, "pyin")
+    pyin_stats = pitch_stats(pyin_f0)
+
+    assert frame_errors(pyin_f0, f0_at(frame_times("pyin", len(pyin_f0), SR)))["gross_error_rate"] <= 0.01
+    # pitch_mean, the feature the model sees, barely depends on the backend
+    assert yin_stats["pitch_mean"] == pytest.approx(pyin_stats["pitch_mean"], rel=0.01)
+
+
+def test_pure_tone():
+    t = np.arange(SR) / SR
+    f0 = yin(0.5 * np.sin(2 * np.pi * 180 * t), SR)
+    assert np.isfinite(f0).all()
+    np.testing.assert_allclose(f0, 180, rtol=1e-3)
+
+
+def test_silence_and_short_input_are_unvoiced():
+    assert np.isnan(yin(np.zeros(SR), SR)).all()
+    # Shorter than one integration window plus the longest lag
+    assert len(yin(np.zeros(100), SR)) == 0
@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+import pytest
+
+from backend.app import prediction_cache as cache_module
+from backend.app.prediction_cache import PredictionCache, hash_stream
+
+
+@pytest.fixture
+def cache(tmp_path):
+    model_path = tmp_path / "model.joblib"
+    model_path.write_bytes(b"model v1")
+    cache = PredictionCache(str(tmp_path / "cache"), max_bytes=1 << 20, enabled=True)
+    cache.set_model(str(model_path))
+    return cache
+
+
+def test_features_key_changes_with_content_parameters_and_pipeline(cache, monkeypatch):
+    content_hash = hash_stream(io.BytesIO(b"recording"))
+    key = cache.features_key(content_hash, "csv", 256)
+
+    assert cache.features_key(content_hash, "csv", 256) == key
+    assert cache.features_key(hash_stream(io.BytesIO(b"recording2")), "csv", 256) != key
+    assert cache.features_key(content_hash, "edf", 256) != key
+    assert cache.features_key(content_hash, "csv", 128) != key
+
+    monkeypatch.setattr(cache_module, "FEATURE_PIPELINE_VERSION", "next")
+    assert cache.features_key(content_hash, "csv", 256) != key
+    monkeypatch.undo()
+
+    monkeypatch.setattr(cache_module, "filter_config", lambda: "bp1-40/4|notch60/30")
+    assert cache.features_key(content_hash, "csv", 256) != key
+
+
+def test_hash_stream_rewinds():
+    stream = io.BytesIO(b"x" * 10)
+    stream.seek(5)
+    first = hash_stream(stream)
+    assert stream.tell() == 0
+    assert hash_stream(stream) == first
+
+
+def test_prediction_key_changes_with_model_and_params(cache, tmp_path):
+    features_key = cache.features_key("abc", "csv", 256)
+    key = cache.prediction_key(features_key, windowed=True, window_size_sec=4, step_size_sec=2)
+
+    # Parameter order does not matter, values do
+    assert cache.prediction_key(features_key, step_size_sec=2, window_size_sec=4, windowed=True) == key
+    assert cache.prediction_key(features_key, windowed=True, window_size_sec=6, step_size_sec=2) != key
+    assert cache.prediction_key(features_key, windowed=False) != key
+
+    model_path = tmp_path / "model.joblib"
+    model_path.write_bytes(b"model v2")
+    cache.set_model(str(model_path))
+    assert cache.prediction_key(features_key, windowed=True, window_size_sec=4, step_size_sec=2) != key
+
+
+def test_model_change_drops_predictions_but_keeps_features(cache, tmp_path):
+    features_key = cache.features_key("abc", "csv", 256)
+    features = np.arange(6, dtype=np.float64).reshape(2, 3)
+    cache.put_features(features_key, features)
+    prediction_key = cache.prediction_key(features_key, windowed=False)
+    cache.put_prediction(prediction_key, {"probability": 0.5})
+    assert cache.get_prediction(prediction_key) == {"probability": 0.5}
+
+    # Same model content again: nothing is invalidated
+    cache.set_model(str(tmp_path / "model.joblib"))
+    assert cache.get_prediction(prediction_key) == {"probability": 0.5}
+
+    (tmp_path / "model.joblib").write_bytes(b"model v2")
+    cache.set_model(str(tmp_path / "model.joblib"))
+    assert cache.get_prediction(prediction_key) is None
+    np.testing.assert_array_equal(cache.get_features(features_key), features)
+
+
+def test_model_change_is_detected_across_restarts(cache, tmp_path):
+    prediction_key = cache.prediction_key(cache.features_key("abc", "csv", 256), windowed=False)
+    cache.put_prediction(prediction_key, {"probability": 0.5})
+
+    (tmp_path / "model.joblib").write_bytes(b"model v2")
+    restarted = PredictionCache(cache.directory, max_bytes=1 << 20, enabled=True)
+    # Entries are found on disk, but unusable until a model is bound
+    assert restarted.get_prediction(prediction_key) is None
+    restarted.set_model(str(tmp_path / "model.joblib"))
+    assert restarted.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PredictionCache(str(tmp_path), max_bytes=3000, enabled=True)
+    features = np.zeros(100)  # 800 bytes + .npy header
+    for key in ("a", "b", "c"):
+        cache.put_features(key, features)
+    cache.get_features("a")
+    cache.put_features("d", features)
+
+    assert cache.get_features("b") is None
+    assert cache.get_features("a") is not None
+    assert cache.stats()["evictions"] == 1
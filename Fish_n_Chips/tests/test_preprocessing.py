@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi, sosfiltfilt, sosfreqz
+
+from backend.app.artifacts import screen_recording
+from backend.app.preprocessing import StreamingFilter, design_sos, filter_eeg
+from benchmarks.synthetic import generate_eeg
+
+FS = 256
+
+
+@pytest.fixture
+def eeg():
+    # DC offsets per channel, as headsets deliver them
+    return generate_eeg(30, n_channels=4, fs=FS) + np.array([300.0, -150.0, 0.0, 40.0])
+
+
+def test_design_is_cached_and_shaped():
+    sos = design_sos(FS)
+    assert design_sos(FS) is sos
+    assert sos.shape[1] == 6
+    _, h = sosfreqz(sos, worN=[1.0, 10.0, 50.0, 100.0], fs=FS)
+    gain = np.abs(h)
+    assert gain[1] == pytest.approx(1.0, abs=0.01)
+    assert gain[2] < 0.01 and gain[3] < 0.01
+    # Band edge at or above Nyquist: highpass only
+    assert len(design_sos(80)) < len(sos)
+
+
+def test_filter_eeg_matches_per_channel_sosfiltfilt(eeg):
+    filtered = filter_eeg(eeg, FS)
+    sos = design_sos(FS)
+    for ch in range(eeg.shape[1]):
+        np.testing.assert_allclose(filtered[:, ch], sosfiltfilt(sos, eeg[:, ch]), rtol=1e-10, atol=1e-10)
+
+    as_float32 = filter_eeg(eeg.astype(np.float32), FS)
+    assert as_float32.dtype == np.float32
+    np.testing.assert_allclose(as_float32, filtered, atol=1e-3)
+    # Segments shorter than the default edge padding still filter
+    assert filter_eeg(eeg[:10], FS).shape == (10, 4)
+
+
+def test_streaming_matches_one_sosfilt_in_uneven_blocks(eeg):
+    sos = design_sos(FS)
+    zi = sosfilt_zi(sos)[:, :, np.newaxis] * eeg[0]
+    expected, _ = sosfilt(sos, eeg, axis=0, zi=zi)
+
+    rng = np.random.RandomState(0)
+    bounds = np.sort(rng.choice(np.arange(1, len(eeg)), 96, replace=False))
+    blocks = np.split(eeg, bounds)
+    assert len(blocks) == 97
+
+    stream = StreamingFilter(FS)
+    streamed = np.concatenate(list(stream.filter_blocks(blocks)))
+    np.testing.assert_allclose(streamed, expected, rtol=1e-12, atol=1e-9)
+
+
+def test_streaming_state_starts_at_steady_state(eeg):
+    stream = StreamingFilter(FS)
+    first = stream.push(eeg[:FS])
+    # The DC offsets are removed without a large onset transient
+    assert np.abs(first).max() < 200
+
+    stream.push(np.empty((0, 4)))
+    stream.reset()
+    np.testing.assert_array_equal(stream.push(eeg[:FS]), first)
+
+
+def test_filtered_flat_channel_is_still_rejected(eeg):
+    eeg[10 * FS:20 * FS, 2] = 55.0
+    _, clean = screen_recording(filter_eeg(eeg, FS), FS, 4, 2)
+    assert not clean[6]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from backend.app.pyramid import PYRAMID_FACTOR, build_pyramid, open_pyramid, pyramid_path
+
+FS = 256
+
+
+@pytest.fixture
+def recording(tmp_path):
+    data = np.random.RandomState(0).randn(100_003, 3).astype(np.float32)
+    build_pyramid(data, FS, pyramid_path("rec", str(tmp_path)))
+    return data, open_pyramid("rec", str(tmp_path))
+
+
+def expected_view(data, pyramid, start, end, px):
+    """The same columns reduced straight from the raw samples."""
+    span = end - start
+    bin_samples = 1
+    for level_bin, _ in pyramid.levels[1:]:
+        if level_bin * px > span:
+            break
+        bin_samples = level_bin
+    first = start // bin_samples * bin_samples
+    last = min(-(-end // bin_samples) * bin_samples, len(data))
+    n_bins = -(-(last - first) // bin_samples)
+    columns = min(px, n_bins)
+    edges = (np.arange(columns) * n_bins) // columns * bin_samples
+    out = np.empty((2 * columns, data.shape[1]), dtype=np.float32)
+    out[0::2] = np.minimum.reduceat(data[first:last], edges, axis=0)
+    out[1::2] = np.maximum.reduceat(data[first:last], edges, axis=0)
+    return first, last, out
+
+
+def test_levels_shrink_by_the_factor(recording):
+    data, pyramid = recording
+    assert (pyramid.fs, pyramid.n_channels, pyramid.n_samples) == (FS, 3, len(data))
+    np.testing.assert_array_equal(pyramid.levels[0][1], data)
+    bins = [bin_samples for bin_samples, _ in pyramid.levels]
+    assert bins == [PYRAMID_FACTOR ** i for i in range(len(bins))]
+
+
+@pytest.mark.parametrize("start, end, px", [
+    (0, 100_003, 1000),
+    (12_345, 67_891, 700),
+    (99_000, 100_003, 300),
+    (5, 100_000, 37),
+    (1_000, 3_001, 1000),
+])
+def test_views_match_raw_min_max(recording, start, end, px):
+    data, pyramid = recording
+    first, last, view = pyramid.view(start, end, px)
+    exp_first, exp_last, expected = expected_view(data, pyramid, start, end, px)
+    assert (first, last) == (exp_first, exp_last)
+    assert first <= start and last >= min(end, len(data))
+    assert len(view) <= 2 * px
+    np.testing.assert_array_equal(view, expected)
+
+
+def test_short_ranges_are_raw(recording):
+    data, pyramid = recording
+    first, last, view = pyramid.view(500, 900, 1000)
+    assert (first, last) == (500, 900)
+    np.testing.assert_array_equal(view, data[500:900])
+    assert pyramid.view(200, 100, 10)[2].shape == (0, 3)
+
+
+def test_open_pyramid_is_reused_until_rebuilt(recording, tmp_path):
+    _, pyramid = recording
+    directory = str(tmp_path)
+    assert open_pyramid("rec", directory) is pyramid
+    assert open_pyramid("missing", directory) is None
+
+    other = np.ones((1000, 2), dtype=np.float32)
+    build_pyramid(other, FS, pyramid_path("rec", directory))
+    reopened = open_pyramid("rec", directory)
+    assert reopened is not pyramid
+    assert reopened.n_channels == 2
+    np.testing.assert_array_equal(reopened.levels[0][1], other)
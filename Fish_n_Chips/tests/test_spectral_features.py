@@ -0,0 +1,126 @@
+import librosa
+import numpy as np
+import pytest
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.spectral_features import (
+    N_MELS, N_MFCC, NOISE_FLOOR_PERCENTILE, SILENCE_MARGIN_DB, SPECTRAL_ROLLOFF_PERCENT, feature_dependencies,
+    mel_filterbank, stft_params
+)
+from benchmarks.pitch import synth_voice
+
+SR = SPEECH_SAMPLE_RATE
+
+
+@pytest.fixture
+def audio():
+    samples, _ = synth_voice(150, 2.0, SR, seed=0)
+    return AudioBuffer(samples.astype(np.float32), SR)
+
+
+def librosa_kwargs(sr=SR):
+    n_fft, hop_length, win_length = stft_params(sr)
+    return {"n_fft": n_fft, "hop_length": hop_length, "win_length": win_length}
+
+
+def test_stft_params():
+    assert stft_params(16000) == (512, 160, 400)
+    assert stft_params(8000) == (256, 80, 200)
+
+
+def test_graph_matches_librosa(audio):
+    y, kwargs = audio.samples, librosa_kwargs()
+    magnitude = np.abs(librosa.stft(y, **kwargs))
+
+    np.testing.assert_allclose(audio.features.get("magnitude"), magnitude, rtol=1e-6)
+    np.testing.assert_allclose(
+        audio.features.get("mfcc"), librosa.feature.mfcc(y=y, sr=SR, n_mfcc=N_MFCC, n_mels=N_MELS, **kwargs),
+        rtol=1e-4, atol=1e-3
+    )
+    np.testing.assert_allclose(
+        audio.features.get("mel"), librosa.feature.melspectrogram(y=y, sr=SR, n_mels=N_MELS, **kwargs), rtol=1e-4
+    )
+    np.testing.assert_allclose(
+        audio.features.get("spectral_centroid"), librosa.feature.spectral_centroid(y=y, sr=SR, **kwargs)[0],
+        rtol=1e-4
+    )
+    np.testing.assert_allclose(
+        audio.features.get("spectral_bandwidth"), librosa.feature.spectral_bandwidth(y=y, sr=SR, **kwargs)[0],
+        rtol=1e-4
+    )
+    np.testing.assert_allclose(
+        audio.features.get("spectral_rolloff"),
+        librosa.feature.spectral_rolloff(y=y, sr=SR, roll_percent=SPECTRAL_ROLLOFF_PERCENT, **kwargs)[0],
+        rtol=1e-4
+    )
+    np.testing.assert_allclose(
+        audio.features.get("spectral_flatness"), librosa.feature.spectral_flatness(y=y, **kwargs)[0],
+        rtol=1e-3, atol=1e-6
+    )
+    times = audio.features.get("frame_times")
+    assert len(times) == magnitude.shape[1]
+    assert times[1] - times[0] == pytest.approx(0.010)
+
+
+def test_rms_matches_time_domain_level():
+    amplitude = 0.3
+    t = np.arange(SR) / SR
+    audio = AudioBuffer(amplitude * np.sin(2 * np.pi * 440 * t), SR)
+    rms = audio.features.get("rms")
+    # Frames away from the padded edges see a stationary sine
+    np.testing.assert_allclose(rms[5:-5], amplitude / np.sqrt(2), rtol=1e-2)
+
+
+def test_silence_mask_agrees_with_time_domain_rms():
+    samples, _ = synth_voice(150, 4.0, SR, seed=1)
+    samples[SR:SR + SR // 2] *= 0.01
+    audio = AudioBuffer(samples.astype(np.float32), SR)
+
+    # What pause detection framed separately before the shared STFT
+    _, hop_length, win_length = stft_params(SR)
+    rms_db = librosa.amplitude_to_db(
+        librosa.feature.rms(y=audio.samples, frame_length=win_length, hop_length=hop_length)[0], ref=np.max
+    )
+    old_mask = rms_db < np.percentile(rms_db, NOISE_FLOOR_PERCENTILE) + SILENCE_MARGIN_DB
+
+    mask = audio.features.get("silence_mask")
+    assert len(mask) == len(old_mask)
+    assert np.mean(mask == old_mask) >= 0.95
+
+
+def test_features_are_computed_lazily_and_once(audio):
+    mask = audio.features.get("silence_mask")
+    assert set(audio.features.computed()) == {"magnitude", "power", "rms", "rms_db", "noise_floor_db", "silence_mask"}
+    assert audio.features.get("silence_mask") is mask
+
+    power = audio.features.get("power")
+    audio.features.get("mel")
+    assert audio.features.get("power") is power
+    assert feature_dependencies("mfcc") == ["magnitude", "power", "mel", "mel_db", "mfcc"]
+
+
+def test_set_stops_the_walk():
+    audio = AudioBuffer(np.zeros(SR, dtype=np.float32), SR)
+    rms = np.linspace(0.1, 1.0, 50)
+    audio.features.set("rms", rms)
+    np.testing.assert_allclose(audio.features.get("rms_db"), librosa.amplitude_to_db(rms, ref=np.max))
+    # The STFT was never needed
+    assert "magnitude" not in audio.features.computed()
+
+
+def test_unknown_feature():
+    audio = AudioBuffer(np.zeros(100, dtype=np.float32), SR)
+    with pytest.raises(KeyError):
+        audio.features.get("loudness")
+    with pytest.raises(KeyError):
+        audio.features.set("loudness", 1.0)
+    with pytest.raises(KeyError):
+        feature_dependencies("loudness")
+
+
+def test_mel_filterbank_is_cached_and_read_only():
+    n_fft, _, _ = stft_params(SR)
+    basis = mel_filterbank(SR, n_fft)
+    assert mel_filterbank(SR, n_fft) is basis
+    assert basis.shape == (N_MELS, 1 + n_fft // 2)
+    assert not basis.flags.writeable
@@ -0,0 +1,99 @@
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from backend.app.services.speech.audio_buffer import SPEECH_SAMPLE_RATE, AudioBuffer
+from backend.app.services.speech.speech_stream import SpeechStream
+from backend.app.utils.audio_utils import resample_audio
+from benchmarks.pitch import synth_voice
+
+
+def voice(sr, seconds=2.0):
+    samples, _ = synth_voice(160, seconds, sr, seed=0)
+    # Half a second of near-silence before the speech starts
+    return np.concatenate([np.zeros(sr // 2), samples]).astype(np.float32) * 0.5
+
+
+def stream_recording(samples, sr, encoding, chunk_sec=0.037):
+    stream = SpeechStream(sr, encoding)
+    if encoding == "pcm16":
+        data = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    else:
+        data = samples.astype("<f4")
+    chunk = int(chunk_sec * sr)
+    for start in range(0, len(data), chunk):
+        stream.push(data[start:start + chunk].tobytes())
+    return stream, stream.finish()
+
+
+@pytest.mark.parametrize("encoding", ["float32", "pcm16"])
+def test_streamed_features_match_the_whole_recording(encoding):
+    samples = voice(SPEECH_SAMPLE_RATE)
+    stream, audio = stream_recording(samples, SPEECH_SAMPLE_RATE, encoding)
+
+    assert audio.sr == SPEECH_SAMPLE_RATE
+    assert set(audio.features.computed()) >= {"magnitude", "rms"}
+    # The same recording analyzed in one go
+    reference = AudioBuffer(audio.samples, audio.sr)
+    np.testing.assert_allclose(audio.features.get("magnitude"), reference.features.get("magnitude"),
+                               rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(audio.features.get("rms"), reference.features.get("rms"), rtol=1e-4, atol=1e-6)
+    assert stream.speech_start_ms is not None
+
+
+@pytest.mark.parametrize("sr", [8000, 32000, 48000])
+def test_other_rates_are_resampled(sr):
+    samples = voice(sr)
+    stream, audio = stream_recording(samples, sr, "float32")
+
+    assert audio.sr == SPEECH_SAMPLE_RATE
+    np.testing.assert_allclose(audio.samples, resample_audio(samples, sr, SPEECH_SAMPLE_RATE), atol=1e-6)
+    # Nothing streamed at the native rate's framing leaks into the graph
+    assert "magnitude" not in audio.features.computed()
+    reference = AudioBuffer(audio.samples, audio.sr)
+    np.testing.assert_allclose(audio.features.get("rms"), reference.features.get("rms"))
+    # VAD ran at the native rate
+    assert stream.speech_start_ms is not None
+
+
+def test_rejects_unsupported_input():
+    with pytest.raises(ValueError):
+        SpeechStream(44100)
+    with pytest.raises(ValueError):
+        SpeechStream(SPEECH_SAMPLE_RATE, "mp3")
+    stream = SpeechStream(SPEECH_SAMPLE_RATE, "pcm16")
+    with pytest.raises(ValueError):
+        stream.push(b"\x00\x00\x00")
+    stream.finish()
+    with pytest.raises(ValueError):
+        stream.push(b"\x00\x00")
+
+
+def test_analysis_failure_is_logged_not_sent(monkeypatch, caplog):
+    # The router pulls in the full speech analysis stack
+    router_module = pytest.importorskip("backend.app.routers.speech_stream")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.app.database import get_db
+
+    def analyze_recording(*args):
+        raise RuntimeError("secret path /srv/models/whisper")
+
+    monkeypatch.setattr(router_module, "analyze_recording", analyze_recording)
+    app = FastAPI()
+    app.include_router(router_module.router)
+    app.dependency_overrides[get_db] = lambda: None
+
+    samples = voice(SPEECH_SAMPLE_RATE, seconds=0.5)
+    with caplog.at_level(logging.ERROR, logger=router_module.__name__):
+        with TestClient(app).websocket_connect("/ws/speech/stream?session_id=s&stimulus_sentence=hi") as ws:
+            ws.send_bytes((samples * 32767).astype("<i2").tobytes())
+            ws.send_text(json.dumps({"type": "end"}))
+            message = json.loads(ws.receive_text())
+            while message.get("type") == "progress":
+                message = json.loads(ws.receive_text())
+
+    assert message == {"error": "Internal error while analyzing the recording"}
+    assert any(record.exc_info and "secret path" in str(record.exc_info[1]) for record in caplog.records)
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from backend.app import streaming
+from backend.app.streaming import (
+    FRAME_HEADER, EEGRingBuffer, decode_frame, encode_frame, minmax_decimate, pending_jobs, run_bounded
+)
+from benchmarks.synthetic import generate_eeg
+
+
+@pytest.fixture
+def samples():
+    return (np.random.RandomState(0).randn(1024, 16) * 40).astype(np.float32)
+
+
+def test_float32_frame_round_trip(samples):
+    frame = encode_frame(samples, "float32")
+    assert len(frame) == FRAME_HEADER.size + samples.nbytes
+    np.testing.assert_array_equal(decode_frame(frame), samples)
+
+
+def test_int16_frame_is_half_the_size_and_within_one_step(samples):
+    frame = encode_frame(samples, "int16")
+    assert len(frame) == FRAME_HEADER.size + samples.size * 2
+    scale = FRAME_HEADER.unpack_from(frame)[-1]
+    decoded = decode_frame(frame)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, samples, atol=scale / 2 * 1.001)
+    # The peak is kept
+    assert np.abs(decoded).max() == pytest.approx(np.abs(samples).max(), rel=1e-6)
+
+    silent = decode_frame(encode_frame(np.zeros((4, 2)), "int16"))
+    np.testing.assert_array_equal(silent, np.zeros((4, 2)))
+
+
+def test_malformed_frames_are_rejected(samples):
+    frame = encode_frame(samples[:4], "float32")
+    with pytest.raises(ValueError):
+        decode_frame(frame[:FRAME_HEADER.size - 1])
+    with pytest.raises(ValueError):
+        decode_frame(frame[:-4])
+    with pytest.raises(ValueError):
+        decode_frame(bytes([9]) + frame[1:])
+    with pytest.raises(KeyError):
+        encode_frame(samples, "float64")
+
+
+def test_minmax_decimate_keeps_every_peak(samples):
+    px = 100
+    out = minmax_decimate(samples, px)
+    assert out.shape == (2 * px, 16)
+
+    edges = np.append((np.arange(px) * len(samples)) // px, len(samples))
+    for column in range(px):
+        bucket = samples[edges[column]:edges[column + 1]]
+        np.testing.assert_array_equal(out[2 * column], bucket.min(axis=0))
+        np.testing.assert_array_equal(out[2 * column + 1], bucket.max(axis=0))
+    np.testing.assert_array_equal(out.max(axis=0), samples.max(axis=0))
+    np.testing.assert_array_equal(out.min(axis=0), samples.min(axis=0))
+
+    # Data that already fits, or px 0, is passed through
+    assert minmax_decimate(samples, 512) is samples
+    assert minmax_decimate(samples, 0) is samples
+
+
+def test_run_bounded_limits_jobs_in_flight(monkeypatch):
+    # One job at a time, although the pool has more threads
+    monkeypatch.setattr(streaming, "STREAM_MAX_PENDING", 1)
+    monkeypatch.setattr(streaming, "_slots", None)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def job(x):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return 2 * x
+
+    async def main():
+        results = asyncio.gather(*(run_bounded(job, i) for i in range(6)))
+        await asyncio.sleep(0)
+        queued = pending_jobs()
+        return await results, queued
+
+    results, queued = asyncio.run(main())
+    monkeypatch.setattr(streaming, "_slots", None)
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert queued == 6 and pending_jobs() == 0
+    assert peak[0] == 1
+
+
+def test_ring_buffer_keeps_the_latest_samples():
+    data = np.arange(50 * 3, dtype=np.float32).reshape(50, 3)
+    ring = EEGRingBuffer(16, 3)
+
+    ring.write(data[:5])
+    np.testing.assert_array_equal(ring.latest(16), data[:5])
+    # Writes that wrap around, and one larger than the buffer
+    for start, end in [(5, 14), (14, 21), (21, 45), (45, 50)]:
+        ring.write(data[start:end])
+        np.testing.assert_array_equal(ring.latest(16), data[max(0, end - 16):end])
+        np.testing.assert_array_equal(ring.latest(4), data[end - 4:end])
+    assert ring.total == 50
+
+
+def test_ingest_predicts_every_hop_on_the_latest_window(monkeypatch):
+    # main pulls in every router and its dependencies
+    main = pytest.importorskip("backend.app.main")
+    from fastapi.testclient import TestClient
+
+    windows = []
+
+    def extract(window, fs):
+        windows.append(window)
+        return np.zeros(4)
+
+    async def predict(features):
+        return 1, 0.7, "test-model"
+
+    monkeypatch.setattr(main, "model", object())
+    monkeypatch.setattr(main, "extract_features_from_segment", extract)
+    monkeypatch.setattr(main, "predict_features", predict)
+
+    fs, window_sec, hop_sec = 128, 4, 2
+    data = generate_eeg(20, fs=fs).astype(np.float32)
+    url = f"/ws/eeg/ingest?fs={fs}&window_sec={window_sec}&hop_sec={hop_sec}"
+    with TestClient(main.app).websocket_connect(url) as ws:
+        # One window as a binary frame: the first prediction
+        ws.send_bytes(encode_frame(data[:512], "float32"))
+        first = json.loads(ws.receive_text())
+        # One more hop as JSON
+        ws.send_text(json.dumps({"samples": data[512:768].tolist()}))
+        second = json.loads(ws.receive_text())
+        # Four hops at once are coalesced into one prediction
+        ws.send_bytes(encode_frame(data[768:1792], "int16"))
+        third = json.loads(ws.receive_text())
+        ws.send_text(json.dumps({"samples": [[0.0] * 3]}))
+        invalid = json.loads(ws.receive_text())
+
+    assert (first["end_sample"], first["skipped_hops"]) == (512, 0)
+    assert first["probability"] == 0.7 and first["model_version"] == "test-model"
+    assert first["artifact"] is False
+    assert (second["end_sample"], second["end_sec"], second["skipped_hops"]) == (768, 6.0, 0)
+    assert (third["end_sample"], third["skipped_hops"]) == (1792, 3)
+    assert "Invalid sample block" in invalid["error"]
+
+    np.testing.assert_array_equal(windows[0], data[:512])
+    np.testing.assert_array_equal(windows[1], data[256:768])
+    # The int16 block is quantized; the window is the newest 4 s
+    np.testing.assert_allclose(windows[2], data[1280:1792], atol=0.05)
@@ -0,0 +1,37 @@
+import csv
+import io
+
+import numpy as np
+
+from benchmarks.synthetic import generate_eeg
+
+
+def original_loop(duration, n_channels, fs, seed):
+    """The per-sample loop generate_test_eeg.py used before generate_eeg."""
+    np.random.seed(seed)
+    n_samples = fs * duration
+    time = np.linspace(0, duration, n_samples)
+    rows = []
+    for i in range(n_samples):
+        sample = []
+        for ch in range(n_channels):
+            delta = 20 * np.sin(2 * np.pi * 2 * time[i] + ch * 0.5)
+            theta = 15 * np.sin(2 * np.pi * 6 * time[i] + ch * 0.3)
+            alpha = 25 * np.sin(2 * np.pi * 10 * time[i] + ch * 0.2)
+            beta = 10 * np.sin(2 * np.pi * 20 * time[i] + ch * 0.1)
+            noise = np.random.normal(0, 5)
+            sample.append(round(delta + theta + alpha + beta + noise, 2))
+        rows.append(sample)
+    return rows
+
+
+def to_csv(rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+def test_generate_eeg_reproduces_the_original_sample_file():
+    expected = original_loop(4, 16, 256, seed=42)
+    rows = [[round(value, 2) for value in row] for row in generate_eeg(4, 16, 256, seed=42).tolist()]
+    assert to_csv(rows) == to_csv(expected)
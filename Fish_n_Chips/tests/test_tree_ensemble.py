@@ -0,0 +1,100 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from backend.app.utils.tree_ensemble import compile_forest
+
+EEG_MODEL_PATH = os.path.join("models", "eeg_best_model.joblib")
+EEG_FEATURES_PATH = os.path.join("models", "X_features.joblib")
+SPEECH_MODEL_PATH = os.path.join("models", "speech_ml_model.joblib")
+
+
+def load_model(path):
+    if not os.path.exists(path):
+        pytest.skip(f"{path} not found (models are produced by the training notebooks)")
+    with warnings.catch_warnings():
+        # Models may have been pickled by another scikit-learn version
+        warnings.simplefilter("ignore")
+        return joblib.load(path)
+
+
+def random_rows(model, n_rows, seed=0, nan_fraction=0.0):
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n_rows, model.n_features_in_) * 10 ** rng.uniform(-3, 3, model.n_features_in_)
+    if nan_fraction:
+        X[rng.rand(*X.shape) < nan_fraction] = np.nan
+    return X
+
+
+def assert_same_proba(model, X):
+    compiled = compile_forest(model)
+    if hasattr(model, "feature_names_in_"):
+        # Fitted on a DataFrame; the compiled forest takes plain arrays
+        expected = model.predict_proba(pd.DataFrame(X, columns=model.feature_names_in_))
+    else:
+        expected = model.predict_proba(X)
+    # Batch path
+    assert np.allclose(compiled.predict_proba(X), expected)
+    # Single-row path
+    for i in range(0, len(X), max(1, len(X) // 20)):
+        assert np.allclose(compiled.predict_proba(X[i:i + 1]), expected[i:i + 1])
+    assert np.array_equal(compiled.predict(X), model.classes_.take(np.argmax(expected, axis=1)))
+
+
+@pytest.fixture(scope="module")
+def nan_forest():
+    """A small forest that saw missing values at fit time."""
+    rng = np.random.RandomState(1)
+    X = rng.randn(400, 6)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int)
+    X[rng.rand(*X.shape) < 0.15] = np.nan
+    y[np.isnan(X[:, 0])] = 1
+    return RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+
+
+@pytest.mark.parametrize("nan_fraction", [0.0, 0.2])
+def test_compiled_matches_fitted_forest(nan_forest, nan_fraction):
+    assert_same_proba(nan_forest, random_rows(nan_forest, 500, seed=2, nan_fraction=nan_fraction))
+
+
+def test_compiled_matches_forest_fitted_without_missing_values():
+    rng = np.random.RandomState(3)
+    X = rng.randn(300, 5)
+    y = rng.randint(0, 3, 300)
+    for model in (RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y),
+                  ExtraTreesClassifier(n_estimators=10, random_state=0).fit(X, y)):
+        # NaN at predict time goes to the child with the most training samples
+        assert_same_proba(model, random_rows(model, 300, seed=4, nan_fraction=0.1))
+
+
+@pytest.mark.parametrize("nan_fraction", [0.0, 0.05])
+def test_compiled_matches_eeg_model(nan_fraction):
+    model = load_model(EEG_MODEL_PATH)
+    assert_same_proba(model, random_rows(model, 200, nan_fraction=nan_fraction))
+
+
+def test_compiled_matches_eeg_model_on_training_features():
+    model = load_model(EEG_MODEL_PATH)
+    if not os.path.exists(EEG_FEATURES_PATH):
+        pytest.skip(f"{EEG_FEATURES_PATH} not found")
+    X = joblib.load(EEG_FEATURES_PATH)
+    assert_same_proba(model, X[:500])
+
+
+@pytest.mark.parametrize("nan_fraction", [0.0, 0.05])
+def test_compiled_matches_speech_model(nan_fraction):
+    model = load_model(SPEECH_MODEL_PATH)
+    assert_same_proba(model, random_rows(model, 200, nan_fraction=nan_fraction))
+
+
+def test_compiled_matches_speech_model_on_training_distribution():
+    from train_speech_model import generate_improved_dataset
+
+    model = load_model(SPEECH_MODEL_PATH)
+    df = generate_improved_dataset(400)
+    assert_same_proba(model, df.drop(columns="label").to_numpy(dtype=np.float64))
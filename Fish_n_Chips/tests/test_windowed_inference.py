@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.app import artifacts, windowed_inference
+from backend.app.feature_extraction import extract_features_sliding, segment_data, validate_sliding_window
+from backend.app.windowed_inference import (
+    WINDOW_BATCH_SIZE, _score_recording, count_windows, pending_chunks, plan_chunks, score_windows, shutdown_pool,
+    start_pool
+)
+from benchmarks.synthetic import generate_eeg
+
+FS = 256
+
+
+@pytest.mark.parametrize("window_size_sec, step_size_sec", [(4, 2), (2, 1), (6, 3), (4, 4), (2, 5)])
+def test_whole_second_windows_are_valid(window_size_sec, step_size_sec):
+    validate_sliding_window(window_size_sec, step_size_sec)
+
+
+@pytest.mark.parametrize("window_size_sec, step_size_sec", [(1, 1), (2.5, 1), (4, 1.5), (4, 0), (4, -2)])
+def test_windows_welch_cannot_tile_are_rejected(window_size_sec, step_size_sec):
+    with pytest.raises(ValueError):
+        validate_sliding_window(window_size_sec, step_size_sec)
+
+
+def test_endpoint_maps_invalid_windows_to_400(monkeypatch):
+    # main pulls in every router and its dependencies
+    main = pytest.importorskip("backend.app.main")
+    from fastapi import HTTPException
+
+    monkeypatch.setattr(main, "registry", SimpleNamespace(active=object()))
+    for window_size_sec, step_size_sec in [(0, 2), (1, 1), (4, 0)]:
+        with pytest.raises(HTTPException) as excinfo:
+            main.validate_window_params(window_size_sec, step_size_sec)
+        assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("n_samples", [0, 4 * FS - 1, 4 * FS, 4 * FS + 1, 6 * FS, 30 * FS + 17])
+@pytest.mark.parametrize("window_size_sec, step_size_sec", [(4, 2), (4, 4), (6, 1)])
+def test_count_windows_matches_segment_data(n_samples, window_size_sec, step_size_sec):
+    df = pd.DataFrame(np.zeros((n_samples, 1)))
+    expected = sum(1 for _ in segment_data(df, window_size_sec, step_size_sec, FS))
+    assert count_windows(n_samples, FS, window_size_sec, step_size_sec) == expected
+
+
+@pytest.mark.parametrize("n_windows, batch_size", [(1, 4), (4, 4), (5, 4), (23, 4), (23, 64)])
+def test_chunks_yield_exactly_their_own_windows(n_windows, batch_size):
+    window_size_sec, step_size_sec = 4, 2
+    n_samples = (n_windows - 1) * step_size_sec * FS + window_size_sec * FS
+    data = generate_eeg(n_samples / FS, n_channels=4, fs=FS)
+    assert count_windows(n_samples, FS, window_size_sec, step_size_sec) == n_windows
+
+    chunks = plan_chunks(n_windows, FS, window_size_sec, step_size_sec, batch_size)
+    assert len(chunks) == -(-n_windows // batch_size)
+    assert chunks[0][0] == 0 and chunks[-1][1] == n_samples
+
+    per_chunk = [extract_features_sliding(data[start:end], FS, window_size_sec, step_size_sec)
+                 for start, end in chunks]
+    assert [len(features) for features in per_chunk[:-1]] == [batch_size] * (len(chunks) - 1)
+    np.testing.assert_allclose(np.concatenate(per_chunk),
+                               extract_features_sliding(data, FS, window_size_sec, step_size_sec), rtol=1e-9)
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """A small forest saved the way pool workers open models."""
+    train = generate_eeg(60, fs=FS, seed=1)
+    X = extract_features_sliding(train, FS, 4, 2)
+    y = (X[:, 0] > np.median(X[:, 0])).astype(int)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    path = str(tmp_path / "model.joblib")
+    joblib.dump(model, path)
+    return model, path
+
+
+@pytest.mark.parametrize("mode", ["flag", "drop"])
+def test_pool_scoring_matches_in_process(model_file, mode, monkeypatch):
+    # Set before the pool forks, so workers screen the same way
+    monkeypatch.setattr(artifacts, "ARTIFACT_MODE", mode)
+    monkeypatch.setattr(windowed_inference, "ARTIFACT_MODE", mode)
+    model, path = model_file
+    # More windows than one batch, with artifacts in the first and last chunk
+    eeg = generate_eeg(WINDOW_BATCH_SIZE * 2 + 10, fs=FS)
+    eeg[15 * FS:18 * FS, 2] = 0.0
+    eeg[-8 * FS:-6 * FS, 5] += 2000.0
+    n_windows = count_windows(len(eeg), FS, 4, 2)
+    assert len(plan_chunks(n_windows, FS, 4, 2)) > 1
+
+    expected_proba, expected_clean = _score_recording(model, eeg, FS, 4, 2, 1.0)
+    assert not expected_clean.all()
+
+    start_pool(2)
+    try:
+        proba, clean = asyncio.run(score_windows(model, eeg, FS, 4, 2, model_path=path))
+    finally:
+        shutdown_pool()
+
+    assert pending_chunks() == 0
+    assert proba.shape == (n_windows, 2)
+    np.testing.assert_array_equal(clean, expected_clean)
+    np.testing.assert_allclose(proba, expected_proba, rtol=1e-9)
+    assert np.isnan(proba[~clean, 1]).all() == (mode == "drop")